@@ -21,95 +21,81 @@ Copyright(C) 2016 mk-mode.com All Rights Reserved.
   引数: 日時(TT（地球時）)
           書式：YYYYMMDD or YYYYMMDDHHMMSS
           無指定なら現在(システム日時)を地球時とみなす。
+        [時刻系(utc, tai, tt, ut1; 無指定なら tt)]
+          utc なら、うるう秒(YYYYMMDD235960)も可。
+        または、ファイル入出力による一括計算(-i 入力 -o 出力 [-n 列名,...])
+        または、共有メモリへの恒星時の配信(--publish 名前 [--refresh 秒])
+        または、シャードに分割した長時間の一括計算(--sweep plan|run|status|merge)
+        または、一括計算の設定の自動調整(--autotune [--budget MiB])
 """
+import argparse
 from datetime import datetime
 import re
+import signal
 import sys
 import traceback
+import numpy as np
 # Original library
-from lib import cip_cio     as lcc
-from lib import const       as lcst
-from lib import greenwich   as lgw
-from lib import nutation    as lnt
-from lib import precession  as lpr
-from lib import rotation_fw as lfw
+from lib import cache       as lca
+from lib import clock       as lck
+from lib import columnar    as lcl
+from lib import engine      as leng
+from lib import sweep       as lsw
 from lib import time        as ltm
+from lib import timestamp   as lts
+from lib import tune        as ltu
 
 
 class GreenwichTime:
-    def __init__(self):
-        self.__get_arg()
+    # 表示する量
+    NAMES = [
+        "jd", "jc", "dt", "ut1", "jd_ut1",
+        "gam_b", "phi_b", "psi_b", "eps_a", "d_psi", "d_eps", "r_mtx",
+        "x", "y", "s", "era", "eo",
+        "gast", "gast_deg", "gmst", "gmst_deg", "ee", "ee_deg"
+    ]
 
-    def exec(self):
+    def __init__(self, tt=None, engine=None, names=None, scale="tt", leap=False):
+        """ Initialization
+
+        :param datetime  tt: 時刻(scale の時刻系; None なら現在時刻を地球時とみなす)
+        :param Engine engine: 計算エンジン(None なら新規生成)
+        :param list    names: 計算する量(None なら表示する全ての量)
+        :param string  scale: tt の時刻系("utc", "tai", "tt", "ut1")
+        :param bool     leap: うるう秒の間か(UTC の場合; tt は繰り上げた値)
+        """
+        self.epoch = datetime.now() if tt is None else tt
+        self.scale, self.leap = scale, leap if scale == "utc" else None
+        self.tt = ltm.to_tt(self.epoch, scale, self.leap)
+        self.engine = engine if engine is not None else leng.Engine(1)
+        self.names = self.NAMES if names is None else names
+        self.result = None
+
+    def calc(self):
+        """ 指定の量を計算し、結果(result.Result)に格納
+            * 各量は同名の属性として参照可
+        """
         try:
-            # === Time calculation
-            self.jd     = ltm.calc_jd(self.tt)
-            self.jc     = ltm.calc_jc(self.jd)
-            self.dt     = ltm.calc_dt(self.tt)
-            self.ut1    = ltm.tt2ut1(self.tt, self.dt)
-            self.jd_ut1 = ltm.calc_jd(self.ut1)
-            # === Fukushima-Williams angles for frame bias and precession.
-            #       Ref: iauPfw06(date1, date2, &gamb, &phib, &psib, &epsa)
-            prec = lpr.Precession(self.jc)
-            self.gam_b, self.phi_b, self.psi_b = prec.calc_pfw_06()
-            self.eps_a = prec.calc_obl_06()
-            # === Nutation components.
-            #       Ref: iauNut06a(date1, date2, &dp, &de)
-            nut = lnt.Nutation(self.jc)
-            self.d_psi, self.d_eps = nut.calc_nut_06_a()
-            # === Equinox based nutation x precession x bias matrix.
-            #       Ref: iauFw2m(gamb, phib, psib + dp, epsa + de, rnpb)
-            r_fw = lfw.RotationFw()
-            self.r_mtx = r_fw.fw2m(
-                self.gam_b, self.phi_b,
-                self.psi_b + self.d_psi,
-                self.eps_a + self.d_eps
+            # === 依存グラフに従い、指定の量を計算
+            #       Ref: iauPfw06, iauNut06a, iauFw2m, iauBpn2xy, iauS06,
+            #            iauEra00, iauEors, iauGmst06
+            self.result = self.engine.result(
+                self.epoch, self.names, self.scale, self.leap
             )
-            # === Extract CIP coordinates.
-            #       Ref: iauBpn2xy(rnpb, &x, &y)
-            cc = lcc.CipCio(self.jc)
-            self.x, self.y = cc.bpn2xy(self.r_mtx)
-            # === The CIO locator, s.
-            #       Ref: iauS06(tta, ttb, x, y)
-            self.s = cc.s_06(self.x, self.y)
-            # Greenwich time
-            gw = lgw.Greenwich(self.jd_ut1)
-            # === Greenwich apparent sidereal time.
-            #       Ref: iauEra00(uta, utb), iauEors(rnpb, s)
-            self.era = gw.era_00()
-            self.eo = gw.eors(self.r_mtx, self.s)
-            self.gast = gw.gast(self.era, self.eo)
-            self.gast_deg = self.gast / lcst.PI_180
-            # === Greenwich mean sidereal time, IAU 2006.
-            #       Ref: iauGmst06(uta, utb, tta, ttb)
-            self.gmst = gw.gmst(self.era, self.jc)
-            self.gmst_deg = self.gmst / lcst.PI_180
-            # === Equation of Equinoxes
-            self.ee = gw.ee(self.gast, self.gmst)
-            self.ee_deg = self.ee / lcst.PI_180
-            # === Display
-            self.__display()
         except Exception as e:
             raise
 
-    def __get_arg(self):
-        """ コマンドライン引数の取得
-            * コマンドライン引数で指定した日時を self.tt に設定
-            * コマンドライン引数が存在しなければ、現在時刻を self.tt に設定
-        """
+    def __getattr__(self, name):
+        result = self.__dict__.get("result")
+        if result is not None and name in result.names:
+            return result.item(name)
+        raise AttributeError(name)
+
+    def exec(self):
         try:
-            if len(sys.argv) < 2:
-                self.tt = datetime.now()
-                return
-            if re.search(r"^(\d{8}|\d{14}|\d{20})$", sys.argv[1]) is not(None):
-                dt = sys.argv[1].ljust(20, "0")
-            else:
-                sys.exit(0)
-            try:
-                self.tt = datetime.strptime(dt, "%Y%m%d%H%M%S%f")
-            except ValueError as e:
-                print("Invalid date!")
-                sys.exit(0)
+            self.calc()
+            # === Display
+            self.__display()
         except Exception as e:
             raise
 
@@ -177,9 +163,244 @@ class GreenwichTime:
             raise
 
 
+def get_arg(argv):
+    """ コマンドライン引数の取得
+        * コマンドライン引数で指定した日時と時刻系を返す
+          (2番目の引数は時刻系; 無指定なら地球時)
+        * コマンドライン引数が存在しなければ、現在時刻(地球時とみなす)を返す
+
+    :param  list argv: コマンドライン引数(sys.argv)
+    :return list     : [日時(うるう秒は繰り上げた値), 時刻系, うるう秒の間か]
+    """
+    try:
+        if len(argv) < 2:
+            return [datetime.now(), "tt", False]
+        if re.search(r"^(\d{8}|\d{14}|\d{20})$", argv[1]) is not(None):
+            dt = argv[1].ljust(20, "0")
+        else:
+            sys.exit(0)
+        scale = argv[2] if len(argv) > 2 else "tt"
+        if scale not in ltm.SCALES:
+            print("Invalid time scale!")
+            sys.exit(0)
+        # うるう秒(UTC の 23:59:60)は datetime で表せないため、一括変換で解析
+        tt, bad, leap = lts.parse(np.array([dt.encode()]), leap=True)
+        if len(bad) or (scale != "utc" and leap[0]):
+            print("Invalid date!")
+            sys.exit(0)
+        if np.isnat(ltm.to_tt(tt, scale, leap)[0]):
+            print("Invalid date!")
+            sys.exit(0)
+        return [tt[0].astype(datetime), scale, bool(leap[0])]
+    except Exception as e:
+        raise
+
+def batch(argv):
+    """ ファイル入出力による一括計算
+        * 例: ./greenwich_time.py -i epochs.npy -o result.npy -n era,gast,gmst
+        * チャンクサイズ、最大バッチサイズ、スレッド数は、指定が無ければ
+          自動調整(--autotune)の設定ファイルの値(無ければ既定値)
+
+    :param list argv: コマンドライン引数
+    """
+    try:
+        parser = argparse.ArgumentParser(description="Batch mode")
+        parser.add_argument("-i", "--input", required=True,
+                            help="epochs file (.npy, .i8, .f8, .arrow, .parquet, .txt)")
+        parser.add_argument("-o", "--output", required=True,
+                            help="result file (.npy, .f8, .arrow, .parquet)")
+        parser.add_argument("-n", "--names", default=",".join(lcl.NAMES),
+                            help="output columns (comma separated)")
+        parser.add_argument("-c", "--chunk", type=int,
+                            help="epochs per chunk (default: tuned, or {})".format(
+                                lcl.CHUNK))
+        parser.add_argument("--max-batch", type=int,
+                            help="epochs per engine batch (default: tuned, or {})".format(
+                                leng.MAX_BATCH))
+        parser.add_argument("--column", default="tt",
+                            help="epoch column name (arrow, parquet)")
+        parser.add_argument("--unit", default="us",
+                            help="unit of int64 epochs (s, ms, us, ns)")
+        parser.add_argument("--scale", default="tt", choices=list(ltm.SCALES),
+                            help="time scale of the input epochs")
+        parser.add_argument("--route", default="cio", choices=["cio", "equinox"],
+                            help="GAST route (ERA - EO, or GMST + EE)")
+        parser.add_argument("--cip", default="matrix", choices=["matrix", "xy06"],
+                            help="CIP X,Y from the NPB matrix, or from the X,Y series")
+        parser.add_argument("--frame-quantum", type=float,
+                            help="cache NPB/x/y/s/EO on TT rounded to this (seconds)")
+        parser.add_argument("--cache",
+                            help="persistent result cache file (SQLite)")
+        parser.add_argument("--cache-rows", type=int, default=lca.MAX_ROWS,
+                            help="maximum rows kept in the cache (LRU)")
+        parser.add_argument("--threads", type=int,
+                            help="compute batches in this many threads (default: tuned, or 1)")
+        args = parser.parse_args(argv)
+        tuned = ltu.load(route=args.route, names=args.names.split(","))
+        cache = None
+        if args.cache:
+            cache = lca.ResultCache(args.cache, args.cache_rows)
+        engine = leng.Engine(
+            args.max_batch or tuned.get("max_batch", leng.MAX_BATCH),
+            route=args.route, frame_quantum=args.frame_quantum,
+            threads=args.threads or tuned.get("threads", 1), cip=args.cip
+        )
+        try:
+            _, bad = lcl.run(
+                args.input, args.output, args.names.split(","),
+                args.chunk or tuned.get("chunk", lcl.CHUNK), args.column, args.unit,
+                engine=engine, cache=cache, scale=args.scale
+            )
+            if bad:
+                print("Invalid date rows: {} (first: {})".format(
+                    len(bad), ", ".join(str(i) for i in bad[:10])
+                ), file=sys.stderr)
+        finally:
+            engine.close()
+            if cache is not None:
+                cache.close()
+    except Exception as e:
+        raise
+
+def autotune(argv):
+    """ 一括計算の設定の自動調整(最大バッチサイズ x スレッド数の格子の測定)
+        * 例: ./greenwich_time.py --autotune --budget 256
+
+    :param list argv: コマンドライン引数
+    """
+    try:
+        parser = argparse.ArgumentParser(description="Batch autotuner")
+        parser.add_argument("--autotune", action="store_true")
+        parser.add_argument("--budget", type=float, default=ltu.BUDGET / (1 << 20),
+                            help="memory budget (MiB)")
+        parser.add_argument("--batches", default=",".join(str(b) for b in ltu.BATCHES),
+                            help="candidate batch sizes (comma separated)")
+        parser.add_argument("--threads",
+                            help="candidate thread counts (comma separated; default: 1, 2, 4, .. CPUs)")
+        parser.add_argument("--epochs", type=int, default=ltu.N_EPOCHS,
+                            help="epochs per measurement")
+        parser.add_argument("-n", "--names", default=",".join(lcl.NAMES),
+                            help="calculated columns (comma separated)")
+        parser.add_argument("--route", default="cio", choices=["cio", "equinox"],
+                            help="GAST route (ERA - EO, or GMST + EE)")
+        parser.add_argument("--config",
+                            help="settings file (default: ${} or {})".format(
+                                ltu.ENV_NAME, ltu.CONFIG))
+        args = parser.parse_args(argv)
+        res = ltu.autotune(
+            args.epochs, args.names.split(","), int(args.budget * (1 << 20)),
+            [int(b) for b in args.batches.split(",")],
+            [int(k) for k in args.threads.split(",")] if args.threads else None,
+            route=args.route, path=args.config
+        )
+        print("max_batch threads  chunk   MiB  epochs/s")
+        for row in res["grid"]:
+            print("{:9d} {:7d} {:6d} {:5.0f}  {}".format(
+                row["max_batch"], row["threads"], row["chunk"], row["bytes"] / (1 << 20),
+                "{:.0f}".format(args.epochs / row["seconds"])
+                if row["seconds"] is not None else "skipped"
+            ))
+        print("chosen: max_batch={max_batch}, threads={threads}, chunk={chunk}".format(**res))
+        print("saved: {}".format(ltu.path_of(args.config)))
+    except Exception as e:
+        raise
+
+def publish(argv):
+    """ 共有メモリへの恒星時の配信(デーモン)
+        * 例: ./greenwich_time.py --publish greenwich_clock --refresh 10
+
+    :param list argv: コマンドライン引数
+    """
+    try:
+        parser = argparse.ArgumentParser(description="Sidereal clock publisher")
+        parser.add_argument("--publish", default=lck.NAME,
+                            help="shared memory name")
+        parser.add_argument("--refresh", type=float, default=lck.REFRESH,
+                            help="refresh interval (seconds)")
+        parser.add_argument("--tt-offset", type=float, default=lck.TT_OFFSET,
+                            help="TT - system clock (seconds)")
+        parser.add_argument("--route", default="cio", choices=["cio", "equinox"],
+                            help="GAST route (ERA - EO, or GMST + EE)")
+        args = parser.parse_args(argv)
+        pub = lck.Publisher(
+            args.publish, args.refresh, args.tt_offset,
+            leng.Engine(1, route=args.route)
+        )
+        # SIGTERM でも共有メモリを削除して終了
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        try:
+            pub.run()
+        finally:
+            pub.close()
+    except Exception as e:
+        raise
+
+def sweep(argv):
+    """ シャードに分割した長時間の一括計算
+        * 例: ./greenwich_time.py --sweep plan work --start 2000-01-01 --end 2030-01-01 --step 0.5
+              ./greenwich_time.py --sweep run work --worker 0 --workers 4
+              ./greenwich_time.py --sweep merge work -o result.npy
+
+    :param list argv: コマンドライン引数
+    """
+    try:
+        parser = argparse.ArgumentParser(description="Sharded sweep")
+        parser.add_argument("--sweep", required=True,
+                            choices=["plan", "run", "status", "merge"])
+        parser.add_argument("dir", help="work directory (manifest and shards)")
+        parser.add_argument("--start", help="first epoch (TT, ISO 8601)")
+        parser.add_argument("--end", help="end epoch (TT, exclusive)")
+        parser.add_argument("--step", type=float, help="interval (seconds)")
+        parser.add_argument("-n", "--names", default=",".join(lcl.NAMES),
+                            help="output columns (comma separated)")
+        parser.add_argument("--shard-size", type=int, default=lsw.SHARD_SIZE,
+                            help="epochs per shard")
+        parser.add_argument("--route", default="cio", choices=["cio", "equinox"],
+                            help="GAST route (ERA - EO, or GMST + EE)")
+        parser.add_argument("--worker", type=int, default=0,
+                            help="this worker's number (shard % workers)")
+        parser.add_argument("--workers", type=int, default=1,
+                            help="number of workers")
+        parser.add_argument("-o", "--output",
+                            help="merged result file (.npy, .f8, .arrow, .parquet)")
+        args = parser.parse_args(argv)
+        if args.sweep == "plan":
+            if args.start is None or args.end is None or args.step is None:
+                parser.error("plan requires --start, --end and --step")
+            m = lsw.plan(
+                args.dir, args.start, args.end, args.step,
+                args.names.split(","), args.shard_size, route=args.route
+            )
+            print("{} epochs, {} shards".format(m["count"], len(m["shards"])))
+        elif args.sweep == "run":
+            lsw.run(args.dir, args.worker, args.workers)
+        elif args.sweep == "status":
+            done, pending = lsw.status(args.dir)
+            print("done: {}, pending: {}".format(len(done), len(pending)))
+        else:
+            if args.output is None:
+                parser.error("merge requires -o")
+            print("{} epochs".format(lsw.merge(args.dir, args.output)))
+    except Exception as e:
+        raise
+
+
 if __name__ == '__main__':
     try:
-        GreenwichTime().exec()
+        if len(sys.argv) > 1 and sys.argv[1] == "--sweep":
+            sweep(sys.argv[1:])
+            sys.exit(0)
+        if len(sys.argv) > 1 and sys.argv[1] == "--autotune":
+            autotune(sys.argv[1:])
+            sys.exit(0)
+        if len(sys.argv) > 1 and sys.argv[1] == "--publish":
+            publish(sys.argv[1:])
+            sys.exit(0)
+        if len(sys.argv) > 1 and sys.argv[1].startswith("-"):
+            batch(sys.argv[1:])
+            sys.exit(0)
+        tt, scale, leap = get_arg(sys.argv)
+        GreenwichTime(tt, scale=scale, leap=leap).exec()
     except Exception as e:
         traceback.print_exc()
         sys.exit(1)
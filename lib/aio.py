@@ -0,0 +1,170 @@
+"""
+Module for the asyncio API
+  * イベントループを止めないよう、計算(Engine.compute)は executor
+    (既定は専用の ThreadPoolExecutor)で実行し、その完了を await する
+    - await AsyncEngine.compute(epochs)  : 1回の計算
+    - async for res in AsyncEngine.stream(chunks): エポック配列のチャンクの
+      (async)イテラブルを読み込み、チャンク毎の結果を入力の順に返す
+  * 背圧(backpressure)
+    - 実行中(executor に投入済み)の計算は max_pending 個まで
+      (compute の呼び出し元全体で共有; 超えた分は executor に投入せずに待つ)
+    - stream は、実行中のチャンクが max_pending 個に達すると、最も古い結果を
+      返すまで次のチャンクを読み込まない(結果を消費しなければ入力も止まる)
+    このため、入力・結果のバッファは max_pending チャンク分で上限となる
+  * 重い計算は GIL を解放する NumPy の配列演算のため、executor のスレッドでの
+    計算中もイベントループは動作する
+  * Engine は生成したスレッド以外からの呼び出しではスレッド毎の作業領域を
+    使用するため、複数のワーカーの executor で共有できる
+"""
+import asyncio
+import collections
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from lib import engine as leng
+
+# 既定の実行中の計算の最大数
+MAX_PENDING = 2
+
+# 既定の AsyncEngine(初回使用時に生成)
+_default = None
+_lock = threading.Lock()
+
+
+class AsyncEngine:
+    def __init__(self, engine=None, executor=None, workers=1,
+                 max_pending=MAX_PENDING):
+        """ Initialization
+
+        :param Engine      engine: 計算エンジン(None なら既定の設定で生成)
+        :param Executor  executor: 計算を実行する executor
+                                   (None なら workers スレッドの ThreadPoolExecutor)
+        :param int        workers: 既定の executor のスレッド数
+        :param int    max_pending: 実行中の計算の最大数
+        """
+        self.engine = engine if engine is not None else leng.Engine()
+        self.own_executor = executor is None
+        self.executor = executor if executor is not None else \
+                        ThreadPoolExecutor(workers, thread_name_prefix="greenwich-aio")
+        self.max_pending = max_pending
+        # イベントループ毎の実行中の計算数の制限
+        self.sems = weakref.WeakKeyDictionary()
+
+    async def compute(self, epochs, names=leng.NAMES, scale="tt", leap=None):
+        """ 指定の量の計算(executor で実行)
+
+        :param  datetime/list/np.ndarray epochs: 時刻(単一、または配列)
+        :param  list                      names: 要求する量の名前
+        :param  string                    scale: epochs の時刻系
+                                                 ("utc", "tai", "tt", "ut1")
+        :param  bool/np.ndarray            leap: うるう秒の間か(UTC の場合)
+        :return dict                           : {名前: 値}
+        """
+        try:
+            loop = asyncio.get_running_loop()
+            sem = self.sems.get(loop)
+            if sem is None:
+                sem = self.sems[loop] = asyncio.Semaphore(self.max_pending)
+            async with sem:
+                return await loop.run_in_executor(
+                    self.executor,
+                    functools.partial(
+                        self.engine.compute, epochs, names, scale=scale, leap=leap
+                    )
+                )
+        except Exception as e:
+            raise
+
+    async def stream(self, chunks, names=leng.NAMES, scale="tt"):
+        """ チャンク毎の計算(async generator)
+            * 最大 max_pending 個のチャンクを並行して計算し、結果は入力の順に返す
+            * 途中で終了(break 等)した場合、実行中の計算の結果は破棄
+            * UTC のうるう秒を含む場合は、チャンクを (時刻の配列, うるう秒の間か)
+              の組とする
+
+        :param  AsyncIterable/Iterable chunks: 時刻の配列(チャンク)のイテラブル
+        :param  list                    names: 要求する量の名前
+        :param  string                  scale: 時刻系("utc", "tai", "tt", "ut1")
+        :return AsyncIterator                : チャンク毎の {名前: np.ndarray}
+        """
+        pending = collections.deque()
+        try:
+            async for chunk in _aiter(chunks):
+                epochs, leap = chunk if isinstance(chunk, tuple) else (chunk, None)
+                pending.append(asyncio.ensure_future(
+                    self.compute(epochs, names, scale, leap)
+                ))
+                if len(pending) >= self.max_pending:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def close(self):
+        """ executor(既定の executor の場合)とエンジンのスレッドプールの終了 """
+        try:
+            if self.own_executor:
+                self.executor.shutdown()
+            self.engine.close()
+        except Exception as e:
+            raise
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+
+async def _aiter(chunks):
+    """ イテラブル(同期/非同期)を async イテレータとして読み込む """
+    if hasattr(chunks, "__aiter__"):
+        async for chunk in chunks:
+            yield chunk
+    else:
+        for chunk in chunks:
+            yield chunk
+
+def default():
+    """ 既定の AsyncEngine(初回使用時に生成)
+
+    :return AsyncEngine: 既定の設定の AsyncEngine
+    """
+    global _default
+    try:
+        with _lock:
+            if _default is None:
+                _default = AsyncEngine()
+            return _default
+    except Exception as e:
+        raise
+
+async def compute(epochs, names=leng.NAMES, scale="tt", leap=None):
+    """ 既定の AsyncEngine による計算
+
+    :param  datetime/list/np.ndarray epochs: 時刻(単一、または配列)
+    :param  list                      names: 要求する量の名前
+    :param  string                    scale: epochs の時刻系
+    :param  bool/np.ndarray            leap: うるう秒の間か(UTC の場合)
+    :return dict                           : {名前: 値}
+    """
+    try:
+        return await default().compute(epochs, names, scale, leap)
+    except Exception as e:
+        raise
+
+def stream(chunks, names=leng.NAMES, scale="tt"):
+    """ 既定の AsyncEngine によるチャンク毎の計算(async generator)
+
+    :param  AsyncIterable/Iterable chunks: 時刻の配列(チャンク)のイテラブル
+    :param  list                    names: 要求する量の名前
+    :param  string                  scale: 時刻系("utc", "tai", "tt", "ut1")
+    :return AsyncIterator                : チャンク毎の {名前: np.ndarray}
+    """
+    try:
+        return default().stream(chunks, names, scale)
+    except Exception as e:
+        raise
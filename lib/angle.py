@@ -1,21 +1,43 @@
 """
 Module for angles
 """
+import math
+import numpy as np
 from lib import const as cst
 
 
 def norm_angle(angle):
     """ Normalize angle into the range 0 <= a < 2pi.
+        * 剰余(fmod)で正規化するため、角度の大きさに依らず一定コスト
+        * 配列の場合は norm_angle_arr で一括処理
 
-    :param  float angle: Before normalized
-    :return float angle: Normalized angle
+    :param  float/np.ndarray angle: Before normalized
+    :return float/np.ndarray angle: Normalized angle
     """
     try:
-        while angle < 0:
+        if isinstance(angle, np.ndarray):
+            return norm_angle_arr(angle)
+        angle = math.fmod(angle, cst.PI2)
+        if angle < 0:
             angle += cst.PI2
-        while angle > cst.PI2:
-            angle -= cst.PI2
+            if angle >= cst.PI2:
+                angle = 0.0
         return angle
     except Exception as e:
         raise
 
+def norm_angle_arr(angle, out=None):
+    """ Normalize angles into the range 0 <= a < 2pi. (array version)
+
+    :param  np.ndarray angle: Before normalized
+    :param  np.ndarray   out: Output buffer (None なら新規確保, angle 自身も可)
+    :return np.ndarray angle: Normalized angles
+    """
+    try:
+        a = np.fmod(angle, cst.PI2, out=out)
+        np.add(a, cst.PI2, out=a, where=a < 0)
+        # 負の微小値に 2pi を加えて 2pi に丸まった場合
+        a[a >= cst.PI2] = 0.0
+        return a
+    except Exception as e:
+        raise
@@ -0,0 +1,411 @@
+"""
+Module for series kernel backends
+  * 章動(luni-solar, planetary)、CIO locator s の級数計算の実装を切り替える
+    - python: 従来通りの純 Python ループ(math.sin, math.cos)
+    - numpy : 項 x エポックの行列演算(エポック配列を一括計算)
+    - jit   : Numba による JIT コンパイル(sin/cos の累積を融合し、一時配列なし,
+              GIL を解放)
+              numba が無い環境では numpy にフォールバック
+  * 既定のバックエンドは環境変数 GREENWICH_BACKEND、または set_default で指定
+  * jit のコンパイル結果はディスクにキャッシュ(numba の cache=True)
+    キャッシュ先は環境変数 NUMBA_CACHE_DIR で変更可
+
+  各バックエンドは以下のメソッドを持つ
+    - reserve(n_terms, size): 作業領域の確保(numpy のみ有効)
+    - lunisolar(t, fa, dat): 日月章動 [dpsi, deps] (Unit: 0.1 micro arcsecond)
+    - planetary(fa, dat)   : 惑星章動 [dpsi, deps] (Unit: 0.1 micro arcsecond)
+    - series(fa, mult, amp): sum(amp_sin * sin(arg) + amp_cos * cos(arg))
+    - multi_series(fa, mult, amp): 同じ引数の K 本の級数(amp は sin, cos の振幅の
+                             K 組 (項 x 2K); 各項の sin, cos は1回だけ計算)
+  t はユリウス世紀数(float または配列)、fa は基本引数のリスト(各 float または配列)
+"""
+import math
+import os
+import warnings
+import numpy as np
+from lib import const as cst
+try:
+    import numba
+except ImportError:
+    numba = None
+
+ENV_NAME = "GREENWICH_BACKEND"
+DEFAULT  = "numpy"
+
+
+class PythonBackend:
+    """ 純 Python ループによる級数計算(配列の場合はエポック毎に計算) """
+    name = "python"
+
+    def reserve(self, n_terms, size, n_args=0):
+        pass
+
+    def lunisolar(self, t, fa, dat):
+        try:
+            if np.ndim(t):
+                fa = np.broadcast_arrays(*fa)
+                res = [self.lunisolar(t_i, [a[i] for a in fa], dat)
+                       for i, t_i in enumerate(t)]
+                return [np.array(c) for c in zip(*res)]
+            l, lp, f, d, om = fa
+            dp, de = 0.0, 0.0
+            for x in reversed(dat.tolist()):
+                arg = (x[0] * l + x[1] * lp + x[2] * f \
+                     + x[3] * d + x[4] * om) % cst.PI2
+                sarg, carg = math.sin(arg), math.cos(arg)
+                dp += (x[5] + x[6] * t) * sarg + x[ 7] * carg
+                de += (x[8] + x[9] * t) * carg + x[10] * sarg
+            return [dp, de]
+        except Exception as e:
+            raise
+
+    def planetary(self, fa, dat):
+        try:
+            if np.ndim(fa[0]):
+                fa = np.broadcast_arrays(*fa)
+                res = [self.planetary([a[i] for a in fa], dat)
+                       for i in range(len(fa[0]))]
+                return [np.array(c) for c in zip(*res)]
+            l, p, f, d, om, me, ve, ea, ma, ju, sa, ur, ne, pa = fa
+            dp, de = 0.0, 0.0
+            for x in reversed(dat.tolist()):
+                arg = (x[ 0] * l  + x[ 1] * p  + x[ 2] * f  + x[ 3] * d  \
+                     + x[ 4] * om + x[ 5] * me + x[ 6] * ve + x[ 7] * ea \
+                     + x[ 8] * ma + x[ 9] * ju + x[10] * sa + x[11] * ur \
+                     + x[12] * ne + x[13] * pa) % cst.PI2
+                sarg, carg = math.sin(arg), math.cos(arg)
+                dp += x[14] * sarg + x[15] * carg
+                de += x[16] * sarg + x[17] * carg
+            return [dp, de]
+        except Exception as e:
+            raise
+
+    def series(self, fa, mult, amp):
+        try:
+            if np.ndim(fa[0]):
+                fa = np.broadcast_arrays(*fa)
+                return np.array([
+                    self.series([a[i] for a in fa], mult, amp)
+                    for i in range(len(fa[0]))
+                ])
+            w = 0.0
+            mult, amp = mult.tolist(), amp.tolist()
+            for i in reversed(range(len(mult))):
+                a = 0.0
+                for j in range(len(fa)):
+                    a += mult[i][j] * fa[j]
+                w += amp[i][0] * math.sin(a) + amp[i][1] * math.cos(a)
+            return w
+        except Exception as e:
+            raise
+
+    def multi_series(self, fa, mult, amp):
+        try:
+            k = amp.shape[1] // 2
+            # 項毎の ([(基本引数, 乗数)], [(級数, sin の振幅, cos の振幅)])
+            # (乗数、振幅が 0 のものは除く)
+            terms = [
+                ([(j, m_j) for j, m_j in enumerate(m) if m_j],
+                 [(c, a[2 * c], a[2 * c + 1]) for c in range(k)
+                  if a[2 * c] or a[2 * c + 1]])
+                for m, a in zip(mult.tolist(), amp.tolist())
+            ]
+            if np.ndim(fa[0]):
+                fa = np.broadcast_arrays(*fa)
+                res = [self.__multi([a[i] for a in fa], terms, k)
+                       for i in range(len(fa[0]))]
+                return [np.array(c) for c in zip(*res)]
+            return self.__multi(fa, terms, k)
+        except Exception as e:
+            raise
+
+    def __multi(self, fa, terms, k):
+        """ multi_series の1エポック分 """
+        w = [0.0] * k
+        for m, amps in reversed(terms):
+            a = 0.0
+            for j, m_j in m:
+                a += m_j * fa[j]
+            sarg, carg = math.sin(a), math.cos(a)
+            for c, a_s, a_c in amps:
+                w[c] += a_s * sarg + a_c * carg
+        return w
+
+
+class NumpyBackend:
+    """ 項 x エポックの行列演算による級数計算
+        * reserve で作業領域を確保しておくと、その大きさ以内の計算では
+          sin, cos の配列(項 x エポック)を新たに確保しない
+          - "sc"  : 級数毎の引数の sin, cos (lunisolar, planetary, series)
+          - "harm": 共有の引数の sin, cos (harmonic.Harmonics; phasor なら位相子)
+          - "sel" : Harmonics.gather で抜き出した行の sin, cos
+          sc と harm は同じバッチで併用するため(章動の計画の使用時等)、別の領域
+    """
+    name = "numpy"
+
+    def __init__(self):
+        self.ws, self.size = None, 0
+
+    def reserve(self, n_terms, size, n_args=0):
+        """ 作業領域の確保
+
+        :param int n_terms: 最大の項数(級数毎の sin, cos)
+        :param int    size: 最大のエポック数
+        :param int  n_args: 共有の引数の数(Harmonics の sin, cos, 抜き出した行)
+        """
+        try:
+            self.ws = {
+                "sc":   np.empty(2 * n_terms * size),
+                "harm": np.empty(2 * n_args * size),
+                "sel":  np.empty(n_args * size),
+            }
+            self.size = size
+        except Exception as e:
+            raise
+
+    def buffer(self, name, n, m, dtype="float64", row=0):
+        """ 作業領域のビュー(row 行目からの n x m の連続した配列)
+
+        :param  string  name: 領域名("sc", "harm", "sel")
+        :param  int        n: 行数
+        :param  int        m: エポック数
+        :param  string dtype: "float64", または "complex128"(float64 2つ分)
+        :param  int      row: 先頭の行(dtype の m 要素を1行とする)
+        :return np.ndarray  : ビュー(作業領域が無い、または収まらなければ None)
+        """
+        try:
+            if self.ws is None or m > self.size:
+                return None
+            w = self.ws[name]
+            if dtype == "complex128":
+                w = w[:len(w) // 2 * 2].view("complex128")
+            if (row + n) * m > len(w):
+                return None
+            return w[row * m:(row + n) * m].reshape(n, m)
+        except Exception as e:
+            raise
+
+    def lunisolar(self, t, fa, dat):
+        try:
+            sarg, carg = self.__sincos(dat[:, :5], fa, True)
+            dp = dat[:, 5] @ sarg + (dat[:, 6] @ sarg) * t + dat[:,  7] @ carg
+            de = dat[:, 8] @ carg + (dat[:, 9] @ carg) * t + dat[:, 10] @ sarg
+            return [self.__out(dp, t), self.__out(de, t)]
+        except Exception as e:
+            raise
+
+    def planetary(self, fa, dat):
+        try:
+            sarg, carg = self.__sincos(dat[:, :14], fa, True)
+            dp = dat[:, 14] @ sarg + dat[:, 15] @ carg
+            de = dat[:, 16] @ sarg + dat[:, 17] @ carg
+            return [self.__out(dp, fa[0]), self.__out(de, fa[0])]
+        except Exception as e:
+            raise
+
+    def series(self, fa, mult, amp):
+        try:
+            sarg, carg = self.__sincos(mult, fa, False)
+            return self.__out(amp[:, 0] @ sarg + amp[:, 1] @ carg, fa[0])
+        except Exception as e:
+            raise
+
+    def multi_series(self, fa, mult, amp):
+        try:
+            sarg, carg = self.__sincos(mult, fa, False)
+            w = amp[:, 0::2].T @ sarg + amp[:, 1::2].T @ carg
+            return [self.__out(v, fa[0]) for v in w]
+        except Exception as e:
+            raise
+
+    def __sincos(self, mult, fa, wrap):
+        """ 各項の引数の sin, cos (項 x エポック)
+            * 引数は cos の領域で計算し、sin を求めてから上書きで cos にする
+        """
+        fa = np.array(np.broadcast_arrays(*fa), dtype="float64")
+        fa = fa.reshape(len(fa), -1)
+        n, m = mult.shape[0], fa.shape[1]
+        buf = self.buffer("sc", 2 * n, m)
+        if buf is None:
+            buf = np.empty((2 * n, m))
+        sarg, carg = buf[:n], buf[n:]
+        np.matmul(mult, fa, out=carg)
+        if wrap:
+            np.remainder(carg, cst.PI2, out=carg)
+        np.sin(carg, out=sarg)
+        return sarg, np.cos(carg, out=carg)
+
+    def __out(self, val, t):
+        """ 単一エポックならスカラーに戻す """
+        return val if np.ndim(t) else float(val[0])
+
+
+def _lunisolar_loop(t, fa, dat, dp, de):
+    for i in range(t.shape[0]):
+        p, e = 0.0, 0.0
+        for k in range(dat.shape[0] - 1, -1, -1):
+            arg = (dat[k, 0] * fa[0, i] + dat[k, 1] * fa[1, i] \
+                 + dat[k, 2] * fa[2, i] + dat[k, 3] * fa[3, i] \
+                 + dat[k, 4] * fa[4, i]) % cst.PI2
+            sarg, carg = math.sin(arg), math.cos(arg)
+            p += (dat[k, 5] + dat[k, 6] * t[i]) * sarg + dat[k,  7] * carg
+            e += (dat[k, 8] + dat[k, 9] * t[i]) * carg + dat[k, 10] * sarg
+        dp[i], de[i] = p, e
+
+def _planetary_loop(fa, dat, dp, de):
+    for i in range(fa.shape[1]):
+        p, e = 0.0, 0.0
+        for k in range(dat.shape[0] - 1, -1, -1):
+            arg = 0.0
+            for j in range(14):
+                arg += dat[k, j] * fa[j, i]
+            arg %= cst.PI2
+            sarg, carg = math.sin(arg), math.cos(arg)
+            p += dat[k, 14] * sarg + dat[k, 15] * carg
+            e += dat[k, 16] * sarg + dat[k, 17] * carg
+        dp[i], de[i] = p, e
+
+def _series_loop(fa, mult, amp, w):
+    for i in range(fa.shape[1]):
+        v = 0.0
+        for k in range(mult.shape[0] - 1, -1, -1):
+            a = 0.0
+            for j in range(mult.shape[1]):
+                a += mult[k, j] * fa[j, i]
+            v += amp[k, 0] * math.sin(a) + amp[k, 1] * math.cos(a)
+        w[i] = v
+
+def _multi_series_loop(fa, mult, amp, w):
+    for i in range(fa.shape[1]):
+        for c in range(w.shape[0]):
+            w[c, i] = 0.0
+        for k in range(mult.shape[0] - 1, -1, -1):
+            a = 0.0
+            for j in range(mult.shape[1]):
+                a += mult[k, j] * fa[j, i]
+            sarg, carg = math.sin(a), math.cos(a)
+            for c in range(w.shape[0]):
+                w[c, i] += amp[k, 2 * c] * sarg + amp[k, 2 * c + 1] * carg
+
+if numba is not None:
+    # nogil: スレッド並列(engine の threads)時に GIL を解放して実行
+    _lunisolar_loop = numba.njit(cache=True, nogil=True)(_lunisolar_loop)
+    _planetary_loop = numba.njit(cache=True, nogil=True)(_planetary_loop)
+    _series_loop    = numba.njit(cache=True, nogil=True)(_series_loop)
+    _multi_series_loop = numba.njit(cache=True, nogil=True)(_multi_series_loop)
+
+
+class JitBackend:
+    """ Numba による JIT コンパイル済みループでの級数計算 """
+    name = "jit"
+
+    def reserve(self, n_terms, size, n_args=0):
+        pass
+
+    def lunisolar(self, t, fa, dat):
+        try:
+            t_a = np.atleast_1d(np.asarray(t, dtype="float64"))
+            fa_a = self.__fa(fa, t_a.shape[0])
+            dp, de = np.empty_like(t_a), np.empty_like(t_a)
+            _lunisolar_loop(t_a, fa_a, np.ascontiguousarray(dat), dp, de)
+            return [self.__out(dp, t), self.__out(de, t)]
+        except Exception as e:
+            raise
+
+    def planetary(self, fa, dat):
+        try:
+            n = np.size(fa[0])
+            dp, de = np.empty(n), np.empty(n)
+            _planetary_loop(
+                self.__fa(fa, n), np.ascontiguousarray(dat), dp, de
+            )
+            return [self.__out(dp, fa[0]), self.__out(de, fa[0])]
+        except Exception as e:
+            raise
+
+    def series(self, fa, mult, amp):
+        try:
+            n = np.size(fa[0])
+            w = np.empty(n)
+            _series_loop(
+                self.__fa(fa, n), np.ascontiguousarray(mult),
+                np.ascontiguousarray(amp), w
+            )
+            return self.__out(w, fa[0])
+        except Exception as e:
+            raise
+
+    def multi_series(self, fa, mult, amp):
+        try:
+            n = np.size(fa[0])
+            w = np.empty((amp.shape[1] // 2, n))
+            _multi_series_loop(
+                self.__fa(fa, n), np.ascontiguousarray(mult),
+                np.ascontiguousarray(amp), w
+            )
+            return [self.__out(v, fa[0]) for v in w]
+        except Exception as e:
+            raise
+
+    def __fa(self, fa, n):
+        """ 基本引数 -> (引数の数, エポック数) の配列 """
+        return np.array(
+            [np.broadcast_to(np.asarray(a, dtype="float64"), (n,)) for a in fa]
+        )
+
+    def __out(self, val, t):
+        return val if np.ndim(t) else float(val[0])
+
+
+BACKENDS = {
+    "python": PythonBackend(),
+    "numpy":  NumpyBackend(),
+}
+if numba is not None:
+    BACKENDS["jit"] = JitBackend()
+
+_default = os.environ.get(ENV_NAME, DEFAULT)
+
+
+def set_default(name):
+    """ 既定のバックエンドの設定
+
+    :param string name: "python", "numpy", "jit"
+    """
+    global _default
+    try:
+        get(name)
+        _default = name
+    except Exception as e:
+        raise
+
+def get(name=None):
+    """ バックエンドの取得
+        * jit が利用できない(numba が無い)場合は numpy にフォールバック
+
+    :param  string name: バックエンド名(None なら既定、インスタンスならそのまま)
+    :return            : バックエンド
+    """
+    try:
+        if name is not None and not isinstance(name, str):
+            return name
+        name = name or _default
+        if name == "jit" and name not in BACKENDS:
+            warnings.warn("numba is not installed; falling back to numpy")
+            name = "numpy"
+        if name not in BACKENDS:
+            raise ValueError("Unknown backend: {}".format(name))
+        return BACKENDS[name]
+    except Exception as e:
+        raise
+
+def new(name=None):
+    """ 専用のバックエンドの生成(作業領域を共有しないインスタンス)
+
+    :param  string name: バックエンド名(None なら既定)
+    :return            : バックエンド
+    """
+    try:
+        return type(get(name))()
+    except Exception as e:
+        raise
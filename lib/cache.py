@@ -0,0 +1,239 @@
+"""
+Class for the persistent result cache
+  * 計算結果を SQLite ファイルに保存し、同じエポックの再計算を省く
+  * キーはエポック(地球時, 1970-01-01 からのマイクロ秒)とバージョン
+    - バージョンはモデルのバージョン(VERSION)と、計算したエンジンの設定
+      (Engine.signature; 計算経路、frame キャッシュ、章動の計画等)
+      設定の異なるエンジン(近似の設定を含む)の結果は共有しない
+  * 行数の上限を超えると、最終参照が古い順に削除(LRU)
+    - 行数は開いた時に1度だけ数え、以降は保存した行数を加算した見積もり
+      (見積もりが上限を超えた時のみ数え直す)
+    - 最終参照時刻は、前回の更新から TOUCH 秒以上経った行のみ更新
+      (参照の度に書き込まないため、読み込みのみのプロセスはほぼロックを取らない)
+  * WAL モードで開くため、複数プロセスからの同時読み込みが可能
+    (書き込みは SQLite のロックで直列化)
+"""
+import sqlite3
+import time
+import numpy as np
+from lib import columnar as lcl
+from lib import engine   as leng
+from lib import time     as ltm
+
+# モデル/設定のバージョン(計算方法を変えたら更新し、古い結果を無効にする)
+VERSION = "IAU2006/2000A;ut1=us;rev=1"
+# 既定の最大行数
+MAX_ROWS = 1000000
+# SQL の1文あたりのパラメータ数の上限
+SQL_VARS = 500
+# 最終参照時刻の更新間隔(Unit: 秒; LRU の時刻の分解能)
+TOUCH = 60.0
+
+
+class ResultCache:
+    def __init__(self, path, max_rows=MAX_ROWS, version=VERSION):
+        """ Initialization
+
+        :param string  path: キャッシュファイルのパス
+        :param int max_rows: 最大行数(エポック数)
+        :param string version: モデルのバージョン(エンジンの設定を付加してキーとする)
+        """
+        self.path, self.max_rows, self.version = path, max_rows, version
+        self.hits, self.misses = 0, 0
+        self.conn = sqlite3.connect(path, timeout=60.0)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        cols = ", ".join("{} REAL".format(name) for name in lcl.COLUMNS)
+        with self.conn:
+            self.conn.execute((
+                "CREATE TABLE IF NOT EXISTS results ("
+                "version TEXT NOT NULL, epoch INTEGER NOT NULL, "
+                "atime REAL NOT NULL, {}, PRIMARY KEY (version, epoch))"
+            ).format(cols))
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS results_atime ON results (atime)"
+            )
+            # 出力可能な列が増えた場合は、既存のファイルに列を追加
+            cols = [row[1] for row in self.conn.execute("PRAGMA table_info(results)")]
+            for name in lcl.COLUMNS:
+                if name not in cols:
+                    self.conn.execute(
+                        "ALTER TABLE results ADD COLUMN {} REAL".format(name)
+                    )
+        self.count = self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def version_of(self, engine, scale="tt"):
+        """ エンジンの結果のバージョン(キー)
+            * UTC の入力は UT1 を UTC の ΔT で求めるため、別のバージョンとする
+
+        :param  Engine engine: 計算エンジン
+        :param  string  scale: 入力の時刻系
+        :return string       : モデルのバージョンとエンジンの設定
+        """
+        try:
+            version = "{};{}".format(self.version, engine.signature())
+            return version + ";ut1=utc" if scale == "utc" else version
+        except Exception as e:
+            raise
+
+    def lookup(self, tt, names, version):
+        """ 一括検索(ヒットとミスに分割)
+
+        :param  np.ndarray tt: 地球時(datetime64)
+        :param  list    names: 要求する量の名前
+        :param  string version: バージョン(version_of)
+        :return list         : [{名前: np.ndarray(ミスは NaN)}, ヒットのマスク]
+        """
+        try:
+            self.__check(names)
+            keys = self.__keys(tt)
+            res = {name: np.full(len(keys), np.nan) for name in names}
+            hit = np.zeros(len(keys), dtype=bool)
+            uniq = np.unique(keys)
+            found_keys, found_vals, stale = [], [], []
+            stale_before = time.time() - TOUCH
+            sql = "SELECT epoch, atime, {} FROM results " \
+                  "WHERE version = ? AND epoch IN ({})"
+            for i in range(0, len(uniq), SQL_VARS):
+                part = uniq[i:i + SQL_VARS].tolist()
+                rows = self.conn.execute(
+                    sql.format(", ".join(names), ", ".join("?" * len(part))),
+                    [version] + part
+                ).fetchall()
+                for row in rows:
+                    if None not in row:
+                        found_keys.append(row[0])
+                        found_vals.append(row[2:])
+                        if row[1] < stale_before:
+                            stale.append(row[0])
+            if found_keys:
+                found_keys = np.array(found_keys, dtype="int64")
+                order = np.argsort(found_keys)
+                found_keys = found_keys[order]
+                vals = np.array(found_vals, dtype="float64")[order]
+                idx = np.searchsorted(found_keys, keys)
+                idx[idx >= len(found_keys)] = 0
+                hit = found_keys[idx] == keys
+                for j, name in enumerate(names):
+                    res[name][hit] = vals[idx[hit], j]
+                if stale:
+                    self.__touch(stale, version)
+            self.hits += int(hit.sum())
+            self.misses += int((~hit).sum())
+            return [res, hit]
+        except Exception as e:
+            raise
+
+    def store(self, tt, res, version):
+        """ 計算結果の保存(既存の行には列を追加)
+            * 保存後、最大行数を超えていれば LRU で削除
+
+        :param np.ndarray tt: 地球時(datetime64)
+        :param dict      res: {名前: np.ndarray}
+        :param string version: バージョン(version_of)
+        """
+        try:
+            names = list(res)
+            self.__check(names)
+            keys = self.__keys(tt).tolist()
+            vals = np.column_stack(
+                [np.asarray(res[name], dtype="float64") for name in names]
+            ).tolist()
+            now = time.time()
+            sql = (
+                "INSERT INTO results (version, epoch, atime, {0}) "
+                "VALUES (?, ?, ?, {1}) "
+                "ON CONFLICT (version, epoch) DO UPDATE SET atime = excluded.atime, {2}"
+            ).format(
+                ", ".join(names), ", ".join("?" * len(names)),
+                ", ".join("{0} = excluded.{0}".format(name) for name in names)
+            )
+            with self.conn:
+                self.conn.executemany(
+                    sql, ([version, k, now] + v for k, v in zip(keys, vals))
+                )
+            # 既存の行の更新も加算するため、見積もりは実際の行数以上
+            self.count += len(keys)
+            if self.count > self.max_rows:
+                self.evict()
+        except Exception as e:
+            raise
+
+    def evict(self):
+        """ 最大行数を超えた分を、最終参照が古い順に削除(行数を数え直す) """
+        try:
+            n = self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            if n > self.max_rows:
+                with self.conn:
+                    self.conn.execute(
+                        "DELETE FROM results WHERE rowid IN ("
+                        "SELECT rowid FROM results ORDER BY atime LIMIT ?)",
+                        (n - self.max_rows,)
+                    )
+                n = self.max_rows
+            self.count = n
+        except Exception as e:
+            raise
+
+    def compute(self, t, names=leng.NAMES, engine=None, scale="tt", leap=None):
+        """ キャッシュ経由の計算(ミスのエポックのみ計算して保存)
+            * 同じ設定(Engine.signature)のエンジンで計算した結果のみを使用
+            * キーは地球時に変換したエポック
+
+        :param  np.ndarray    t: 時刻(datetime64 配列)
+        :param  list      names: 要求する量の名前
+        :param  Engine   engine: 計算エンジン(None なら新規生成)
+        :param  string    scale: t の時刻系("utc", "tai", "tt", "ut1")
+        :param  np.ndarray leap: うるう秒の間か(UTC の場合)
+        :return dict           : {名前: np.ndarray}
+        """
+        try:
+            t = np.asarray(t, dtype="datetime64[us]")
+            tt = ltm.to_tt(t, scale, leap)
+            engine = engine if engine is not None else leng.Engine()
+            version = self.version_of(engine, scale)
+            res, hit = self.lookup(tt, names, version)
+            if hit.all():
+                return res
+            miss = ~hit
+            calc = engine.compute(
+                t[miss], names, scale=scale, leap=None if leap is None else leap[miss]
+            )
+            for name in names:
+                res[name][miss] = calc[name]
+            self.store(tt[miss], {name: calc[name] for name in names}, version)
+            return res
+        except Exception as e:
+            raise
+
+    def close(self):
+        """ キャッシュファイルを閉じる """
+        try:
+            self.conn.close()
+        except Exception as e:
+            raise
+
+    def __keys(self, tt):
+        """ 地球時 -> キー(1970-01-01 からのマイクロ秒) """
+        return np.asarray(tt, dtype="datetime64[us]").astype("int64")
+
+    def __touch(self, keys, version):
+        """ 最終参照時刻の更新 """
+        try:
+            now = time.time()
+            with self.conn:
+                for i in range(0, len(keys), SQL_VARS):
+                    part = keys[i:i + SQL_VARS]
+                    self.conn.execute(
+                        "UPDATE results SET atime = ? WHERE version = ? "
+                        "AND epoch IN ({})".format(", ".join("?" * len(part))),
+                        [now, version] + part
+                    )
+        except Exception as e:
+            raise
+
+    def __check(self, names):
+        """ キャッシュ可能な量か確認 """
+        for name in names:
+            if name not in lcl.COLUMNS:
+                raise ValueError("Not a cacheable quantity: {}".format(name))
@@ -2,10 +2,32 @@
 Class for
   CIP(Celestial Intermediate Pole, 瞬時の極軸),
   CIO(Celestial Intermediate Origin, 非回転原点)
+  * CIP 座標 X,Y は、NPB 行列から取り出す(bpn2xy)か、
+    IAU 2006/2000A の X,Y の級数(多項式 + 周期項)で直接計算する(xy_06)
+    - 周期項の係数表は IERS Conventions (2010) の Table 5.2a (X: cip_x.txt),
+      Table 5.2b (Y: cip_y.txt) (Unit: micro arcsecond; t^j の振幅の項毎に1行)
+    - 基本引数は全て IERS 2003 (章動の日月の項の l', D は MHB2000)
+    - 2つの方法の差は 1 マイクロ秒角程度(SOFA iauXy06 の注記と同じ)
 """
-import math
+import re
+import threading
+import numpy as np
+from lib import backend as lbk
 from lib import const as cst
 from lib import fundamental_argument as fa
+from lib import matrix as mx
+
+# X,Y の級数の基本引数(polynomial.POLYS の名前; 係数表の乗数の列の順)
+FA_XY = [
+    "l_iers2003", "p_iers2003", "f_iers2003", "d_iers2003", "om_iers2003",
+    "me_iers2003", "ve_iers2003", "ea_iers2003", "ma_iers2003", "ju_iers2003",
+    "sa_iers2003", "ur_iers2003", "ne_iers2003", "pa_iers2003",
+]
+# X,Y の周期項の t の次数の数(t^0 .. t^4)
+N_POW = 5
+
+# 係数表の読み込みの排他(スレッド並列時に1度だけ読み込む)
+_lock = threading.Lock()
 
 
 class CipCio:
@@ -93,35 +115,122 @@ class CipCio:
         [[0,  0,  0,  0,  1,  0,  0,  0], -0.26e-6, -0.01e-6]
     ]
 
-    def __init__(self, t):
+    # 級数の係数の配列 [(乗数, 振幅)] (S_0 .. S_4, 初回使用時に生成)
+    TERMS = None
+
+    # X,Y の多項式の係数(Unit: arcsec; Ref: iauXy06)
+    XYP = [
+        [-0.016617, 2004.191898,  -0.4297829, -0.19861834,
+          0.000007578, 0.0000059285],
+        [-0.006951,   -0.025896, -22.4072747,  0.00190059,
+          0.001112526, 0.0000001358],
+    ]
+    # X,Y の周期項の係数の配列 [X, Y] (各 t^0 .. t^4 の [(乗数, 振幅)];
+    # 初回使用時に cip_x.txt, cip_y.txt から読み込み)
+    XY_TERMS = None
+    # X,Y の周期項の振幅を、級数(x_0 .. x_4, y_0 .. y_4)毎の列に並べた配列
+    # [sin の振幅, cos の振幅] (項 x 10; Harmonics.gather 用, 初回使用時に生成)
+    XY_AMP = None
+    # X,Y の周期項を周波数(一意の乗数の組)毎にまとめた配列
+    # (乗数, 振幅 (周波数 x 20; 級数毎の sin, cos)) (backend 用, 初回使用時に生成)
+    XY_FREQ = None
+
+    def __init__(self, t, backend=None):
         """ Initialization
 
-        :param float t: Julian Century Number
+        :param float/np.ndarray t: Julian Century Number (または配列)
+        :param string     backend: 級数計算のバックエンド名(None なら既定)
         """
         self.t = t
+        self.backend = lbk.get(backend)
 
     def bpn2xy(self, r):
         """ Extract from the bias-precession-nutation matrix the X,Y
             coordinates of the Celestial Intermediate Pole.
 
-        :param  np.matrix r: Rotation Matrix
+        :param  np.matrix r: Rotation Matrix (または (N, 3, 3) の配列)
         :return list       : [x, y]  (x, y cordinates of CIP)
         """
         try:
-            return [r[2, 0], r[2, 1]]
+            return [r[..., 2, 0], r[..., 2, 1]]
+        except Exception as e:
+            raise
+
+    def xy_06(self, harm=None):
+        """ X,Y coordinates of celestial intermediate pole from series based
+            on IAU 2006 precession and IAU 2000A nutation.(Ref: iauXy06)
+            * 多項式 + 周期項(振幅は t^0 .. t^4 の係数)を直接計算
+              (NPB 行列、章動 Δψ, Δε の計算なし)
+
+        :param  Harmonics harm: 共有の引数の sin, cos (引数の組 "xy";
+                                None なら backend で計算)
+        :return list          : [x, y]  (x, y cordinates of CIP)
+        """
+        try:
+            if harm is not None:
+                amp_s, amp_c = self.xy_amp()
+                names = ["{}_{}".format(c, j) for c in "xy" for j in range(N_POW)]
+                w = harm.gather(names, amp_s, amp_c, "xy")
+                if not np.ndim(self.t):
+                    w = w[:, 0]
+            else:
+                # Fundamental Arguments (from IERS Conventions 2003)
+                fas = [
+                    fa.l_iers2003(self.t),
+                    fa.p_iers2003(self.t),
+                    fa.f_iers2003(self.t),
+                    fa.d_iers2003(self.t),
+                    fa.om_iers2003(self.t),
+                    # Planetary longitudes, Mercury through Neptune.
+                    fa.me_iers2003(self.t),
+                    fa.ve_iers2003(self.t),
+                    fa.ea_iers2003(self.t),
+                    fa.ma_iers2003(self.t),
+                    fa.ju_iers2003(self.t),
+                    fa.sa_iers2003(self.t),
+                    fa.ur_iers2003(self.t),
+                    fa.ne_iers2003(self.t),
+                    # General accumulated precession in longitude.
+                    fa.pa_iers2003(self.t)
+                ]
+                w = self.backend.multi_series(fas, *self.xy_freq())
+            res = []
+            for k, xyp in enumerate(self.XYP):
+                # 周期項(Unit: micro arcsecond)
+                w_k = w[k * N_POW:(k + 1) * N_POW]
+                v = w_k[-1]
+                for w_j in reversed(w_k[:-1]):
+                    v = w_j + v * self.t
+                # 多項式(Unit: arcsec)
+                p = xyp[-1]
+                for c in reversed(xyp[:-1]):
+                    p = c + p * self.t
+                res.append((p + v / 1.0e6) * cst.AS2R)
+            return res
         except Exception as e:
             raise
 
-    def s_06(self, x, y):
+    def s_06(self, x, y, harm=None, group="npb"):
         """ The CIO locator s, positioning the Celestial Intermediate Origin on
             the equator of the Celestial Intermediate Pole, given the CIP's X,Y
             coordinates.  Compatible with IAU 2006/2000A precession-nutation.
 
-        :param  float x: x coordinate of CIP
-        :param  float y: y coordinate of CIP
-        :return float s: CIO locator (Unit: rad)
+        :param  float/np.ndarray x: x coordinate of CIP
+        :param  float/np.ndarray y: y coordinate of CIP
+        :param  Harmonics     harm: 共有の引数の sin, cos (None なら backend で計算)
+        :param  string       group: harm の引数の組("npb", または X,Y の級数の "xy")
+        :return float/np.ndarray s: CIO locator (Unit: rad)
         """
         try:
+            if harm is not None:
+                w_0, w_1, w_2, w_3, w_4 = [
+                    sp + harm.series("s_{}".format(i), amp, group)
+                    for i, (sp, (_, amp)) in enumerate(zip(self.SP, self.terms()))
+                ]
+                w_5 = self.SP[5]
+                return (w_0 + (w_1 + (w_2 + (w_3 + (w_4  +  w_5 \
+                     * self.t) * self.t) * self.t) * self.t) * self.t) * cst.AS2R \
+                     - x * y / 2
             # Fundamental Arguments (from IERS Conventions 2003)
             fas = [
                 # Mean anomaly of the Moon.(Ref: iauFal03(t))
@@ -142,40 +251,140 @@ class CipCio:
                 fa.pa_iers2003(self.t)
             ]
             # Evaluate s.
-            w_0, w_1, w_2, w_3, w_4, w_5 = self.SP
-            for i in list(reversed(range(len(self.S_0)))):
-                a = 0.0
-                for j in range(8):
-                    a += self.S_0[i][0][j] * fas[j]
-                w_0 += self.S_0[i][1] * math.sin(a) \
-                     + self.S_0[i][2] * math.cos(a)
-            for i in list(reversed(range(len(self.S_1)))):
-                a = 0.0
-                for j in range(8):
-                    a += self.S_1[i][0][j] * fas[j]
-                w_1 += self.S_1[i][1] * math.sin(a) \
-                     + self.S_1[i][2] * math.cos(a)
-            for i in list(reversed(range(len(self.S_2)))):
-                a = 0.0
-                for j in range(8):
-                    a += self.S_2[i][0][j] * fas[j]
-                w_2 += self.S_2[i][1] * math.sin(a) \
-                     + self.S_2[i][2] * math.cos(a)
-            for i in list(reversed(range(len(self.S_3)))):
-                a = 0.0
-                for j in range(8):
-                    a += self.S_3[i][0][j] * fas[j]
-                w_3 += self.S_3[i][1] * math.sin(a) \
-                     + self.S_3[i][2] * math.cos(a)
-            for i in list(reversed(range(len(self.S_4)))):
-                a = 0.0
-                for j in range(8):
-                    a += self.S_4[i][0][j] * fas[j]
-                w_4 += self.S_4[i][1] * math.sin(a) \
-                     + self.S_4[i][2] * math.cos(a)
+            w_0, w_1, w_2, w_3, w_4 = [
+                sp + self.backend.series(fas, mult, amp)
+                for sp, (mult, amp) in zip(self.SP, self.terms())
+            ]
+            w_5 = self.SP[5]
             return (w_0 + (w_1 + (w_2 + (w_3 + (w_4  +  w_5 \
                  * self.t) * self.t) * self.t) * self.t) * self.t) * cst.AS2R \
                  - x * y / 2
         except Exception as e:
             raise
 
+    def c2ixys(self, x, y, s):
+        """ Form the celestial to intermediate-frame-of-date matrix given the
+            CIP X,Y and the CIO locator s.(Ref: iauC2ixys)
+
+        :param  float/np.ndarray x: x coordinate of CIP
+        :param  float/np.ndarray y: y coordinate of CIP
+        :param  float/np.ndarray s: CIO locator
+        :return np.matrix         : Celestial-to-intermediate matrix
+                                    (配列なら (N, 3, 3) の np.ndarray)
+        """
+        try:
+            r2 = x * x + y * y
+            # Obtain the spherical angles E and d.(x = y = 0 なら E = 0)
+            ang_e = np.arctan2(y, x)
+            ang_d = np.arctan(np.sqrt(r2 / (1.0 - r2)))
+            # Form the matrix.
+            r = mx.init_r()
+            r = mx.rotate_z(r, ang_e)
+            r = mx.rotate_y(r, ang_d)
+            r = mx.rotate_z(r, -(ang_e + s))
+            return r
+        except Exception as e:
+            raise
+
+    @classmethod
+    def terms(cls):
+        """ 級数(S_0 .. S_4)の係数を配列化
+
+        :return list: [(乗数 np.ndarray, 振幅 np.ndarray)]
+        """
+        try:
+            if cls.TERMS is None:
+                cls.TERMS = [
+                    (np.array([x[0] for x in s], dtype="float64"),
+                     np.array([x[1:] for x in s], dtype="float64"))
+                    for s in [cls.S_0, cls.S_1, cls.S_2, cls.S_3, cls.S_4]
+                ]
+            return cls.TERMS
+        except Exception as e:
+            raise
+
+    @classmethod
+    def xy_terms(cls):
+        """ X,Y の周期項の係数(テキストファイル DAT_X, DAT_Y から読み込み)
+            * 各行: t の次数 j, 乗数(FA_XY の順), sin の振幅, cos の振幅
+
+        :return list: [X, Y] (各 t^0 .. t^4 の (乗数 np.ndarray, 振幅 np.ndarray))
+        """
+        try:
+            if cls.XY_TERMS is None:
+                with _lock:
+                    if cls.XY_TERMS is None:
+                        cls.XY_TERMS = [
+                            cls.__read_xy(path) for path in (cst.DAT_X, cst.DAT_Y)
+                        ]
+            return cls.XY_TERMS
+        except Exception as e:
+            raise
+
+    @classmethod
+    def xy_amp(cls):
+        """ X,Y の周期項の振幅を、級数(x_0 .. x_4, y_0 .. y_4)毎の列に並べた配列
+            (各項は自身の級数の列のみ 0 以外; Harmonics.gather で一括計算)
+
+        :return list: [sin の振幅 (項 x 10), cos の振幅 (項 x 10)]
+        """
+        try:
+            if cls.XY_AMP is None:
+                amp = [a for terms in cls.xy_terms() for _, a in terms]
+                col = np.repeat(np.arange(len(amp)), [len(a) for a in amp])
+                res = [np.zeros((len(col), len(amp))) for _ in range(2)]
+                amp = np.vstack(amp)
+                for k in range(2):
+                    res[k][np.arange(len(col)), col] = amp[:, k]
+                cls.XY_AMP = res
+            return cls.XY_AMP
+        except Exception as e:
+            raise
+
+    @classmethod
+    def xy_freq(cls):
+        """ X,Y の周期項を周波数毎にまとめた配列
+            (X, Y の各次数の項は多くの周波数を共有するため、各周波数の sin, cos を
+             1回だけ計算する; 列 2k, 2k+1 は級数 k (x_0 .. x_4, y_0 .. y_4) の
+             sin, cos の振幅)
+
+        :return list: [乗数 (周波数 x FA_XY), 振幅 (周波数 x 20)]
+        """
+        try:
+            if cls.XY_FREQ is None:
+                terms = [t for c in cls.xy_terms() for t in c]
+                mult = np.vstack([m for m, _ in terms])
+                col = np.repeat(np.arange(len(terms)), [len(m) for m, _ in terms])
+                freq, inv = np.unique(mult, axis=0, return_inverse=True)
+                amp = np.zeros((len(freq), 2 * len(terms)))
+                a = np.vstack([a for _, a in terms])
+                np.add.at(amp, (inv.reshape(-1), 2 * col), a[:, 0])
+                np.add.at(amp, (inv.reshape(-1), 2 * col + 1), a[:, 1])
+                cls.XY_FREQ = [freq, amp]
+            return cls.XY_FREQ
+        except Exception as e:
+            raise
+
+    @staticmethod
+    def __read_xy(path):
+        """ X, または Y の係数表の読み込み
+
+        :param  string path: ファイルのパス
+        :return list       : t^0 .. t^4 の (乗数 np.ndarray, 振幅 np.ndarray)
+        """
+        try:
+            rows = []
+            with open(path, "r") as f:
+                for l in re.split('\n', f.read())[1:]:
+                    items = re.split(r'\s+', l.strip())
+                    if len(items) < 2:
+                        break
+                    rows.append([float(x) for x in items])
+            dat = np.array(rows, dtype="float64")
+            return [
+                (dat[dat[:, 0] == j, 1:1 + len(FA_XY)],
+                 dat[dat[:, 0] == j, 1 + len(FA_XY):])
+                for j in range(N_POW)
+            ]
+        except Exception as e:
+            raise
@@ -0,0 +1,226 @@
+"""
+Module for the live sidereal clock on shared memory
+  * Publisher(デーモン): 一定間隔(refresh 秒)毎に、現在時刻の ERA, GMST, GAST と
+    その変化率(アンカー)を全ての計算経由で求め、共有メモリに書き込む
+    (歳差・章動・s・EO などの遅い項は、この間隔で更新される)
+  * Reader: 共有メモリのアンカーから、現在の恒星時を数回の演算で求める
+    GAST(t) = GAST_0 + d(GAST)/dt * (t - t_0)
+    (システムコール・プロセス間通信なし; time.time は vDSO)
+  * 書き込みは seqlock で保護(書き込み中は seq が奇数)
+    読み込み側は、seq が偶数かつ読み込みの前後で同じ値になるまで再試行
+    (書き込みプロセスは1つのみ)
+  * 時刻はシステム時計(UNIX 時間)とし、tt_offset(秒)を加えて地球時とする
+    (既定は TT - UTC = 37 + 32.184 秒)
+
+  共有メモリの配置(ネイティブエンディアン)
+    - seq(u8), 以降 FIELDS の順に f8
+"""
+import time
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from lib import const  as cst
+from lib import engine as leng
+
+# 共有メモリの名前(既定)
+NAME = "greenwich_clock"
+# 既定の更新間隔(秒)
+REFRESH = 10.0
+# 既定の TT - システム時計(秒)
+TT_OFFSET = 37.0 + cst.TT_TAI
+# アンカーの値(t0: アンカーのシステム時計の時刻, updated: 書き込み完了時刻)
+FIELDS = [
+    "t0", "era", "era_rate", "gmst", "gmst_rate",
+    "gast", "gast_rate", "ee", "eo", "updated",
+]
+SIZE = 8 * (1 + len(FIELDS))
+
+
+def _attach(name):
+    """ 既存の共有メモリに接続
+        * 読み込み側の終了時に共有メモリが削除されないよう、
+          resource_tracker の管理対象から外す(Python 3.13 未満)
+          (このため、Publisher と同じプロセスからは接続しない)
+
+    :param  string name: 共有メモリの名前
+    :return SharedMemory: 共有メモリ
+    """
+    try:
+        try:
+            return shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(shm._name, "shared_memory")
+            return shm
+    except Exception as e:
+        raise
+
+
+class Publisher:
+    def __init__(self, name=NAME, refresh=REFRESH, tt_offset=TT_OFFSET,
+                 engine=None):
+        """ Initialization(共有メモリの生成)
+
+        :param string       name: 共有メモリの名前
+        :param float     refresh: 更新間隔(秒)
+        :param float   tt_offset: 地球時 - システム時計(秒)
+        :param Engine     engine: 計算エンジン(None なら新規生成)
+        """
+        self.name, self.refresh, self.tt_offset = name, refresh, tt_offset
+        self.engine = engine if engine is not None else leng.Engine(1)
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=SIZE)
+        self.seq = np.ndarray((1,), dtype="uint64", buffer=self.shm.buf)
+        self.vals = np.ndarray(
+            (len(FIELDS),), dtype="float64", buffer=self.shm.buf, offset=8
+        )
+        self.seq[0] = 0
+
+    def publish(self, now=None):
+        """ アンカーの計算と書き込み
+
+        :param  float now: システム時計の時刻(None なら現在)
+        :return dict     : 書き込んだ値 {名前: 値}
+        """
+        try:
+            now = time.time() if now is None else now
+            tt = np.array(
+                [int(round((now + self.tt_offset) * 1.0e6))], dtype="int64"
+            ).astype("datetime64[us]")
+            res = self.engine.compute(
+                tt, ["era", "era_rate", "gmst", "gmst_rate",
+                     "gast", "gast_rate", "ee", "eo"]
+            )
+            vals = {name: float(v[0]) for name, v in res.items()}
+            vals["t0"] = now
+            vals["updated"] = time.time()
+            # seqlock: 奇数にしてから書き込み、偶数に戻す
+            self.seq[0] += 1
+            self.vals[:] = [vals[name] for name in FIELDS]
+            self.seq[0] += 1
+            return vals
+        except Exception as e:
+            raise
+
+    def run(self, count=None):
+        """ 更新間隔毎に書き込み(KeyboardInterrupt まで、または count 回)
+
+        :param int count: 書き込み回数(None なら無制限)
+        """
+        try:
+            i = 0
+            while count is None or i < count:
+                start = time.time()
+                self.publish(start)
+                i += 1
+                if count is None or i < count:
+                    time.sleep(max(0.0, self.refresh - (time.time() - start)))
+        except KeyboardInterrupt:
+            pass
+        except Exception as e:
+            raise
+
+    def close(self):
+        """ 共有メモリの解放(削除) """
+        try:
+            del self.seq, self.vals
+            self.shm.close()
+            self.shm.unlink()
+        except Exception as e:
+            raise
+
+
+class Reader:
+    def __init__(self, name=NAME):
+        """ Initialization(既存の共有メモリに接続)
+
+        :param string name: 共有メモリの名前
+        """
+        self.shm = _attach(name)
+        self.seq = np.ndarray((1,), dtype="uint64", buffer=self.shm.buf)
+        self.vals = np.ndarray(
+            (len(FIELDS),), dtype="float64", buffer=self.shm.buf, offset=8
+        )
+
+    def anchor(self):
+        """ アンカーの読み込み(seqlock)
+
+        :return list: FIELDS の順の値
+        """
+        try:
+            while True:
+                s_0 = int(self.seq[0])
+                if s_0 == 0:
+                    raise RuntimeError("The clock has not been published yet")
+                if s_0 & 1:
+                    continue
+                vals = self.vals.tolist()
+                if int(self.seq[0]) == s_0:
+                    return vals
+        except Exception as e:
+            raise
+
+    def gast(self, now=None):
+        """ 現在の GAST
+
+        :param  float now: システム時計の時刻(None なら現在)
+        :return float    : GAST (Unit: rad)
+        """
+        try:
+            return self.__extrapolate(5, now)
+        except Exception as e:
+            raise
+
+    def gmst(self, now=None):
+        """ 現在の GMST
+
+        :param  float now: システム時計の時刻(None なら現在)
+        :return float    : GMST (Unit: rad)
+        """
+        try:
+            return self.__extrapolate(3, now)
+        except Exception as e:
+            raise
+
+    def era(self, now=None):
+        """ 現在の ERA
+
+        :param  float now: システム時計の時刻(None なら現在)
+        :return float    : ERA (Unit: rad)
+        """
+        try:
+            return self.__extrapolate(1, now)
+        except Exception as e:
+            raise
+
+    def age(self, now=None):
+        """ アンカーの経過時間(秒)
+
+        :param  float now: システム時計の時刻(None なら現在)
+        :return float    : 現在 - アンカーの時刻
+        """
+        try:
+            a = self.anchor()
+            return (time.time() if now is None else now) - a[0]
+        except Exception as e:
+            raise
+
+    def close(self):
+        """ 共有メモリから切断 """
+        try:
+            del self.seq, self.vals
+            self.shm.close()
+        except Exception as e:
+            raise
+
+    def __extrapolate(self, i, now):
+        """ アンカーからの外挿(0 - 2pi)
+
+        :param  int     i: 値の位置(FIELDS)、変化率は i + 1
+        :param  float now: システム時計の時刻(None なら現在)
+        :return float    : 値 (Unit: rad)
+        """
+        try:
+            a = self.anchor()
+            now = time.time() if now is None else now
+            return (a[i] + a[i + 1] * (now - a[0])) % cst.PI2
+        except Exception as e:
+            raise
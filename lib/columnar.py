@@ -0,0 +1,313 @@
+"""
+Module for columnar binary I/O
+  * エポック(地球時)の入力、計算結果の出力をバイナリの列形式で行う
+  * 入力はメモリマップで読み込み、チャンク毎に計算・出力するため、
+    行毎の Python オブジェクトを生成しない
+
+  入力(エポック)の形式(拡張子で判別)
+    - .npy              : datetime64 / int64(1970-01-01 からの経過時間) /
+                          float64(ユリウス日(TT))
+    - .i8               : リトルエンディアン int64 の生データ
+                          (1970-01-01 からの経過時間、単位は unit で指定)
+    - .f8               : リトルエンディアン float64 の生データ(ユリウス日(TT))
+    - .arrow, .feather  : Arrow IPC ファイルの列(要 pyarrow)
+    - .parquet          : Parquet ファイルの列(要 pyarrow)
+    - .txt              : 1行1日時のテキスト(YYYYMMDD[HHMMSS[ffffff]], ISO 8601)
+                          不正な行は結果を NaN とし、行番号を EpochReader.bad に記録
+  出力の形式(拡張子で判別)
+    - .npy, .f8         : 列毎に1ファイル(例: out.npy -> out.gast.npy, ...)
+    - .arrow, .feather, .parquet : 1ファイルに全列
+"""
+import os
+import numpy as np
+from lib import engine    as leng
+from lib import time      as ltm
+from lib import timestamp as lts
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pa_pq
+except ImportError:
+    pa = None
+
+# 既定の出力列
+NAMES = leng.NAMES
+# 出力可能な列(エポック毎に float64 1つの量)
+COLUMNS = [
+    "jd", "jc", "dt", "jd_ut1",
+    "gam_b", "phi_b", "psi_b", "eps_a", "d_psi", "d_eps",
+    "x", "y", "s", "era", "eo",
+    "gast", "gast_deg", "gmst", "gmst_deg", "ee", "ee_deg",
+    "era_rate", "gmst_rate", "ee_rate", "gast_rate",
+]
+# 既定のチャンクサイズ(エポック数)
+CHUNK = 65536
+
+
+def format_of(path):
+    """ ファイル形式(拡張子)の取得
+
+    :param  string path: ファイルパス
+    :return string     : "npy", "i8", "f8", "arrow", "parquet", "txt"
+    """
+    try:
+        ext = os.path.splitext(path)[1].lower()
+        fmt = {
+            ".npy": "npy", ".i8": "i8", ".f8": "f8",
+            ".arrow": "arrow", ".feather": "arrow", ".parquet": "parquet",
+            ".txt": "txt",
+        }.get(ext)
+        if fmt is None:
+            raise ValueError("Unsupported file format: {}".format(path))
+        if fmt in ("arrow", "parquet") and pa is None:
+            raise ImportError("pyarrow is required for {} files".format(fmt))
+        return fmt
+    except Exception as e:
+        raise
+
+def column_path(path, name):
+    """ 列毎のファイルパス(例: out.npy, "gast" -> out.gast.npy)
+
+    :param  string path: 出力ファイルパス
+    :param  string name: 列名
+    :return string     : 列のファイルパス
+    """
+    try:
+        stem, ext = os.path.splitext(path)
+        return "{}.{}{}".format(stem, name, ext)
+    except Exception as e:
+        raise
+
+def to_tt(arr, unit="us"):
+    """ エポック列 -> 地球時(datetime64[us])
+        * datetime64 はそのまま、int64 は 1970-01-01 からの経過時間、
+          float64 はユリウス日(TT)とみなす
+
+    :param  np.ndarray arr: エポック列
+    :param  string    unit: int64 の単位("s", "ms", "us", "ns")
+    :return np.ndarray    : datetime64[us]
+    """
+    try:
+        if np.issubdtype(arr.dtype, np.datetime64):
+            return arr.astype("datetime64[us]", copy=False)
+        if np.issubdtype(arr.dtype, np.integer):
+            return arr.astype("int64", copy=False) \
+                      .view("datetime64[{}]".format(unit)) \
+                      .astype("datetime64[us]", copy=False)
+        if np.issubdtype(arr.dtype, np.floating):
+            return ltm.jd2dt64(arr)
+        raise TypeError("Unsupported epoch dtype: {}".format(arr.dtype))
+    except Exception as e:
+        raise
+
+
+class EpochReader:
+    def __init__(self, path, column="tt", unit="us", scale="tt"):
+        """ Initialization
+            * npy, i8, f8 はメモリマップ、arrow はメモリマップした IPC ファイル
+            * エポックは scale の時刻系(txt の UTC は、うるう秒 23:59:60 も可)
+
+        :param string   path: 入力ファイルパス
+        :param string column: 列名(arrow, parquet の場合)
+        :param string   unit: int64 の単位
+        :param string  scale: エポックの時刻系("utc", "tai", "tt", "ut1")
+        """
+        self.path, self.column, self.unit = path, column, unit
+        self.scale = scale
+        self.fmt = format_of(path)
+        self.arr = None
+        self.bad = []
+        if self.fmt == "npy":
+            self.arr = np.load(path, mmap_mode="r")
+        elif self.fmt == "i8":
+            self.arr = np.memmap(path, dtype="<i8", mode="r")
+        elif self.fmt == "f8":
+            self.arr = np.memmap(path, dtype="<f8", mode="r")
+        elif self.fmt == "arrow":
+            self.table = pa_ipc.open_file(pa.memory_map(path, "r")).read_all()
+            self.size = self.table.num_rows
+        elif self.fmt == "parquet":
+            self.pq = pa_pq.ParquetFile(path)
+            self.size = self.pq.metadata.num_rows
+        elif self.fmt == "txt":
+            self.buf = np.memmap(path, dtype="uint8", mode="r")
+            self.ends = np.flatnonzero(self.buf == ord("\n"))
+            if len(self.buf) and (
+                not len(self.ends) or self.ends[-1] != len(self.buf) - 1
+            ):
+                self.ends = np.append(self.ends, len(self.buf))
+            self.size = len(self.ends)
+        if self.arr is not None:
+            self.size = len(self.arr)
+
+    def chunks(self, chunk=CHUNK):
+        """ チャンク毎のエポック(scale の時刻系)の取得
+            * 地球時への変換は計算時(Engine.compute)に行う
+              (UTC の場合、UT1 は UTC の ΔT で求めるため)
+
+        :param  int chunk: チャンクサイズ(エポック数)
+        :return generator: [datetime64[us] の配列,
+                            うるう秒の行か(UTC の txt の場合; それ以外は None)]
+        """
+        try:
+            if self.arr is not None:
+                for i in range(0, self.size, chunk):
+                    yield [to_tt(self.arr[i:i + chunk], self.unit), None]
+            elif self.fmt == "arrow":
+                col = self.table.column(self.column)
+                for i in range(0, self.size, chunk):
+                    yield [to_tt(self.__to_numpy(col.slice(i, chunk)), self.unit), None]
+            elif self.fmt == "parquet":
+                for batch in self.pq.iter_batches(
+                    batch_size=chunk, columns=[self.column]
+                ):
+                    yield [to_tt(self.__to_numpy(batch.column(0)), self.unit), None]
+            elif self.fmt == "txt":
+                utc = self.scale == "utc"
+                for i in range(0, self.size, chunk):
+                    start = self.ends[i - 1] + 1 if i else 0
+                    end = self.ends[min(i + chunk, self.size) - 1]
+                    res = lts.parse(self.buf[start:end], leap=utc)
+                    t, bad, leap = res[0], res[1], res[2] if utc else None
+                    if utc:
+                        # 実施日でないうるう秒の行も不正な行(NaT)とする
+                        wrong = np.flatnonzero(leap & np.isnat(ltm.utc2tai(t, leap)))
+                        t[wrong], leap[wrong] = np.datetime64("NaT"), False
+                        bad = np.union1d(bad, wrong)
+                    self.bad.extend((bad + i).tolist())
+                    yield [t, leap]
+        except Exception as e:
+            raise
+
+    def __to_numpy(self, col):
+        """ Arrow の列 -> np.ndarray(可能ならゼロコピー) """
+        try:
+            if isinstance(col, pa.ChunkedArray):
+                col = col.combine_chunks()
+            if pa.types.is_timestamp(col.type):
+                return col.to_numpy(zero_copy_only=False)
+            return col.to_numpy(zero_copy_only=col.null_count == 0)
+        except Exception as e:
+            raise
+
+
+class ResultWriter:
+    def __init__(self, path, names=NAMES, size=None):
+        """ Initialization
+
+        :param string path: 出力ファイルパス
+        :param list  names: 出力する列名
+        :param int    size: 総エポック数(npy の場合は必須)
+        """
+        for name in names:
+            if name not in COLUMNS:
+                raise ValueError("Not a column quantity: {}".format(name))
+        self.path, self.names, self.size = path, list(names), size
+        self.fmt = format_of(path)
+        self.pos = 0
+        self.files = {}
+        if self.fmt == "npy":
+            if size is None:
+                raise ValueError("size is required for npy output")
+            for name in self.names:
+                self.files[name] = np.lib.format.open_memmap(
+                    column_path(path, name), mode="w+",
+                    dtype="<f8", shape=(size,)
+                )
+        elif self.fmt == "f8":
+            for name in self.names:
+                self.files[name] = open(column_path(path, name), "wb")
+        else:
+            schema = pa.schema([(name, pa.float64()) for name in self.names])
+            if self.fmt == "arrow":
+                self.sink = pa.OSFile(path, "wb")
+                self.writer = pa_ipc.new_file(self.sink, schema)
+            else:
+                self.writer = pa_pq.ParquetWriter(path, schema)
+
+    def write(self, res):
+        """ チャンクの出力
+
+        :param dict res: {列名: np.ndarray}
+        """
+        try:
+            n = len(res[self.names[0]])
+            if self.fmt == "npy":
+                for name in self.names:
+                    self.files[name][self.pos:self.pos + n] = res[name]
+            elif self.fmt == "f8":
+                for name in self.names:
+                    np.asarray(res[name], dtype="<f8").tofile(self.files[name])
+            else:
+                batch = pa.record_batch(
+                    [pa.array(np.asarray(res[name], dtype="float64"))
+                     for name in self.names],
+                    names=self.names
+                )
+                if self.fmt == "arrow":
+                    self.writer.write_batch(batch)
+                else:
+                    self.writer.write_table(pa.Table.from_batches([batch]))
+            self.pos += n
+        except Exception as e:
+            raise
+
+    def close(self):
+        """ 出力の終了 """
+        try:
+            if self.fmt == "npy":
+                for mm in self.files.values():
+                    mm.flush()
+            elif self.fmt == "f8":
+                for f in self.files.values():
+                    f.close()
+            else:
+                self.writer.close()
+                if self.fmt == "arrow":
+                    self.sink.close()
+        except Exception as e:
+            raise
+
+
+def run(src, dst, names=NAMES, chunk=CHUNK, column="tt", unit="us",
+        engine=None, cache=None, scale="tt"):
+    """ ファイルのエポック列に対する一括計算
+        * チャンク毎に読み込み -> 計算 -> 出力
+        * 計算はエンジンの最大バッチサイズ毎に行う
+
+    :param  string src: 入力ファイルパス
+    :param  string dst: 出力ファイルパス
+    :param  list names: 出力する列名
+    :param  int  chunk: チャンクサイズ(エポック数)
+    :param  string column: 入力の列名(arrow, parquet の場合)
+    :param  string   unit: 入力 int64 の単位
+    :param  Engine engine: 計算エンジン(None なら新規生成)
+    :param  ResultCache cache: 結果のキャッシュ(None ならキャッシュしない)
+    :param  string   scale: 入力エポックの時刻系("utc", "tai", "tt", "ut1")
+    :return list       : [計算したエポック数, 不正なエポックの行番号]
+    """
+    try:
+        engine = engine if engine is not None else leng.Engine()
+        reader = EpochReader(src, column, unit, scale)
+        writer = ResultWriter(dst, names, reader.size)
+        try:
+            for t, leap in reader.chunks(chunk):
+                # 不正なエポック(NaT)は有効な値で置き換えて計算し、結果を NaN にする
+                nat = np.isnat(t)
+                if nat.any():
+                    t = np.where(nat, t[~nat][0] if (~nat).any() \
+                                 else ltm.EPOCH_J2000, t)
+                    if leap is not None:
+                        leap = leap & ~nat
+                if cache is None:
+                    res = engine.compute(t, names, scale=scale, leap=leap)
+                else:
+                    res = cache.compute(t, names, engine, scale, leap)
+                if nat.any():
+                    res = {name: np.where(nat, np.nan, res[name]) for name in names}
+                writer.write(res)
+        finally:
+            writer.close()
+        return [writer.pos, reader.bad]
+    except Exception as e:
+        raise
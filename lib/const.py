@@ -7,6 +7,8 @@ import os
 DIR_LIB = os.path.dirname(os.path.abspath(__file__))
 DAT_LS  = DIR_LIB + "/nut_ls.txt"
 DAT_PL  = DIR_LIB + "/nut_pl.txt"
+DAT_X   = DIR_LIB + "/cip_x.txt"
+DAT_Y   = DIR_LIB + "/cip_y.txt"
 J2000   = 2451545.0                      # Reference epoch (J2000.0), Julian Date
 JC      = 36525.0                        # Days per Julian century
 TT_TAI  = 32.184                         # TT - TAI
@@ -0,0 +1,212 @@
+"""
+Class for the reusable calculation engine
+  * 一度生成すれば、係数表の読み込み済み・作業領域(最大バッチサイズ分)確保済みの
+    状態で、compute を繰り返し呼び出せる
+  * 最大バッチサイズを超えるエポック配列は、バッチ毎に分割して計算
+  * threads > 1 なら、バッチをスレッドプール(ThreadPoolExecutor)で並列に計算
+    - 重い計算(章動・s の級数、行列の積、sin/cos)は GIL を解放する
+      NumPy の配列演算(jit なら nogil の Numba 関数)
+    - 級数計算の作業領域はスレッド毎(スレッド毎にバックエンドを生成)
+    - 各バッチの結果は出力先の別々の範囲に書き込む
+    - BLAS 自体のスレッド数(OPENBLAS_NUM_THREADS 等)は 1 を推奨
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import threading
+import numpy as np
+from lib import backend  as lbk
+from lib import frame    as lfr
+from lib import harmonic as lhm
+from lib import nutation as lnt
+from lib import pipeline as lpl
+from lib import result   as lres
+from lib import time     as ltm
+
+# 既定の出力
+NAMES = ["era", "eo", "gast", "gmst", "ee"]
+# 既定の最大バッチサイズ(エポック数)
+MAX_BATCH = 1024
+
+
+class Engine:
+    def __init__(self, max_batch=MAX_BATCH, backend=None, route="cio",
+                 frame_quantum=None, frame_size=lfr.MAX_SIZE, threads=1,
+                 nut_plan=None, cip="matrix"):
+        """ Initialization
+            * 係数表を読み込み、級数計算の作業領域(項数 x max_batch)を確保
+
+        :param int    max_batch: 最大バッチサイズ(エポック数)
+        :param string   backend: 級数計算のバックエンド名(None なら既定)
+        :param string     route: GAST の計算経路("cio", "equinox")
+        :param float frame_quantum: frame キャッシュの丸めの単位(秒)
+                                    (None ならキャッシュしない)
+        :param int   frame_size: frame キャッシュの最大エントリ数
+        :param int      threads: 並列に計算するスレッド数(1 なら呼び出し元のみ)
+        :param NutationPlan nut_plan: 章動の計画(reduction.NutationPlan;
+                                      None なら全項を計算)
+        :param string       cip: CIP 座標の計算方法("matrix", "xy06")
+        """
+        self.max_batch, self.route, self.threads = max_batch, route, threads
+        self.backend_name, self.nut_plan = backend, nut_plan
+        self.cip = cip
+        self.backend = lbk.new(backend)
+        self.frame = None
+        if frame_quantum is not None:
+            # 複数のスレッドから使用するため、作業領域を持たない共有のバックエンドで計算
+            self.frame = lfr.FrameCache(frame_quantum, frame_size, lbk.get(backend))
+        nut = lnt.Nutation(0.0, self.backend)
+        self.n_terms = max(len(nut.dat_ls), len(nut.dat_pl))
+        # 共有の引数の数(numpy では章動, s, EE (xy06 なら X,Y も)を
+        # harmonic.Harmonics で計算)
+        groups = ["npb", "xy"] if cip == "xy06" else ["npb"]
+        self.n_args = lhm.Harmonics.n_args(groups) \
+                      if self.backend.name == "numpy" else 0
+        self.pool, self.local = None, threading.local()
+        self.owner = threading.get_ident()
+        if threads > 1:
+            # 各スレッドが作業領域を持つため、self.backend の作業領域は確保しない
+            self.pool = ThreadPoolExecutor(threads, thread_name_prefix="greenwich")
+        else:
+            self.backend.reserve(self.n_terms, max_batch, self.n_args)
+
+    def compute(self, epochs, names=NAMES, out=None, scale="tt", leap=None):
+        """ 指定の量の計算
+
+        :param  datetime/list/np.ndarray epochs: 時刻(単一、または配列)
+        :param  list                      names: 要求する量の名前
+        :param  dict                        out: 出力先 {名前: np.ndarray}
+                                                 (Result も可; None なら新規確保)
+        :param  string                    scale: epochs の時刻系
+                                                 ("utc", "tai", "tt", "ut1")
+        :param  bool/np.ndarray            leap: うるう秒の間か(UTC の場合;
+                                                 epochs は繰り上げた値)
+        :return dict                           : {名前: 値}
+        """
+        try:
+            if isinstance(epochs, datetime):
+                res = self.__batch(*ltm.to_tt_dt(epochs, scale, leap), names)
+                return {name: self.__scalar(v) for name, v in res.items()}
+            tt, dt = ltm.to_tt_dt(
+                np.asarray(epochs, dtype="datetime64[us]"), scale, leap
+            )
+            n = len(tt)
+            if n <= self.max_batch and out is None:
+                return self.__batch(tt, dt, names)
+
+            def batch(i):
+                """ i 番目のエポックからの1バッチ """
+                return self.__batch(
+                    tt[i:i + self.max_batch],
+                    None if dt is None else dt[i:i + self.max_batch], names
+                )
+
+            if self.pool is not None and n > self.max_batch:
+                results = self.pool.map(batch, range(0, n, self.max_batch))
+            else:
+                results = map(batch, range(0, n, self.max_batch))
+            for i, res in zip(range(0, n, self.max_batch), results):
+                if out is None:
+                    out = {
+                        name: np.empty((n,) + np.shape(v)[1:], np.asarray(v).dtype)
+                        for name, v in res.items()
+                    }
+                for name in names:
+                    out[name][i:i + self.max_batch] = res[name]
+            return out
+        except Exception as e:
+            raise
+
+    def signature(self):
+        """ 結果に影響する設定(結果のキャッシュのキー等)
+            * 計算経路、CIP 座標の計算方法、バックエンド、章動の mode、
+              frame キャッシュの丸めの単位、章動の計画(近似の設定)
+
+        :return string: 設定の文字列
+        """
+        try:
+            parts = [
+                "route={}".format(self.route),
+                "cip={}".format(self.cip),
+                "backend={}".format(self.backend.name),
+                "nutation={}".format(lnt.get_mode()),
+            ]
+            if self.frame is not None:
+                parts.append("frame={}us".format(self.frame.q_us))
+            if self.nut_plan is not None:
+                p = self.nut_plan
+                parts.append("plan={!r},{!r},{!r},{}".format(p.t_0, p.t_1, p.tol, p.deg))
+            return ";".join(parts)
+        except Exception as e:
+            raise
+
+    def close(self):
+        """ スレッドプールの終了 """
+        try:
+            if self.pool is not None:
+                self.pool.shutdown()
+                self.pool = None
+        except Exception as e:
+            raise
+
+    def __batch(self, tt, dt, names):
+        """ 1バッチの計算
+            * 生成したスレッド以外(スレッドプール、executor 等)からの呼び出しでは、
+              バックエンド(作業領域)はスレッド毎に生成
+              (スレッド並列の場合は呼び出し元のスレッドを含む;
+               複数のスレッドからの compute も可)
+
+        :param  datetime/np.ndarray tt: 地球時(単一、または datetime64 配列)
+        :param  float/np.ndarray    dt: ΔT (None なら地球時から計算)
+        :param  list             names: 要求する量の名前
+        :return dict                  : {名前: 値}
+        """
+        try:
+            if self.pool is None and threading.get_ident() == self.owner:
+                backend = self.backend
+            else:
+                backend = getattr(self.local, "backend", None)
+            if backend is None:
+                backend = lbk.new(self.backend_name)
+                backend.reserve(self.n_terms, self.max_batch, self.n_args)
+                self.local.backend = backend
+            return lpl.calc(
+                tt, names, backend, self.route, self.frame, self.nut_plan,
+                self.cip, dt
+            )
+        except Exception as e:
+            raise
+
+    @staticmethod
+    def __scalar(v):
+        """ 単一エポックの値の型の統一(np.float64, 0次元配列 -> float)
+            * 行列(回転行列)、datetime 等はそのまま、リストは各成分
+
+        :param  object v: 値
+        :return object  : 値
+        """
+        if isinstance(v, list):
+            return [Engine.__scalar(x) for x in v]
+        if isinstance(v, np.floating) or (isinstance(v, np.ndarray) and v.ndim == 0):
+            return float(v)
+        return v
+
+    def result(self, epochs, names=NAMES, scale="tt", leap=None):
+        """ 指定の量の計算(選択した列のみの構造化配列に格納)
+
+        :param  datetime/list/np.ndarray epochs: 時刻(単一、または配列)
+        :param  list                      names: 格納する量の名前
+        :param  string                    scale: epochs の時刻系
+        :param  bool/np.ndarray            leap: うるう秒の間か(UTC の場合)
+        :return Result                         : 結果
+        """
+        try:
+            if isinstance(epochs, datetime):
+                return lres.Result.from_dict(
+                    self.compute(epochs, names, scale=scale, leap=leap), names
+                )
+            tt = np.asarray(epochs, dtype="datetime64[us]")
+            res = lres.Result(names, len(tt))
+            self.compute(tt, names, res, scale, leap)
+            return res
+        except Exception as e:
+            raise
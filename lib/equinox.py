@@ -0,0 +1,140 @@
+"""
+Class for
+  EE(Equation of Equinoxes, 分点均差) by the equinox based route
+  * EE = Δψ・cos(ε_A) + 補正項(complementary terms)
+  * GAST = GMST + EE とすれば、NPB 行列・CIP 座標・s の計算が不要
+    (Ref: iauEe00(date1, date2, epsa, dpsi), iauEect00(date1, date2))
+"""
+import numpy as np
+from lib import backend as lbk
+from lib import const as cst
+from lib import fundamental_argument as fa
+
+
+class Equinox:
+    # Terms of order t^0
+    E_0 = [
+        [[0,  0,  0,  0,  1,  0,  0,  0], 2640.96e-6, -0.39e-6],
+        [[0,  0,  0,  0,  2,  0,  0,  0],   63.52e-6, -0.02e-6],
+        [[0,  0,  2, -2,  3,  0,  0,  0],   11.75e-6,  0.01e-6],
+        [[0,  0,  2, -2,  1,  0,  0,  0],   11.21e-6,  0.01e-6],
+        [[0,  0,  2, -2,  2,  0,  0,  0],   -4.55e-6,  0.00e-6],
+        [[0,  0,  2,  0,  3,  0,  0,  0],    2.02e-6,  0.00e-6],
+        [[0,  0,  2,  0,  1,  0,  0,  0],    1.98e-6,  0.00e-6],
+        [[0,  0,  0,  0,  3,  0,  0,  0],   -1.72e-6,  0.00e-6],
+        [[0,  1,  0,  0,  1,  0,  0,  0],   -1.41e-6, -0.01e-6],
+        [[0,  1,  0,  0, -1,  0,  0,  0],   -1.26e-6, -0.01e-6],
+        [[1,  0,  0,  0, -1,  0,  0,  0],   -0.63e-6,  0.00e-6],
+        [[1,  0,  0,  0,  1,  0,  0,  0],   -0.63e-6,  0.00e-6],
+        [[0,  1,  2, -2,  3,  0,  0,  0],    0.46e-6,  0.00e-6],
+        [[0,  1,  2, -2,  1,  0,  0,  0],    0.45e-6,  0.00e-6],
+        [[0,  0,  4, -4,  4,  0,  0,  0],    0.36e-6,  0.00e-6],
+        [[0,  0,  1, -1,  1, -8, 12,  0],   -0.24e-6, -0.12e-6],
+        [[0,  0,  2,  0,  0,  0,  0,  0],    0.32e-6,  0.00e-6],
+        [[0,  0,  2,  0,  2,  0,  0,  0],    0.28e-6,  0.00e-6],
+        [[1,  0,  2,  0,  3,  0,  0,  0],    0.27e-6,  0.00e-6],
+        [[1,  0,  2,  0,  1,  0,  0,  0],    0.26e-6,  0.00e-6],
+        [[0,  0,  2, -2,  0,  0,  0,  0],   -0.21e-6,  0.00e-6],
+        [[0,  1, -2,  2, -3,  0,  0,  0],    0.19e-6,  0.00e-6],
+        [[0,  1, -2,  2, -1,  0,  0,  0],    0.18e-6,  0.00e-6],
+        [[0,  0,  0,  0,  0,  8,-13, -1],   -0.10e-6,  0.05e-6],
+        [[0,  0,  0,  2,  0,  0,  0,  0],    0.15e-6,  0.00e-6],
+        [[2,  0, -2,  0, -1,  0,  0,  0],   -0.14e-6,  0.00e-6],
+        [[1,  0,  0, -2,  1,  0,  0,  0],    0.14e-6,  0.00e-6],
+        [[0,  1,  2, -2,  2,  0,  0,  0],   -0.14e-6,  0.00e-6],
+        [[1,  0,  0, -2, -1,  0,  0,  0],    0.14e-6,  0.00e-6],
+        [[0,  0,  4, -2,  4,  0,  0,  0],    0.13e-6,  0.00e-6],
+        [[0,  0,  2, -2,  4,  0,  0,  0],   -0.11e-6,  0.00e-6],
+        [[1,  0, -2,  0, -3,  0,  0,  0],    0.11e-6,  0.00e-6],
+        [[1,  0, -2,  0, -1,  0,  0,  0],    0.11e-6,  0.00e-6]
+    ]
+    # Terms of order t^1
+    E_1 = [
+        [[0,  0,  0,  0,  1,  0,  0,  0],   -0.87e-6,  0.00e-6]
+    ]
+    # 級数の係数の配列 [(乗数, 振幅)] (E_0, E_1, 初回使用時に生成)
+    TERMS = None
+
+    def __init__(self, t, backend=None):
+        """ Initialization
+
+        :param float/np.ndarray t: Julian Century Number (TT, または配列)
+        :param string     backend: 級数計算のバックエンド名(None なら既定)
+        """
+        self.t = t
+        self.backend = lbk.get(backend)
+
+    def eect_00(self, harm=None):
+        """ Equation of the equinoxes complementary terms, consistent with
+            IAU 2000 resolutions.
+
+        :param  Harmonics harm: 共有の引数の sin, cos (None なら backend で計算)
+        :return float         : Complementary terms (Unit: rad)
+        """
+        try:
+            if harm is not None:
+                s_0, s_1 = [
+                    harm.series("ee_{}".format(i), amp)
+                    for i, (_, amp) in enumerate(self.terms())
+                ]
+                return (s_0 + s_1 * self.t) * cst.AS2R
+            fas = self.fa_ee(self.t)
+            s_0, s_1 = [
+                self.backend.series(fas, mult, amp)
+                for mult, amp in self.terms()
+            ]
+            return (s_0 + s_1 * self.t) * cst.AS2R
+        except Exception as e:
+            raise
+
+    def ee_00(self, eps_a, d_psi, harm=None):
+        """ The equation of the equinoxes, compatible with IAU 2000 resolutions,
+            given the nutation in longitude and the mean obliquity.
+
+        :param  float     eps_a: Mean obliquity of the ecliptic
+        :param  float     d_psi: Nutation in longitude
+        :param  Harmonics  harm: 共有の引数の sin, cos (None なら backend で計算)
+        :return float        EE: Equation of Equinoxes (Unit: rad), 分点均差
+        """
+        try:
+            return d_psi * np.cos(eps_a) + self.eect_00(harm)
+        except Exception as e:
+            raise
+
+    @staticmethod
+    def fa_ee(t):
+        """ 補正項の基本引数 (from IERS Conventions 2003)
+
+        :param  float/np.ndarray t: Julian Century Number
+        :return list              : [l, l', F, D, Om, Ve, Ea, pA]
+        """
+        try:
+            return [
+                fa.l_iers2003(t),
+                fa.p_iers2003(t),
+                fa.f_iers2003(t),
+                fa.d_iers2003(t),
+                fa.om_iers2003(t),
+                fa.ve_iers2003(t),
+                fa.ea_iers2003(t),
+                fa.pa_iers2003(t)
+            ]
+        except Exception as e:
+            raise
+
+    @classmethod
+    def terms(cls):
+        """ 級数(E_0, E_1)の係数を配列化
+
+        :return list: [(乗数 np.ndarray, 振幅 np.ndarray)]
+        """
+        try:
+            if cls.TERMS is None:
+                cls.TERMS = [
+                    (np.array([x[0] for x in e], dtype="float64"),
+                     np.array([x[1:] for x in e], dtype="float64"))
+                    for e in [cls.E_0, cls.E_1]
+                ]
+            return cls.TERMS
+        except Exception as e:
+            raise
@@ -0,0 +1,128 @@
+"""
+Class for the quantized-epoch cache of the celestial frame
+  * NPB 行列(r_mtx), CIP 座標(x, y), CIO locator(s), EO(原点差)は
+    地球時のみに依存し、変化が遅いため、地球時を quantum(秒)単位に
+    丸めたキーで LRU キャッシュする(ERA は常に厳密に計算)
+  * キャッシュの値は丸めた地球時での計算結果なので、アクセス順によらず同じ
+  * 誤差は最大で (各量の変化率) x quantum / 2
+    各量の変化率は 2.0e-11 rad/s 未満(歳差 約 7e-12, 章動 約 1.2e-11)のため、
+    quantum = 1 秒なら 1e-11 rad (約 2 マイクロ秒角)以下(error_bound)
+  * 複数のスレッドから使用可(エントリの参照・追加を排他し、計算は排他しない;
+    同じキーを同時に計算した場合は後の結果で上書きするが、値は同じ)
+"""
+from collections import OrderedDict
+from datetime import datetime
+import threading
+import numpy as np
+from lib import pipeline as lpl
+
+# キャッシュする量
+NAMES = ["r_mtx", "x", "y", "s", "eo"]
+# 既定の丸めの単位(秒)、最大エントリ数
+QUANTUM  = 1.0
+MAX_SIZE = 65536
+# 各量(EO, x, y, s)の変化率の上限(Unit: rad/s)
+MAX_RATE = 2.0e-11
+
+
+class FrameCache:
+    def __init__(self, quantum=QUANTUM, max_size=MAX_SIZE, backend=None):
+        """ Initialization
+
+        :param float      quantum: 地球時の丸めの単位(秒)
+        :param int       max_size: 最大エントリ数(LRU)
+        :param string     backend: 級数計算のバックエンド(None なら既定)
+        """
+        self.quantum, self.max_size, self.backend = quantum, max_size, backend
+        self.q_us = max(int(round(quantum * 1.0e6)), 1)
+        self.entries = OrderedDict()
+        self.hits, self.misses = 0, 0
+        self.lock = threading.Lock()
+
+    def get(self, tt):
+        """ 丸めた地球時での frame の取得
+
+        :param  datetime/np.ndarray tt: 地球時(単一、または datetime64 配列)
+        :return dict                  : {名前: 値} (NAMES)
+        """
+        try:
+            scalar = isinstance(tt, datetime)
+            us = np.atleast_1d(np.asarray(
+                np.datetime64(tt, "us") if scalar else tt, dtype="datetime64[us]"
+            ).astype("int64"))
+            keys = np.floor_divide(us + self.q_us // 2, self.q_us)
+            uniq, inv = np.unique(keys, return_inverse=True)
+            vals = {
+                "r_mtx": np.empty((len(uniq), 3, 3)),
+                **{name: np.empty(len(uniq)) for name in NAMES[1:]},
+            }
+            miss = []
+            with self.lock:
+                for i, k in enumerate(uniq.tolist()):
+                    ent = self.entries.get(k)
+                    if ent is None:
+                        miss.append(i)
+                        continue
+                    self.entries.move_to_end(k)
+                    for name, v in zip(NAMES, ent):
+                        vals[name][i] = v
+                self.misses += len(miss)
+                self.hits += len(keys) - len(miss)
+            if miss:
+                miss = np.array(miss)
+                tt_q = (uniq[miss] * self.q_us).astype("datetime64[us]")
+                res = lpl.calc(tt_q, NAMES, self.backend)
+                for name in NAMES:
+                    vals[name][miss] = res[name]
+                with self.lock:
+                    for j, i in enumerate(miss.tolist()):
+                        self.entries[int(uniq[i])] = \
+                            tuple(res[name][j] for name in NAMES)
+                    while len(self.entries) > self.max_size:
+                        self.entries.popitem(last=False)
+            if scalar:
+                return {name: vals[name][inv[0]] for name in NAMES}
+            return {name: vals[name][inv] for name in NAMES}
+        except Exception as e:
+            raise
+
+    def hit_rate(self):
+        """ ヒット率(エポック数に対する、計算を省いた割合)
+
+        :return float: ヒット率
+        """
+        try:
+            n = self.hits + self.misses
+            return self.hits / n if n else 0.0
+        except Exception as e:
+            raise
+
+    def error_bound(self):
+        """ 丸めによる誤差の上限
+
+        :return float: EO, x, y, s の誤差の上限 (Unit: rad)
+        """
+        try:
+            return MAX_RATE * self.q_us / 1.0e6 / 2
+        except Exception as e:
+            raise
+
+    def check(self, tt):
+        """ 厳密な計算との比較(キャッシュは使用しない)
+
+        :param  np.ndarray tt: 地球時(datetime64 配列)
+        :return dict         : {名前: 最大偏差} (r_mtx は要素の最大偏差)
+        """
+        try:
+            tt = np.asarray(tt, dtype="datetime64[us]")
+            us = tt.astype("int64")
+            tt_q = (np.floor_divide(us + self.q_us // 2, self.q_us) * self.q_us) \
+                 .astype("datetime64[us]")
+            exact = lpl.calc(tt, NAMES, self.backend)
+            approx = lpl.calc(tt_q, NAMES, self.backend)
+            return {
+                name: float(np.abs(approx[name] - exact[name]).max())
+                for name in NAMES
+            }
+        except Exception as e:
+            raise
@@ -1,7 +1,7 @@
 """
 Module for Fundamental arguments
 """
-from lib import const as cst
+from lib import polynomial as lpo
 
 
 def l_iers2003(t):
@@ -11,12 +11,7 @@ def l_iers2003(t):
     :return float l: Unit: rad
     """
     try:
-        return ((    485868.249036    \
-              + (1717915923.2178      \
-              + (        31.8792      \
-              + (         0.051635    \
-              + (        -0.00024470) \
-              * t) * t) * t) * t) % cst.TURNAS) * cst.AS2R
+        return lpo.calc("l_iers2003", t)
     except Exception as e:
         raise
 
@@ -27,12 +22,7 @@ def p_iers2003(t):
     :return float p: Unit: rad
     """
     try:
-        return ((   1287104.793048    \
-              + ( 129596581.0481      \
-              + (       - 0.5532      \
-              + (         0.000136    \
-              + (       - 0.00001149) \
-              * t) * t) * t) * t) % cst.TURNAS) * cst.AS2R
+        return lpo.calc("p_iers2003", t)
     except Exception as e:
         raise
 
@@ -43,12 +33,7 @@ def f_iers2003(t):
     :return float f: Unit: rad
     """
     try:
-        return ((    335779.526232    \
-              + (1739527262.8478      \
-              + (       -12.7512      \
-              + (        -0.001037    \
-              + (         0.00000417) \
-              * t) * t) * t) * t) % cst.TURNAS) * cst.AS2R
+        return lpo.calc("f_iers2003", t)
     except Exception as e:
         raise
 
@@ -59,12 +44,7 @@ def d_iers2003(t):
     :return float d: Unit: rad
     """
     try:
-        return ((   1072260.703692    \
-              + (1602961601.2090      \
-              + (       - 6.3706      \
-              + (         0.006593    \
-              + (       - 0.00003169) \
-              * t) * t) * t) * t) % cst.TURNAS ) * cst.AS2R
+        return lpo.calc("d_iers2003", t)
     except Exception as e:
         raise
 
@@ -75,12 +55,7 @@ def om_iers2003(t):
     :return float om: Unit: rad
     """
     try:
-       return ((    450160.398036    \
-             + (  -6962890.5431      \
-             + (         7.4722      \
-             + (         0.007702    \
-             + (        -0.00005939) \
-             * t) * t) * t) * t) % cst.TURNAS) * cst.AS2R
+        return lpo.calc("om_iers2003", t)
     except Exception as e:
         raise
 
@@ -91,7 +66,7 @@ def ve_iers2003(t):
     :return float ve: Unit: rad
     """
     try:
-        return (3.176146697 + 1021.3285546211 * t) % cst.PI2
+        return lpo.calc("ve_iers2003", t)
     except Exception as e:
         raise
 
@@ -102,7 +77,7 @@ def ea_iers2003(t):
     :return float ea: Unit: rad
     """
     try:
-        return (1.753470314 + 628.3075849991 * t) % cst.PI2
+        return lpo.calc("ea_iers2003", t)
     except Exception as e:
         raise
 
@@ -113,7 +88,7 @@ def pa_iers2003(t):
     :return float pa: Unit: rad
     """
     try:
-        return (0.024381750 + 0.00000538691 * t) * t
+        return lpo.calc("pa_iers2003", t)
     except Exception as e:
         raise
 
@@ -124,7 +99,7 @@ def me_iers2003(t):
     :return float me: Unit: rad
     """
     try:
-        return (4.402608842 + 2608.7903141574 * t) % cst.PI2
+        return lpo.calc("me_iers2003", t)
     except Exception as e:
         raise
 
@@ -135,7 +110,7 @@ def ma_iers2003(t):
     :return float ma: Unit: rad
     """
     try:
-        return (6.203480913 + 334.0612426700 * t) % cst.PI2
+        return lpo.calc("ma_iers2003", t)
     except Exception as e:
         raise
 
@@ -146,7 +121,7 @@ def ju_iers2003(t):
     :return float ju: Unit: rad
     """
     try:
-        return (0.599546497 + 52.9690962641 * t) % cst.PI2
+        return lpo.calc("ju_iers2003", t)
     except Exception as e:
         raise
 
@@ -157,7 +132,7 @@ def sa_iers2003(t):
     :return float sa: Unit: rad
     """
     try:
-        return (0.874016757 + 21.3299104960 * t) % cst.PI2
+        return lpo.calc("sa_iers2003", t)
     except Exception as e:
         raise
 
@@ -168,7 +143,18 @@ def ur_iers2003(t):
     :return float ur: Unit: rad
     """
     try:
-        return (5.481293872 + 7.4781598567 * t) % cst.PI2
+        return lpo.calc("ur_iers2003", t)
+    except Exception as e:
+        raise
+
+def ne_iers2003(t):
+    """ Neptune longitude (IERS 2003)
+
+    :param  float  t: Julian Centry
+    :return float ne: Unit: rad
+    """
+    try:
+        return lpo.calc("ne_iers2003", t)
     except Exception as e:
         raise
 
@@ -179,12 +165,7 @@ def lp_mhb2000(t):
     :return float lp: Unit: rad
     """
     try:
-        return ((  1287104.79305     \
-              + (129596581.0481      \
-              + (       -0.5532      \
-              + (        0.000136    \
-              + (       -0.00001149) \
-              * t) * t) * t) * t) % cst.TURNAS) * cst.AS2R
+        return lpo.calc("lp_mhb2000", t)
     except Exception as e:
         raise
 
@@ -195,12 +176,7 @@ def d_mhb2000(t):
     :return float d: Unit: rad
     """
     try:
-        return ((   1072260.70369     \
-              + (1602961601.2090      \
-              + (        -6.3706      \
-              + (         0.006593    \
-              + (        -0.00003169) \
-              * t) * t) * t) * t) % cst.TURNAS) * cst.AS2R
+        return lpo.calc("d_mhb2000", t)
     except Exception as e:
         raise
 
@@ -211,7 +187,7 @@ def l_mhb2000(t):
     :return float l: Unit: rad
     """
     try:
-        return (2.35555598 + 8328.6914269554 * t) % cst.PI2
+        return lpo.calc("l_mhb2000", t)
     except Exception as e:
         raise
 
@@ -222,7 +198,7 @@ def f_mhb2000(t):
     :return float f: Unit: rad
     """
     try:
-        return (1.627905234 + 8433.466158131 * t) % cst.PI2
+        return lpo.calc("f_mhb2000", t)
     except Exception as e:
         raise
 
@@ -233,7 +209,7 @@ def d_mhb2000_2(t):
     :return float d: Unit: rad
     """
     try:
-        return (5.198466741 + 7771.3771468121 * t) % cst.PI2
+        return lpo.calc("d_mhb2000_2", t)
     except Exception as e:
         raise
 
@@ -244,7 +220,7 @@ def om_mhb2000(t):
     :return float om: Unit: rad
     """
     try:
-        return (2.18243920 - 33.757045 * t) % cst.PI2
+        return lpo.calc("om_mhb2000", t)
     except Exception as e:
         raise
 
@@ -255,7 +231,7 @@ def ne_mhb2000(t):
     :return float ne: Unit: rad
     """
     try:
-        return (5.321159000 + 3.8127774000 * t) % cst.PI2
+        return lpo.calc("ne_mhb2000", t)
     except Exception as e:
         raise
 
@@ -10,6 +10,7 @@ import math
 import numpy as np
 from lib import angle as ang
 from lib import const as cst
+from lib import polynomial as lpo
 
 
 class Greenwich:
@@ -39,18 +40,21 @@ class Greenwich:
         """ Equation of the origins, given the classical NPB matrix and the
             quantity s.
 
-        :param  np.matrix r: Rotation matrix
+        :param  np.matrix r: Rotation matrix (または (N, 3, 3) の配列)
         :param  float     s: CIO locator
         :return float    EO: Equation of the origin (Unit: rad), 原点差
         """
         try:
-            x = r_mtx[2, 0]
-            ax = x / (1 + r_mtx[2, 2])
+            r = r_mtx
+            x = r[..., 2, 0]
+            ax = x / (1 + r[..., 2, 2])
             xs = 1 - ax * x
-            ys = -ax * r_mtx[2, 1]
+            ys = -ax * r[..., 2, 1]
             zs = -x
-            p = r_mtx[0, 0] * xs + r_mtx[0, 1] * ys + r_mtx[0, 2] * zs
-            q = r_mtx[1, 0] * xs + r_mtx[1, 1] * ys + r_mtx[1, 2] * zs
+            p = r[..., 0, 0] * xs + r[..., 0, 1] * ys + r[..., 0, 2] * zs
+            q = r[..., 1, 0] * xs + r[..., 1, 1] * ys + r[..., 1, 2] * zs
+            if np.ndim(p):
+                return np.where((p != 0) | (q != 0), s - np.arctan2(q, p), s)
             return s - math.atan2(q, p) if p != 0 or q != 0 else s
         except Exception as e:
             raise
@@ -75,16 +79,7 @@ class Greenwich:
         :return float GMST: Greenwich mean sidereal time (Unit: rad), グリニッジ平均恒星時
         """
         try:
-            return ang.norm_angle(
-                gast \
-                + (   0.014506      \
-                + (4612.156534      \
-                + (   1.3915817     \
-                + (  -0.00000044    \
-                + (  -0.000029956   \
-                + (  -0.0000000368) \
-                * t) * t) * t) * t) * t) * cst.AS2R
-            )
+            return ang.norm_angle(gast + lpo.calc("gmst", t))
         except Exception as e:
             raise
 
@@ -93,10 +88,17 @@ class Greenwich:
 
         :param  float gast: Greenwich apparent sidereal time, グリニッジ視恒星時
         :param  float gmst: Greenwich mean sidereal time, グリニッジ平均恒星時
-        :return float   EE: Equation of Equinoxes (Unit: rad), 分点均差
+        :return float   EE: Equation of Equinoxes (Unit: rad, Range: -pi-pi), 分点均差
         """
         try:
-            return gast - gmst
+            # GAST, GMST の一方のみが 0/2pi を跨いだ場合に 2pi ずれないよう補正
+            ee = gast - gmst
+            if np.ndim(ee):
+                ee = np.where(ee > cst.PI, ee - cst.PI2, ee)
+                return np.where(ee < -cst.PI, ee + cst.PI2, ee)
+            if ee > cst.PI:
+                return ee - cst.PI2
+            return ee + cst.PI2 if ee < -cst.PI else ee
         except Exception as e:
             raise
 
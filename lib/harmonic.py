@@ -0,0 +1,362 @@
+"""
+Class for the shared harmonic arguments of the series
+  * 日月章動(nut_ls.txt)、惑星章動(nut_pl.txt)、CIO locator s(S_0 .. S_4)、
+    EE の補正項(E_0, E_1)の級数は、同じ整数の乗数の組(= 同じ引数)を多く含む
+    (表の中の重複、級数間の重複)
+  * 全ての級数の乗数を共通の基本引数(FAS)の列に並べ直し、重複を除いた
+    「一意の引数」の索引を、係数表の読み込み時に1度だけ生成する
+  * エポック毎に一意の引数の sin, cos を1度だけ計算し、各級数は振幅を索引で
+    一意の引数の位置に足し込んで、sin, cos と掛け合わせる
+    (同じエポックの章動、s、EE、各変化率で共有)
+  * 乗数の符号の反転(sin(-a) = -sin(a))は同一視しない
+  * sin, cos (位相子)と gather で抜き出した行は、バックエンドの作業領域
+    (NumpyBackend.reserve の "harm", "sel")に書き込む(エンジンのバッチ毎に
+    大きな配列を確保しない; 作業領域が無い、または収まらない場合のみ新規確保)
+  * 一意の引数は、引数の組(GROUPS)毎に索引を持つ
+    - npb: 章動、s、EE の補正項(NPB 行列の経路)
+    - xy : CIP 座標 X,Y の級数(cip_cio.CipCio.xy_06)、s
+    X,Y の級数の引数は全て IERS 2003 の基本引数で、章動の引数との共通部分は
+    少ないため、別の組にする(組の sin, cos は、その組の級数を最初に計算する時に
+    計算; NPB 行列の経路では X,Y の級数の引数を計算しない)
+    作業領域の "harm" には GROUPS の順に並べる
+"""
+import threading
+import numpy as np
+from lib import const      as cst
+from lib import equinox    as leq
+from lib import cip_cio    as lcc
+from lib import nutation   as lnt
+from lib import polynomial as lpo
+
+# 共通の基本引数(polynomial.POLYS の名前)
+FAS = [
+    "l_iers2003", "lp_mhb2000", "p_iers2003", "f_iers2003", "d_mhb2000",
+    "d_iers2003", "om_iers2003", "l_mhb2000", "f_mhb2000", "d_mhb2000_2",
+    "om_mhb2000", "me_iers2003", "ve_iers2003", "ea_iers2003", "ma_iers2003",
+    "ju_iers2003", "sa_iers2003", "ur_iers2003", "ne_mhb2000", "pa_iers2003",
+]
+# 各級数の基本引数(乗数の列の順, None は未使用の列)
+#   * 日月章動, 惑星章動は nutation.FA_LS, nutation.FA_PL
+#   * X,Y の級数は cip_cio.FA_XY
+FA_S = [
+    "l_iers2003", "p_iers2003", "f_iers2003", "d_iers2003", "om_iers2003",
+    "ve_iers2003", "ea_iers2003", "pa_iers2003",
+]
+# 引数の組と、その共通の基本引数(作業領域はこの順に並べる)
+GROUPS = {"npb": FAS, "xy": lcc.FA_XY}
+
+# 索引の生成の排他(スレッド並列時に1度だけ生成)
+_lock = threading.Lock()
+
+
+class Harmonics:
+    # 引数の組毎の一意の引数の索引(初回使用時に生成)
+    #   {組: {"mult": 乗数 (一意の引数 x 組の基本引数),
+    #         "pos": {級数名: 一意の引数の番号},
+    #         "rows": [最初に使用する級数毎の行の範囲 (開始, 終了)],
+    #         "coef": 引数の多項式の係数 (一意の引数 x nutation.N_COEF)}}
+    INDEX = {}
+
+    def __init__(self, t, mode=None, backend=None):
+        """ Initialization
+            * sin, cos は最初の級数の計算時に、全ての一意の引数について計算
+
+        :param float/np.ndarray t: Julian Century Number (TT, または配列)
+        :param string        mode: sin, cos の計算方法("sincos", "phasor",
+                                   "precombined"; None なら nutation の既定)
+        :param NumpyBackend backend: 作業領域を持つバックエンド(None なら新規確保)
+        """
+        self.t = t
+        self.mode = lnt.get_mode(mode)
+        self.backend = backend
+        self.size = np.size(t)
+        # 計算済みの組の [sin, cos, 位相子(phasor のみ)]
+        self.args = {}
+        # 集めた項数(共有しない場合の引数の計算回数)
+        self.gathered = 0
+
+    @classmethod
+    def index(cls, group="npb"):
+        """ 一意の引数の索引の生成
+
+        :param  string group: 引数の組(GROUPS)
+        :return dict        : {"mult": np.ndarray, "pos": {級数名: np.ndarray}}
+        """
+        try:
+            if group in cls.INDEX:
+                return cls.INDEX[group]
+            if group not in GROUPS:
+                raise ValueError("Unknown argument group: {}".format(group))
+            with _lock:
+                if group not in cls.INDEX:
+                    cls.INDEX[group] = cls.__build(group)
+            return cls.INDEX[group]
+        except Exception as e:
+            raise
+
+    @classmethod
+    def start(cls, group):
+        """ 作業領域での組の先頭(GROUPS で前にある組の一意の引数の数の合計)
+
+        :param  string group: 引数の組
+        :return int         : 一意の引数の番号
+        """
+        try:
+            names = list(GROUPS)
+            return sum(len(cls.index(g)["mult"]) for g in names[:names.index(group)])
+        except Exception as e:
+            raise
+
+    @classmethod
+    def n_args(cls, groups=None):
+        """ 作業領域に並べる一意の引数の数(使用する組の末尾まで)
+
+        :param  list groups: 使用する引数の組(None なら全て)
+        :return int        : 引数の数
+        """
+        try:
+            return max(
+                cls.start(g) + len(cls.index(g)["mult"]) for g in (groups or GROUPS)
+            )
+        except Exception as e:
+            raise
+
+    @classmethod
+    def __build(cls, group):
+        """ 一意の引数の索引の生成(index から排他して呼び出す)
+
+        :param  string group: 引数の組
+        :return dict        : 索引
+        """
+        try:
+            series = {}
+            if group == "npb":
+                nut = lnt.Nutation(0.0)
+                series["ls"] = (nut.dat_ls[:, :5], lnt.FA_LS)
+                series["pl"] = (nut.dat_pl[:, :14], lnt.FA_PL)
+            else:
+                for c, terms in zip("xy", lcc.CipCio.xy_terms()):
+                    for j, (mult, _) in enumerate(terms):
+                        series["{}_{}".format(c, j)] = (mult, lcc.FA_XY)
+            for i, (mult, _) in enumerate(lcc.CipCio.terms()):
+                series["s_{}".format(i)] = (mult, FA_S)
+            if group == "npb":
+                for i, (mult, _) in enumerate(leq.Equinox.terms()):
+                    series["ee_{}".format(i)] = (mult, FA_S)
+            fas = GROUPS[group]
+            blocks, names = [], list(series)
+            for name in names:
+                mult, cols = series[name]
+                m = np.zeros((len(mult), len(fas)))
+                for j, col in enumerate(cols):
+                    if col is not None:
+                        m[:, fas.index(col)] = mult[:, j]
+                blocks.append(m)
+            # 一意の引数は、最初に使用する級数の順に並べる
+            # (日月章動、惑星章動の引数がそれぞれ連続した行になる)
+            uniq, first, inv = np.unique(
+                np.vstack(blocks), axis=0, return_index=True, return_inverse=True
+            )
+            order = np.argsort(first)
+            rank = np.empty_like(order)
+            rank[order] = np.arange(len(order))
+            uniq, inv = uniq[order], rank[inv.reshape(-1)]
+            pos, k, offsets = {}, 0, []
+            for name, m in zip(names, blocks):
+                pos[name] = inv[k:k + len(m)]
+                offsets.append(k)
+                k += len(m)
+            # 最初に使用する級数毎の行の範囲(phasor の計算の単位)
+            owner = np.searchsorted(offsets, first[order], "right")
+            edges = np.flatnonzero(np.diff(owner)) + 1
+            rows = list(zip([0] + edges.tolist(), edges.tolist() + [len(uniq)]))
+            # 各引数を t の多項式にまとめた係数(precombined; 位相は 2pi の剰余)
+            coef = uniq @ np.array([lpo.rad_coef(name, lnt.N_COEF) for name in fas])
+            coef[:, 0] %= cst.PI2
+            return {"mult": uniq, "pos": pos, "rows": rows, "coef": coef}
+        except Exception as e:
+            raise
+
+    @classmethod
+    def stats(cls, names=None, group="npb"):
+        """ 1エポックあたりの引数の数
+
+        :param  list  names: 級数名(None なら組の全て)
+        :param  string group: 引数の組
+        :return dict       : {"terms": 各級数の項数の合計,
+                              "unique": 一意の引数の数,
+                              "saved": 省ける sin, cos の計算回数}
+        """
+        try:
+            idx = cls.index(group)
+            names = names or list(idx["pos"])
+            pos = np.concatenate([idx["pos"][name] for name in names])
+            terms, unique = len(pos), len(np.unique(pos))
+            return {"terms": terms, "unique": unique, "saved": 2 * (terms - unique)}
+        except Exception as e:
+            raise
+
+    def sincos(self, group="npb"):
+        """ 組の全ての一意の引数の sin, cos (一意の引数 x エポック; 初回のみ計算)
+            * phasor の場合は、位相子 exp(i・arg) の虚部, 実部(ビュー)
+
+        :param  string group: 引数の組
+        :return list        : [sin, cos]
+        """
+        try:
+            if group not in self.args:
+                idx = self.index(group)
+                n = len(idx["mult"])
+                # 作業領域での組の先頭の行(float64 の行; 前の組の sin, cos の後)
+                row = 2 * self.start(group)
+                z = None
+                if self.mode != "phasor":
+                    # 引数は cos の領域で計算し、sin を求めてから上書きで cos にする
+                    buf = self.__buffer("harm", 2 * n, row=row)
+                    sarg, carg = buf[:n], buf[n:]
+                if self.mode == "precombined":
+                    pw = np.array(np.broadcast_arrays(*lnt.Nutation.powers(self.t)))
+                    np.matmul(idx["coef"], pw.reshape(lnt.N_COEF, -1), out=carg)
+                else:
+                    fa = np.array(
+                        [np.broadcast_to(lpo.calc(name, self.t), (self.size,))
+                         for name in GROUPS[group]]
+                    )
+                if self.mode == "phasor":
+                    # 行の範囲毎に、使用する基本引数のみで位相子を計算
+                    mult = idx["mult"]
+                    z = self.__buffer("harm", n, "complex128", row // 2)
+                    for lo, hi in idx["rows"]:
+                        cols = np.flatnonzero(np.any(mult[lo:hi] != 0, axis=0))
+                        lnt.Nutation.phasors(
+                            fa[cols], mult[lo:hi][:, cols], z[lo:hi]
+                        )
+                    sarg, carg = z.imag, z.real
+                else:
+                    if self.mode == "sincos":
+                        np.matmul(idx["mult"], fa, out=carg)
+                    np.remainder(carg, cst.PI2, out=carg)
+                    np.sin(carg, out=sarg)
+                    np.cos(carg, out=carg)
+                self.args[group] = [sarg, carg, z]
+            return self.args[group][:2]
+        except Exception as e:
+            raise
+
+    def gather(self, names, amp_s, amp_c, group="npb"):
+        """ 振幅と sin, cos の積和
+            * 各項の振幅を一意の引数の位置に足し込み(同じ引数の項はまとめる)、
+              使用する一意の引数の行の sin, cos と行列積をとる
+              (使用する行が概ね連続していればその範囲(ビュー)、
+               そうでなければ使用する行のみを抜き出す)
+            * phasor の場合は (amp_c - i・amp_s) と exp(i・arg) の積の実部
+
+        :param  string/list names: 級数名(リストなら項を連結)
+        :param  np.ndarray  amp_s: sin の振幅 (項 x K)
+        :param  np.ndarray  amp_c: cos の振幅 (項 x K)
+        :param  string      group: 引数の組
+        :return np.ndarray       : sum(amp_s * sin + amp_c * cos) (K x エポック)
+        """
+        try:
+            idx = self.index(group)
+            if isinstance(names, str):
+                names = [names]
+            pos = np.concatenate([idx["pos"][name] for name in names])
+            self.gathered += len(pos)
+            sarg, carg = self.sincos(group)
+            z = self.args[group][2]
+            if self.mode == "phasor":
+                sarg = carg = z
+            rows = np.unique(pos)
+            lo, hi = rows[0], rows[-1] + 1
+            if hi - lo <= 2 * len(rows):
+                sarg, carg, pos = sarg[lo:hi], carg[lo:hi], pos - lo
+            elif self.mode == "phasor":
+                sel = self.__buffer("sel", len(rows), "complex128")
+                sarg = carg = np.take(z, rows, axis=0, out=sel)
+                pos = np.searchsorted(rows, pos)
+            else:
+                # 抜き出す行は一意の引数の半分未満のため、sin, cos とも sel に収まる
+                k = len(rows)
+                sel = self.__buffer("sel", 2 * k)
+                sarg = np.take(sarg, rows, axis=0, out=sel[:k])
+                carg = np.take(carg, rows, axis=0, out=sel[k:])
+                pos = np.searchsorted(rows, pos)
+            w_s = np.zeros((len(sarg), amp_s.shape[1]))
+            w_c = np.zeros((len(carg), amp_c.shape[1]))
+            np.add.at(w_s, pos, amp_s)
+            np.add.at(w_c, pos, amp_c)
+            if self.mode == "phasor":
+                return ((w_c - 1j * w_s).T @ sarg).real
+            return w_s.T @ sarg + w_c.T @ carg
+        except Exception as e:
+            raise
+
+    def series(self, names, amp, group="npb"):
+        """ sum(amp_sin * sin(arg) + amp_cos * cos(arg))
+
+        :param  string/list names: 級数名
+        :param  np.ndarray    amp: 振幅 (項 x 2)
+        :param  string      group: 引数の組
+        :return float/np.ndarray : 級数の値
+        """
+        try:
+            return self.__out(self.gather(names, amp[:, :1], amp[:, 1:], group)[0])
+        except Exception as e:
+            raise
+
+    def lunisolar(self, dat):
+        """ 日月章動(backend.lunisolar と同じ式)
+
+        :param  np.ndarray dat: 日月章動の係数表
+        :return list          : [dpsi, deps] (Unit: 0.1 micro arcsecond)
+        """
+        try:
+            z = np.zeros(len(dat))
+            # 行: dpsi の定数項, dpsi の t の係数, deps の定数項, deps の t の係数
+            w = self.gather(
+                "ls",
+                np.column_stack([dat[:, 5], dat[:, 6], dat[:, 10], z]),
+                np.column_stack([dat[:, 7], z, dat[:, 8], dat[:, 9]])
+            )
+            return [self.__out(w[0] + w[1] * self.t), self.__out(w[2] + w[3] * self.t)]
+        except Exception as e:
+            raise
+
+    def planetary(self, dat):
+        """ 惑星章動(backend.planetary と同じ式)
+
+        :param  np.ndarray dat: 惑星章動の係数表
+        :return list          : [dpsi, deps] (Unit: 0.1 micro arcsecond)
+        """
+        try:
+            w = self.gather("pl", dat[:, [14, 16]], dat[:, [15, 17]])
+            return [self.__out(w[0]), self.__out(w[1])]
+        except Exception as e:
+            raise
+
+    def saved(self):
+        """ このエポック(配列)で省いた sin, cos の計算回数
+            * phasor の場合、実際の回数は基本引数の数(FAS)のみ
+
+        :return int: 省いた回数(共有しない場合の回数 - 実際の回数)
+        """
+        try:
+            done = sum(
+                len(GROUPS[group]) if self.mode == "phasor" else sarg.shape[0]
+                for group, (sarg, _, _) in self.args.items()
+            )
+            return 2 * (self.gathered - done) * self.size
+        except Exception as e:
+            raise
+
+    def __buffer(self, name, n, dtype="float64", row=0):
+        """ 作業領域のビュー(row 行目から n x エポック;
+            無い、または収まらなければ新規確保) """
+        buf = None if self.backend is None else \
+              self.backend.buffer(name, n, self.size, dtype, row)
+        return buf if buf is not None else np.empty((n, self.size), dtype=dtype)
+
+    def __out(self, val):
+        """ 単一エポックならスカラーに戻す """
+        return val if np.ndim(self.t) else float(val[0])
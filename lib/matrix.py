@@ -14,6 +14,21 @@ def init_r():
     except Exception as e:
         raise
 
+def stack_r(rows):
+    """ 要素が配列の 3x3 行列 -> 行列の配列
+
+    :param  list rows: 3x3 の要素(各 float または (N,) の配列)
+    :return np.ndarray: (N, 3, 3)
+    """
+    try:
+        elems = np.broadcast_arrays(*[e for row in rows for e in row])
+        return np.moveaxis(
+            np.array(elems, dtype="float64").reshape((3, 3) + elems[0].shape),
+            (0, 1), (-2, -1)
+        )
+    except Exception as e:
+        raise
+
 def rotate_x(r_src, phi):
     """ Rotate an r-matrix about the x-axis.
 
@@ -23,13 +38,19 @@ def rotate_x(r_src, phi):
         (                               )
         (  0   - sin(phi)   + cos(phi)  )
 
-    :param  np.matrix r_src: Rotation matrix
-    :param  float       phi: Angle (Unit: rad)
-    :return np.matrix r_dst: Rotated matrix
+    :param  np.matrix r_src: Rotation matrix (角度が配列なら (N, 3, 3) も可)
+    :param  float       phi: Angle (Unit: rad, 配列なら N 個の行列を一括回転)
+    :return np.matrix r_dst: Rotated matrix (角度が配列なら (N, 3, 3) の np.ndarray)
     """
     try:
         s = np.sin(phi)
         c = np.cos(phi)
+        if np.ndim(phi):
+            return stack_r([
+                [1,  0, 0],
+                [0,  c, s],
+                [0, -s, c]
+            ]) @ r_src
         r_mx = np.matrix([
             [1,  0, 0],
             [0,  c, s],
@@ -48,13 +69,19 @@ def rotate_y(r_src, theta):
         (                                        )
         (  + sin(theta)     0      + cos(theta)  )
 
-    :param  np.matrix r_src: Rotation matrix
-    :param  float     theta: Angle (Unit: rad)
-    :return np.matrix r_dst: Rotated matrix
+    :param  np.matrix r_src: Rotation matrix (角度が配列なら (N, 3, 3) も可)
+    :param  float     theta: Angle (Unit: rad, 配列なら N 個の行列を一括回転)
+    :return np.matrix r_dst: Rotated matrix (角度が配列なら (N, 3, 3) の np.ndarray)
     """
     try:
         s = np.sin(theta)
         c = np.cos(theta)
+        if np.ndim(theta):
+            return stack_r([
+                [c, 0, -s],
+                [0, 1,  0],
+                [s, 0,  c]
+            ]) @ r_src
         r_mx = np.matrix([
             [c, 0, -s],
             [0, 1,  0],
@@ -73,13 +100,19 @@ def rotate_z(r_src, psi):
         (                                 )
         (       0            0         1  )
 
-    :param  np.matrix r_src: Rotation matrix
-    :param  float       psi: Angle (Unit: rad)
-    :return np.matrix r_dst: Rotated matrix
+    :param  np.matrix r_src: Rotation matrix (角度が配列なら (N, 3, 3) も可)
+    :param  float       psi: Angle (Unit: rad, 配列なら N 個の行列を一括回転)
+    :return np.matrix r_dst: Rotated matrix (角度が配列なら (N, 3, 3) の np.ndarray)
     """
     try:
         s = np.sin(psi)
         c = np.cos(psi)
+        if np.ndim(psi):
+            return stack_r([
+                [ c, s, 0],
+                [-s, c, 0],
+                [ 0, 0, 1]
+            ]) @ r_src
         r_mx = np.matrix([
             [ c, s, 0],
             [-s, c, 0],
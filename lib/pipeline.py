@@ -0,0 +1,358 @@
+"""
+Class for the demand-driven calculation pipeline
+  * 各計算量をノードとする小さな依存グラフで計算を表現し、
+    要求された量の計算に必要な段階だけを遅延評価する
+  * 評価済みのノードはキャッシュし、再計算しない
+  * 例えば ERA, GMST のみを要求した場合、章動(1,365項)の計算は行わない
+  * CIP 座標 X,Y は、NPB 行列から取り出す(matrix; 既定)か、
+    IAU 2006/2000A の X,Y の級数で直接計算する(xy06)
+    - xy06 は X,Y, s, ERA(CIO 基準の量)の計算で、章動(1,365項)、歳差角、
+      NPB 行列を計算しない(EO, r_mtx を要求した場合のみ計算)
+    - 2つの方法の差は 1 マイクロ秒角程度(check_cip で確認)
+"""
+from datetime import datetime
+import numpy as np
+from lib import angle       as lang
+from lib import backend     as lbk
+from lib import cip_cio     as lcc
+from lib import const       as lcst
+from lib import equinox     as leq
+from lib import greenwich   as lgw
+from lib import harmonic    as lhm
+from lib import matrix      as lmx
+from lib import nutation    as lnt
+from lib import precession  as lpr
+from lib import rate        as lrt
+from lib import rotation_fw as lfw
+from lib import time        as ltm
+
+
+def _pfw(jc):
+    return lpr.Precession(jc).calc_pfw_06()
+
+def _eps_a(jc):
+    return lpr.Precession(jc).calc_obl_06()
+
+def _harm(jc, backend):
+    backend = lbk.get(backend)
+    return lhm.Harmonics(jc, backend=backend) if backend.name == "numpy" else None
+
+def _nut(jc, backend, harm):
+    return lnt.Nutation(jc, backend).calc_nut_06_a(harm)
+
+def _r_mtx(gam_b, phi_b, psi_b, eps_a, d_psi, d_eps):
+    return lfw.RotationFw().fw2m(gam_b, phi_b, psi_b + d_psi, eps_a + d_eps)
+
+def _xy(jc, r_mtx):
+    return lcc.CipCio(jc).bpn2xy(r_mtx)
+
+def _xy_06(jc, backend, harm):
+    return lcc.CipCio(jc, backend).xy_06(harm)
+
+def _s(jc, x, y, backend, harm=None):
+    return lcc.CipCio(jc, backend).s_06(x, y, harm)
+
+def _s_xy(jc, x, y, backend, harm):
+    return lcc.CipCio(jc, backend).s_06(x, y, harm, "xy")
+
+def _c2i(jc, x, y, s):
+    return lcc.CipCio(jc).c2ixys(x, y, s)
+
+def _c2t(c2i, era):
+    return lmx.rotate_z(c2i, era)
+
+def _era(jd_ut1):
+    return lgw.Greenwich(jd_ut1).era_00()
+
+def _eo(jd_ut1, r_mtx, s):
+    return lgw.Greenwich(jd_ut1).eors(r_mtx, s)
+
+def _gast(jd_ut1, era, eo):
+    return lgw.Greenwich(jd_ut1).gast(era, eo)
+
+def _gmst(jd_ut1, era, jc):
+    return lgw.Greenwich(jd_ut1).gmst(era, jc)
+
+def _ee(jd_ut1, gast, gmst):
+    return lgw.Greenwich(jd_ut1).ee(gast, gmst)
+
+def _ee_eq(jc, eps_a, d_psi, backend, harm=None):
+    return leq.Equinox(jc, backend).ee_00(eps_a, d_psi, harm)
+
+def _gast_eq(gmst, ee):
+    return lang.norm_angle(gmst + ee)
+
+def _era_rate(jc):
+    return lrt.Rate(jc).era_rate()
+
+def _gmst_rate(jc):
+    return lrt.Rate(jc).gmst_rate()
+
+def _ee_rate(jc, eps_a, d_psi, backend, harm):
+    return lrt.Rate(jc, backend).ee_rate(eps_a, d_psi, harm)
+
+def _gast_rate(gmst_rate, ee_rate):
+    return gmst_rate + ee_rate
+
+def _nut_plan(jc, nut_plan):
+    return nut_plan.calc_nut_06_a(jc)
+
+def _frame(tt, frame_cache):
+    return frame_cache.get(tt)
+
+def _deg(rad):
+    return rad / lcst.PI_180
+
+
+class Pipeline:
+    # ノード名: (依存ノード, 計算関数)
+    #   * "tt"(地球時), "backend"(級数計算のバックエンド),
+    #     "frame_cache"(frame キャッシュ)は入力で、計算関数を持たない
+    #   * 複数の値を返すノード(pfw, nut, xy)は、各成分のノード経由で参照する
+    #   * 各計算関数は単一エポック(float)、エポック配列(np.ndarray)の両方を扱う
+    #   * c2i は GCRS -> CIRS の回転行列、c2t は GCRS -> TIRS(極運動を含まない)
+    #     の回転行列(R3(ERA)・C2I; 極運動は transform で適用)
+    #   * *_rate は時間微分(Unit: rad/s, 計算経路によらず共通)
+    #   * harm は章動, s, EE の補正項, 各変化率(, X,Y)の級数で共有する引数の sin, cos
+    #     (harmonic.Harmonics; numpy 以外のバックエンドでは None で、各級数を個別に計算)
+    NODES = {
+        "jd":       (("tt",),                      ltm.calc_jd),
+        "jc":       (("jd",),                      ltm.calc_jc),
+        "dt":       (("tt",),                      ltm.calc_dt),
+        "ut1":      (("tt", "dt"),                 ltm.tt2ut1),
+        "jd_ut1":   (("ut1",),                     ltm.calc_jd),
+        "pfw":      (("jc",),                      _pfw),
+        "gam_b":    (("pfw",),                     lambda pfw: pfw[0]),
+        "phi_b":    (("pfw",),                     lambda pfw: pfw[1]),
+        "psi_b":    (("pfw",),                     lambda pfw: pfw[2]),
+        "eps_a":    (("jc",),                      _eps_a),
+        "harm":     (("jc", "backend"),            _harm),
+        "nut":      (("jc", "backend", "harm"),    _nut),
+        "d_psi":    (("nut",),                     lambda nut: nut[0]),
+        "d_eps":    (("nut",),                     lambda nut: nut[1]),
+        "r_mtx":    (("gam_b", "phi_b", "psi_b", "eps_a", "d_psi", "d_eps"),
+                     _r_mtx),
+        "xy":       (("jc", "r_mtx"),              _xy),
+        "x":        (("xy",),                      lambda xy: xy[0]),
+        "y":        (("xy",),                      lambda xy: xy[1]),
+        "s":        (("jc", "x", "y", "backend", "harm"), _s),
+        "era":      (("jd_ut1",),                  _era),
+        "c2i":      (("jc", "x", "y", "s"),        _c2i),
+        "c2t":      (("c2i", "era"),               _c2t),
+        "eo":       (("jd_ut1", "r_mtx", "s"),     _eo),
+        "gast":     (("jd_ut1", "era", "eo"),      _gast),
+        "gast_deg": (("gast",),                    _deg),
+        "gmst":     (("jd_ut1", "era", "jc"),      _gmst),
+        "gmst_deg": (("gmst",),                    _deg),
+        "ee":       (("jd_ut1", "gast", "gmst"),   _ee),
+        "ee_deg":   (("ee",),                      _deg),
+        "era_rate": (("jc",),                      _era_rate),
+        "gmst_rate": (("jc",),                     _gmst_rate),
+        "ee_rate":  (("jc", "eps_a", "d_psi", "backend", "harm"), _ee_rate),
+        "gast_rate": (("gmst_rate", "ee_rate"),    _gast_rate),
+    }
+
+    # GAST の計算経路毎に置き換えるノード
+    #   * cio    : ERA - EO (NPB 行列, CIP 座標, s を経由; 既定)
+    #   * equinox: GMST + EE (EE = Δψ・cos(ε_A) + 補正項; NPB 行列, s は不要)
+    ROUTES = {
+        "cio": {},
+        "equinox": {
+            "ee":   (("jc", "eps_a", "d_psi", "backend", "harm"), _ee_eq),
+            "gast": (("gmst", "ee"),                      _gast_eq),
+        },
+    }
+
+    # frame キャッシュ(frame.FrameCache)使用時に置き換えるノード
+    #   * NPB 行列, CIP 座標, s, EO を、丸めた地球時での値で代用
+    FRAME = {
+        "frame": (("tt", "frame_cache"), _frame),
+        "r_mtx": (("frame",),      lambda f: f["r_mtx"]),
+        "x":     (("frame",),      lambda f: f["x"]),
+        "y":     (("frame",),      lambda f: f["y"]),
+        "s":     (("frame",),      lambda f: f["s"]),
+        "eo":    (("frame",),      lambda f: f["eo"]),
+    }
+
+    # CIP 座標の計算方法毎に置き換えるノード
+    #   * matrix: NPB 行列から取り出す(既定)
+    #   * xy06  : X,Y の級数(cip_cio.CipCio.xy_06)で直接計算
+    #             (s も X,Y の級数と同じ引数の組 "xy" の sin, cos を使用)
+    CIPS = {
+        "matrix": {},
+        "xy06": {
+            "xy": (("jc", "backend", "harm"),            _xy_06),
+            "s":  (("jc", "x", "y", "backend", "harm"), _s_xy),
+        },
+    }
+
+    # 章動の計画(reduction.NutationPlan)使用時に置き換えるノード(計算経路毎)
+    #   * 長周期の項を多項式にまとめ、短周期の項のみを級数で計算
+    #   * 引数の共有(harm)は全ての一意の引数の sin, cos を計算するため、
+    #     s, EE の補正項(各 100 項未満)は backend で個別に計算
+    #     (変化率を要求した場合は、変化率の級数で harm を使用)
+    PLAN = {
+        "cio": {
+            "nut": (("jc", "nut_plan"),                _nut_plan),
+            "s":   (("jc", "x", "y", "backend"),       _s),
+        },
+        "equinox": {
+            "nut": (("jc", "nut_plan"),                _nut_plan),
+            "ee":  (("jc", "eps_a", "d_psi", "backend"), _ee_eq),
+        },
+    }
+
+    # 入力(計算関数を持たないノード)
+    INPUTS = ("tt", "backend", "frame_cache", "nut_plan")
+
+    def __init__(self, tt, backend=None, route="cio", frame=None, plan=None,
+                 cip="matrix", dt=None):
+        """ Initialization
+
+        :param datetime/list/np.ndarray tt: 地球時
+                                            (単一の日時、または日時/datetime64 の配列)
+        :param string/object       backend: 級数計算のバックエンド(None なら既定)
+        :param string                route: GAST の計算経路("cio", "equinox")
+        :param FrameCache            frame: frame キャッシュ(None なら不使用)
+        :param NutationPlan           plan: 章動の計画(None なら全項を計算)
+        :param string                  cip: CIP 座標の計算方法("matrix", "xy06")
+        :param float/np.ndarray         dt: ΔT (None なら地球時から計算;
+                                            UTC の入力では UTC の年・月の ΔT)
+        """
+        self.is_array = not isinstance(tt, datetime)
+        if self.is_array:
+            tt = np.asarray(tt, dtype="datetime64[us]")
+        self.size = len(tt) if self.is_array else 1
+        self.cache = {
+            "tt": tt, "backend": backend, "frame_cache": frame, "nut_plan": plan
+        }
+        if dt is not None:
+            self.cache["dt"] = dt
+        self.route, self.use_frame = route, frame is not None
+        self.use_plan, self.cip = plan is not None, cip
+        self.nodes = self.nodes_of(route, self.use_frame, self.use_plan, cip)
+        self.evaluated = []
+
+    @classmethod
+    def nodes_of(cls, route="cio", frame=False, plan=False, cip="matrix"):
+        """ 計算経路のノード
+
+        :param  string route: GAST の計算経路
+        :param  bool   frame: frame キャッシュを使用するか
+        :param  bool    plan: 章動の計画を使用するか
+        :param  string   cip: CIP 座標の計算方法
+        :return dict        : {ノード名: (依存ノード, 計算関数)}
+        """
+        try:
+            if route not in cls.ROUTES:
+                raise ValueError("Unknown route: {}".format(route))
+            if cip not in cls.CIPS:
+                raise ValueError("Unknown CIP method: {}".format(cip))
+            nodes = dict(cls.NODES, **cls.ROUTES[route])
+            nodes.update(cls.CIPS[cip])
+            nodes.update(cls.FRAME if frame else {})
+            nodes.update(cls.PLAN[route] if plan else {})
+            return nodes
+        except Exception as e:
+            raise
+
+    @classmethod
+    def stages(cls, names, route="cio", frame=False, plan=False, cip="matrix"):
+        """ 指定の量の計算に必要なノード(評価順)
+
+        :param  list  names: 要求する量の名前
+        :param  string route: GAST の計算経路
+        :param  bool   frame: frame キャッシュを使用するか
+        :param  bool    plan: 章動の計画を使用するか
+        :param  string   cip: CIP 座標の計算方法
+        :return list       : ノード名(依存先が先)
+        """
+        try:
+            nodes = cls.nodes_of(route, frame, plan, cip)
+            order = []
+            def visit(name):
+                if name in cls.INPUTS or name in order:
+                    return
+                if name not in nodes:
+                    raise KeyError("Unknown quantity: {}".format(name))
+                for dep in nodes[name][0]:
+                    visit(dep)
+                order.append(name)
+            for name in names:
+                visit(name)
+            return order
+        except Exception as e:
+            raise
+
+    def get(self, name):
+        """ ノードの値の取得(未評価なら依存ノードを含めて評価)
+            * 配列入力の場合は、エポック軸の np.ndarray
+
+        :param  string name: ノード名
+        :return            : ノードの値
+        """
+        try:
+            if name in self.cache:
+                return self.cache[name]
+            for node in self.stages(
+                [name], self.route, self.use_frame, self.use_plan, self.cip
+            ):
+                if node in self.cache:
+                    continue
+                deps, func = self.nodes[node]
+                args = [self.cache[dep] for dep in deps]
+                self.cache[node] = func(*args)
+                self.evaluated.append(node)
+            return self.cache[name]
+        except Exception as e:
+            raise
+
+    def calc(self, names):
+        """ 指定の量のみを計算
+
+        :param  list names: 要求する量の名前
+        :return dict      : {名前: 値}
+                            (配列入力の場合、値は np.ndarray)
+        """
+        try:
+            res = {}
+            for name in names:
+                res[name] = self.get(name)
+            return res
+        except Exception as e:
+            raise
+
+
+def calc(tt, names, backend=None, route="cio", frame=None, plan=None,
+         cip="matrix", dt=None):
+    """ 指定の量のみを計算(単一エポック、またはエポック配列)
+
+    :param  datetime/list/np.ndarray tt: 地球時
+    :param  list       names: 要求する量の名前(例: ["era", "gmst"])
+    :param  string   backend: 級数計算のバックエンド(None なら既定)
+    :param  string     route: GAST の計算経路("cio", "equinox")
+    :param  FrameCache frame: frame キャッシュ(None なら不使用)
+    :param  NutationPlan plan: 章動の計画(None なら全項を計算)
+    :param  string       cip: CIP 座標の計算方法("matrix", "xy06")
+    :param  float/np.ndarray dt: ΔT (None なら地球時から計算)
+    :return dict            : {名前: 値}
+    """
+    try:
+        return Pipeline(tt, backend, route, frame, plan, cip, dt).calc(names)
+    except Exception as e:
+        raise
+
+def check_cip(tt, backend=None):
+    """ CIP 座標の計算方法(matrix, xy06)の比較
+
+    :param  np.ndarray tt: 地球時(datetime64 配列)
+    :param  string backend: 級数計算のバックエンド(None なら既定)
+    :return dict         : {"x", "y", "s": 最大偏差} (Unit: rad)
+    """
+    try:
+        names = ["x", "y", "s"]
+        mtx = calc(tt, names, backend, cip="matrix")
+        xy = calc(tt, names, backend, cip="xy06")
+        return {name: float(np.abs(xy[name] - mtx[name]).max()) for name in names}
+    except Exception as e:
+        raise
@@ -0,0 +1,182 @@
+"""
+Module for the time polynomials (coefficient registry)
+  * パッケージ内の時間 t の多項式(歳差角, 平均黄道傾斜角, GMST, 基本引数,
+    ΔT の各区間)の係数を1か所の表にまとめる
+  * calc     : 1つの多項式の計算(Horner 法, 従来の手書きの式と同じ演算順序)
+  * calc_rate: 1つの多項式の時間微分(Unit: rad/century)
+
+  単位(UNITS)
+    - as_turn : 秒角 -> 1周(TURNAS)の剰余 -> rad
+    - rad_turn: rad -> 2pi の剰余
+    - as      : 秒角 -> rad
+    - rad     : rad(変換なし)
+"""
+import numpy as np
+from lib import const as cst
+
+# 多項式の表 {名前: (単位, [c_0, c_1, ...])} (t はユリウス世紀数(TT))
+POLYS = {
+    # Precession angles, IAU 2006 (Fukushima-Williams 4-angle formulation)
+    "gam_b": ("as", [-0.052928, 10.556378, 0.4932044, -0.00031238,
+                     -0.000002788, 0.0000000260]),
+    "phi_b": ("as", [84381.412819, -46.811016, 0.0511268, 0.00053289,
+                     -0.000000440, -0.0000000176]),
+    "psi_b": ("as", [-0.041775, 5038.481484, 1.5584175, -0.00018522,
+                     -0.000026452, -0.0000000148]),
+    # Mean obliquity of the ecliptic, IAU 2006
+    "eps_a": ("as", [84381.406, -46.836769, -0.0001831, 0.00200340,
+                     -0.000000576, -0.0000000434]),
+    # GMST - ERA, IAU 2006
+    "gmst":  ("as", [0.014506, 4612.156534, 1.3915817, -0.00000044,
+                     -0.000029956, -0.0000000368]),
+    # TIO locator s', IERS 2003
+    "sp":    ("as", [0.0, -0.000047]),
+    # Fundamental arguments (IERS 2003)
+    "l_iers2003":  ("as_turn", [485868.249036, 1717915923.2178, 31.8792,
+                                0.051635, -0.00024470]),
+    "p_iers2003":  ("as_turn", [1287104.793048, 129596581.0481, -0.5532,
+                                0.000136, -0.00001149]),
+    "f_iers2003":  ("as_turn", [335779.526232, 1739527262.8478, -12.7512,
+                                -0.001037, 0.00000417]),
+    "d_iers2003":  ("as_turn", [1072260.703692, 1602961601.2090, -6.3706,
+                                0.006593, -0.00003169]),
+    "om_iers2003": ("as_turn", [450160.398036, -6962890.5431, 7.4722,
+                                0.007702, -0.00005939]),
+    "me_iers2003": ("rad_turn", [4.402608842, 2608.7903141574]),
+    "ve_iers2003": ("rad_turn", [3.176146697, 1021.3285546211]),
+    "ea_iers2003": ("rad_turn", [1.753470314, 628.3075849991]),
+    "ma_iers2003": ("rad_turn", [6.203480913, 334.0612426700]),
+    "ju_iers2003": ("rad_turn", [0.599546497, 52.9690962641]),
+    "sa_iers2003": ("rad_turn", [0.874016757, 21.3299104960]),
+    "ur_iers2003": ("rad_turn", [5.481293872, 7.4781598567]),
+    "ne_iers2003": ("rad_turn", [5.311886287, 3.8133035638]),
+    "pa_iers2003": ("rad", [0.0, 0.024381750, 0.00000538691]),
+    # Fundamental arguments (MHB2000)
+    "lp_mhb2000":  ("as_turn", [1287104.79305, 129596581.0481, -0.5532,
+                                0.000136, -0.00001149]),
+    "d_mhb2000":   ("as_turn", [1072260.70369, 1602961601.2090, -6.3706,
+                                0.006593, -0.00003169]),
+    "l_mhb2000":   ("rad_turn", [2.35555598, 8328.6914269554]),
+    "f_mhb2000":   ("rad_turn", [1.627905234, 8433.466158131]),
+    "d_mhb2000_2": ("rad_turn", [5.198466741, 7771.3771468121]),
+    "om_mhb2000":  ("rad_turn", [2.18243920, -33.757045]),
+    "ne_mhb2000":  ("rad_turn", [5.321159000, 3.8127774000]),
+}
+# ΔT の多項式 {名前: (t の原点(年), t の単位(年), [c_0, c_1, ...])}
+#   * t = (y - 原点) / 単位 (y は年 + (月 - 0.5) / 12)
+DT_POLYS = {
+    "long":      (1820, 100, [-20, 0, 32]),
+    "m500_500":  (   0, 100, [10583.6, -1014.41, 33.78311, -5.952053,
+                              -0.1798452, 0.022174192, 0.0090316521]),
+    "500_1600":  (1000, 100, [1574.2, -556.01, 71.23472, 0.319781,
+                              -0.8503463, -0.005050998, 0.0083572073]),
+    "1600_1700": (1600, 1, [120, -0.9808, -0.01532, 1.0 / 7129]),
+    "1700_1800": (1700, 1, [8.83, 0.1603, -0.0059285, 0.00013336,
+                            -1.0 / 1174000]),
+    "1800_1860": (1800, 1, [13.72, -0.332447, 0.0068612, 0.0041116,
+                            -0.00037436, 0.0000121272, -0.0000001699,
+                            0.000000000875]),
+    "1860_1900": (1860, 1, [7.62, 0.5737, -0.251754, 0.01680668,
+                            -0.0004473624, 1.0 / 233174]),
+    "1900_1920": (1900, 1, [-2.79, 1.494119, -0.0598939, 0.0061966,
+                            -0.000197]),
+    "1920_1941": (1920, 1, [21.20, 0.84493, -0.076100, 0.0020936]),
+    "1941_1961": (1950, 1, [29.07, 0.407, -1.0 / 233, 1.0 / 2547]),
+    "1961_1986": (1975, 1, [45.45, 1.067, -1.0 / 260, -1.0 / 718]),
+    "1986_2005": (2000, 1, [63.86, 0.3345, -0.060374, 0.0017275,
+                            0.000651814, 0.00002373599]),
+    "2005_2050": (2000, 1, [62.92, 0.32217, 0.005589]),
+}
+
+
+def calc(name, t):
+    """ 1つの多項式の計算(Horner 法)
+
+    :param  string              name: 多項式の名前(POLYS)
+    :param  float/np.ndarray       t: Julian Century Number
+    :return float/np.ndarray        : 値 (Unit: rad)
+    """
+    try:
+        unit, c = POLYS[name]
+        v = c[-1]
+        for c_k in reversed(c[:-1]):
+            v = c_k + v * t
+        return _convert(v, unit)
+    except Exception as e:
+        raise
+
+def calc_rate(name, t):
+    """ 1つの多項式の時間微分(剰余はとらない)
+
+    :param  string              name: 多項式の名前(POLYS)
+    :param  float/np.ndarray       t: Julian Century Number
+    :return float/np.ndarray        : 値 (Unit: rad/century)
+    """
+    try:
+        d = rate_coef(name)
+        v = d[-1]
+        for d_k in reversed(d[:-1]):
+            v = d_k + v * t
+        return v
+    except Exception as e:
+        raise
+
+def rate_coef(name):
+    """ 時間微分の多項式の係数
+
+    :param  string name: 多項式の名前(POLYS)
+    :return list       : [d_0, d_1, ...] (Unit: rad/century)
+    """
+    try:
+        unit, c = POLYS[name]
+        scale = cst.AS2R if unit in ("as", "as_turn") else 1.0
+        return [k * c_k * scale for k, c_k in enumerate(c)][1:] or [0.0]
+    except Exception as e:
+        raise
+
+def rad_coef(name, n=None):
+    """ 多項式の係数(Unit: rad; 剰余はとらない)
+
+    :param  string name: 多項式の名前(POLYS)
+    :param  int       n: 係数の数(不足分は 0 で埋める; None ならそのまま)
+    :return list       : [c_0, c_1, ...] (Unit: rad)
+    """
+    try:
+        unit, c = POLYS[name]
+        scale = cst.AS2R if unit in ("as", "as_turn") else 1.0
+        c = [c_k * scale for c_k in c]
+        return c + [0.0] * ((n or len(c)) - len(c))
+    except Exception as e:
+        raise
+
+def calc_dt(name, y):
+    """ ΔT の1区間の多項式の計算(Horner 法)
+
+    :param  string         name: 区間の名前(DT_POLYS)
+    :param  float/np.ndarray  y: 年(年 + (月 - 0.5) / 12)
+    :return float/np.ndarray   : ΔT (Unit: s)
+    """
+    try:
+        y_0, scale, c = DT_POLYS[name]
+        t = (y - y_0) / scale if scale != 1 else y - y_0
+        v = c[-1]
+        for c_k in reversed(c[:-1]):
+            v = c_k + v * t
+        return v
+    except Exception as e:
+        raise
+
+def _convert(v, unit):
+    """ 単位の変換・剰余
+
+    :param  float/np.ndarray v: 多項式の値
+    :param  string         unit: 単位
+    :return float/np.ndarray   : 値 (Unit: rad)
+    """
+    if unit == "as_turn":
+        return (v % cst.TURNAS) * cst.AS2R
+    if unit == "rad_turn":
+        return v % cst.PI2
+    if unit == "as":
+        return v * cst.AS2R
+    return v
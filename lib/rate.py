@@ -0,0 +1,212 @@
+"""
+Class for the time derivatives (rates) of
+  ERA, GMST, GAST, EE (Unit: rad/s, 地球時の SI 秒あたり)
+  * 追尾制御などで、GAST とその変化率から短時間の外挿をするために使用
+    GAST(t + dt) = GAST(t) + d(GAST)/dt * dt
+  * 差分ではなく、各式の解析的な微分
+    - ERA : 定数 (2pi * 1.00273781191135448 / 86400)
+    - GMST: ERA の変化率 + 時間の多項式の微分
+    - EE  : d(Δψ)/dt・cos(ε_A) - Δψ・sin(ε_A)・d(ε_A)/dt + 補正項の微分
+            (Δψ の変化率は、章動の級数を項毎に微分)
+    - GAST: GMST の変化率 + EE の変化率(計算経路によらず同じ)
+  * ΔT は月毎に一定(time.calc_dt)のため、d(UT1)/d(TT) = 1 とする
+  * 多項式の微分の係数は polynomial.rate_coef から取得
+  * 基本引数の変化率は時間の1次まで(2次以上の寄与は 1e-20 rad/s 未満)
+"""
+import numpy as np
+from lib import backend  as lbk
+from lib import const    as cst
+from lib import equinox  as leq
+from lib import nutation as lnt
+from lib import polynomial as lpo
+
+# ユリウス世紀あたりの秒数
+JC_SEC = cst.JC * cst.DAYSEC
+# ERA の変化率(Unit: rad/s)
+ERA_RATE = cst.PI2 * 1.00273781191135448 / cst.DAYSEC
+
+
+def _fa_rate(names):
+    """ 基本引数の変化率の係数(Unit: rad/century; [定数項, t の係数]) """
+    return [(lpo.rate_coef(name) + [0.0])[:2] for name in names]
+
+# 基本引数の変化率の係数
+#   * 日月章動(l, l', F, D, Om)
+FA_LS = _fa_rate(
+    ["l_iers2003", "lp_mhb2000", "f_iers2003", "d_mhb2000", "om_iers2003"]
+)
+#   * 惑星章動(l, -, F, D, Om, Me, Ve, Ea, Ma, Ju, Sa, Ur, Ne, pA)
+FA_PL = _fa_rate(["l_mhb2000"]) + [[0.0, 0.0]] + _fa_rate([
+    "f_mhb2000", "d_mhb2000_2", "om_mhb2000", "me_iers2003", "ve_iers2003",
+    "ea_iers2003", "ma_iers2003", "ju_iers2003", "sa_iers2003", "ur_iers2003",
+    "ne_mhb2000", "pa_iers2003"
+])
+#   * 分点均差の補正項(l, l', F, D, Om, Ve, Ea, pA)
+FA_EE = _fa_rate([
+    "l_iers2003", "p_iers2003", "f_iers2003", "d_iers2003", "om_iers2003",
+    "ve_iers2003", "ea_iers2003", "pa_iers2003"
+])
+
+
+class Rate:
+    # 級数の微分の係数 {名前: [(乗数, t^0 の振幅, t^1 の振幅)]}
+    # (初回使用時に生成)
+    TERMS = None
+
+    def __init__(self, t, backend=None):
+        """ Initialization
+
+        :param float/np.ndarray t: Julian Century Number (TT, または配列)
+        :param string     backend: 級数計算のバックエンド名(None なら既定)
+        """
+        self.t = t
+        self.backend = lbk.get(backend)
+
+    def era_rate(self):
+        """ ERA の変化率
+
+        :return float: d(ERA)/dt (Unit: rad/s)
+        """
+        try:
+            return ERA_RATE + np.zeros_like(self.t) if np.ndim(self.t) else ERA_RATE
+        except Exception as e:
+            raise
+
+    def gmst_rate(self):
+        """ GMST の変化率(IAU 2006 の多項式の微分)
+
+        :return float: d(GMST)/dt (Unit: rad/s)
+        """
+        try:
+            return ERA_RATE + lpo.calc_rate("gmst", self.t) / JC_SEC
+        except Exception as e:
+            raise
+
+    def eps_a_rate(self):
+        """ 平均黄道傾斜角の変化率(IAU 2006 の多項式の微分)
+
+        :return float: d(ε_A)/dt (Unit: rad/s)
+        """
+        try:
+            return lpo.calc_rate("eps_a", self.t) / JC_SEC
+        except Exception as e:
+            raise
+
+    def d_psi_rate(self, d_psi, harm=None):
+        """ 黄経の章動の変化率(IAU 2000A, IAU 2006 への補正込み)
+
+        :param  float     d_psi: Nutation in longitude (補正込み)
+        :param  Harmonics  harm: 共有の引数の sin, cos (None なら backend で計算)
+        :return float          : d(Δψ)/dt (Unit: rad/s)
+        """
+        try:
+            fj2 = -2.7774e-6 * self.t
+            rate = (self.__series("ls", harm) + self.__series("pl", harm)) * cst.U2R
+            # d_psi = d_psi_0 * (1 + 0.4697e-6 + fj2) の微分
+            d_psi_0 = d_psi / (1.0 + 0.4697e-6 + fj2)
+            rate = rate * (1.0 + 0.4697e-6 + fj2) + d_psi_0 * -2.7774e-6
+            return rate / JC_SEC
+        except Exception as e:
+            raise
+
+    def ee_rate(self, eps_a, d_psi, harm=None):
+        """ EE の変化率
+
+        :param  float     eps_a: Mean obliquity of the ecliptic
+        :param  float     d_psi: Nutation in longitude
+        :param  Harmonics  harm: 共有の引数の sin, cos (None なら backend で計算)
+        :return float          : d(EE)/dt (Unit: rad/s)
+        """
+        try:
+            return self.d_psi_rate(d_psi, harm) * np.cos(eps_a) \
+                 - d_psi * np.sin(eps_a) * self.eps_a_rate() \
+                 + self.__series("ee", harm) * cst.AS2R / JC_SEC
+        except Exception as e:
+            raise
+
+    def __series(self, name, harm=None):
+        """ 級数の微分(Unit: 級数の単位/century)
+            * 各項 a・sin(arg) + b・cos(arg) の微分は
+              (a・cos(arg) - b・sin(arg))・d(arg)/dt で、
+              d(arg)/dt = W_0 + W_1・t (W = 乗数 x 基本引数の変化率)
+
+        :param  string      name: "ls"(日月章動), "pl"(惑星章動), "ee"(EE の補正項)
+        :param  Harmonics   harm: 共有の引数の sin, cos (None なら backend で計算)
+        :return float           : 級数の微分
+        """
+        try:
+            mult, amp_0, amp_1 = self.__terms()[name]
+            if harm is not None:
+                names = ["ee_0", "ee_1"] if name == "ee" else name
+                return harm.series(names, amp_0) + harm.series(names, amp_1) * self.t
+            fas = self.__fas(name)
+            return self.backend.series(fas, mult, amp_0) \
+                 + self.backend.series(fas, mult, amp_1) * self.t
+        except Exception as e:
+            raise
+
+    def __fas(self, name):
+        """ 級数の基本引数
+
+        :param  string name: "ls", "pl", "ee"
+        :return list       : 基本引数
+        """
+        try:
+            return {
+                "ls": lnt.Nutation.fa_ls,
+                "pl": lnt.Nutation.fa_pl,
+                "ee": leq.Equinox.fa_ee,
+            }[name](self.t)
+        except Exception as e:
+            raise
+
+    def __terms(self):
+        """ 級数の微分の係数を配列化
+
+        :return dict: {名前: (乗数, t^0 の振幅, t^1 の振幅)} (各 np.ndarray)
+        """
+        try:
+            if Rate.TERMS is not None:
+                return Rate.TERMS
+            nut = lnt.Nutation(0.0)
+            terms = {}
+            # 日月章動: (A + A't)・sin + A''・cos
+            dat = nut.dat_ls
+            mult = dat[:, :5]
+            w = mult @ np.array(FA_LS)
+            a, a_t, a_c = dat[:, 5], dat[:, 6], dat[:, 7]
+            terms["ls"] = (
+                mult,
+                np.column_stack([a_t - a_c * w[:, 0], a * w[:, 0]]),
+                np.column_stack([-a_c * w[:, 1], a * w[:, 1] + a_t * w[:, 0]]),
+            )
+            # 惑星章動: A・sin + A''・cos
+            dat = nut.dat_pl
+            mult = dat[:, :14]
+            w = mult @ np.array(FA_PL)
+            a, a_c = dat[:, 14], dat[:, 15]
+            terms["pl"] = (
+                mult,
+                np.column_stack([-a_c * w[:, 0], a * w[:, 0]]),
+                np.column_stack([-a_c * w[:, 1], a * w[:, 1]]),
+            )
+            # EE の補正項: sum_0 + sum_1・t
+            (m_0, e_0), (m_1, e_1) = leq.Equinox.terms()
+            mult = np.vstack([m_0, m_1])
+            w = mult @ np.array(FA_EE)
+            a = np.vstack([e_0, np.zeros_like(e_1)])
+            a_t = np.vstack([np.zeros_like(e_0), e_1])
+            terms["ee"] = (
+                mult,
+                np.column_stack([
+                    a_t[:, 0] - a[:, 1] * w[:, 0], a_t[:, 1] + a[:, 0] * w[:, 0]
+                ]),
+                np.column_stack([
+                    -a[:, 1] * w[:, 1] - a_t[:, 1] * w[:, 0],
+                    a[:, 0] * w[:, 1] + a_t[:, 0] * w[:, 0]
+                ]),
+            )
+            Rate.TERMS = terms
+            return terms
+        except Exception as e:
+            raise
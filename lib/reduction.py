@@ -0,0 +1,206 @@
+"""
+Class for the span-adaptive reduction of the nutation series
+  * 短い時間範囲(一晩、1週間等)では、章動の多くの項(18.6 年の昇交点の項、
+    惑星章動の長周期の項等)の周期は範囲よりはるかに長い
+  * NutationPlan は、時間範囲 [t_0, t_1] を指定して1度だけ生成する計画で、
+    - 範囲内で低次の多項式で十分に近似できる項(長周期の項)の和を、
+      Chebyshev 点で補間した多項式(deg 次)にまとめる
+    - 残りの項(短周期の項)のみをエポック毎に級数で計算する
+  * 項の選択と誤差の上限
+    - 項 A・sin(w・t + p) の deg 次の補間の誤差は、
+      |A|・(w・h)^(deg+1) / (2^deg・(deg+1)!) 以下(h は範囲の半分の幅)
+      (t に比例する振幅の項は、積の (deg+1) 階微分で評価)
+    - 誤差の上限の小さい項から順に、上限の合計が tol 以下の範囲でまとめる
+      補間は線形のため、まとめた項全体の誤差は各項の上限の合計以下
+    - 周波数 w は範囲の両端での基本引数の変化率による(大きい方)
+  * 丸め誤差の上限(全項の計算との比較のため、計画と全項の計算の両方の分)
+    - 各項の振幅 |A| の合計 x (項数 + 引数の大きさ) x 機械イプシロン
+      (級数の和の丸め: 項数 x eps x |A|、引数の丸め: |A| x eps x |引数|)
+    - 誤差の上限(bound)は、補間の誤差の上限(tol 以下)と丸め誤差の上限の和
+  * 範囲外のエポックでは誤差の上限が成り立たないため、計算しない(ValueError)
+  * 誤差の上限は check で、全項の計算(Nutation.calc_nut_06_a)と比較して確認
+"""
+import math
+from datetime import datetime
+import numpy as np
+from lib import backend    as lbk
+from lib import const      as cst
+from lib import nutation   as lnt
+from lib import polynomial as lpo
+from lib import time       as ltm
+
+# 既定の多項式の次数
+DEG = 8
+# 既定の誤差の上限(Unit: rad; 0.02 マイクロ秒角程度)
+TOL = 1.0e-13
+# P03 の補正の倍率の上限(1 + 0.4697e-6 + |fj2|)
+P03_MARGIN = 1.0 + 1.0e-5
+# 機械イプシロン
+EPS = np.finfo(np.float64).eps
+
+
+class NutationPlan:
+    def __init__(self, tt_0, tt_1, tol=TOL, deg=DEG, backend=None):
+        """ Initialization(項の選択と長周期の項の補間)
+
+        :param datetime/np.datetime64/float tt_0: 範囲の開始(地球時、
+                                                  または Julian Century Number)
+        :param datetime/np.datetime64/float tt_1: 範囲の終了(同上)
+        :param float     tol: 章動(Δψ, Δε 各々)の誤差の上限 (Unit: rad)
+        :param int       deg: 長周期の項の多項式の次数
+        :param string backend: 短周期の項の級数計算のバックエンド名(None なら既定)
+        """
+        self.t_0, self.t_1 = self.__jc(tt_0), self.__jc(tt_1)
+        if not self.t_1 > self.t_0:
+            raise ValueError("Empty interval: {} - {}".format(tt_0, tt_1))
+        self.tol, self.deg = tol, deg
+        self.backend = lbk.get(backend)
+        nut = lnt.Nutation(0.0)
+        self.n_terms = len(nut.dat_ls) + len(nut.dat_pl)
+        self.trunc, self.rounding = [0.0, 0.0], [0.0, 0.0]
+        keep_ls = self.__select(nut.dat_ls, lnt.FA_LS, [[5, 7], [6]], [[8, 10], [9]])
+        keep_pl = self.__select(nut.dat_pl, lnt.FA_PL, [[14, 15], []], [[16, 17], []])
+        # 誤差の上限(Δψ, Δε; 補間の誤差の上限 + 丸め誤差の上限)
+        self.bound = [float(a + b) for a, b in zip(self.trunc, self.rounding)]
+        self.dat_ls, self.dat_pl = nut.dat_ls[keep_ls], nut.dat_pl[keep_pl]
+        # 長周期の項の和(P03 の補正前, Unit: 0.1 micro arcsecond)を
+        # Chebyshev 点で補間
+        #   * 多項式の変数は u = (t - 中央) / 半幅 (t - 中央 は丸め誤差なし)
+        #   * 丸めた t の点での値を、その点の u で補間する
+        #     (t の丸め(相対 1e-12 程度)による u のずれを係数に持ち込まない)
+        self.t_mid, self.h = (self.t_0 + self.t_1) / 2.0, (self.t_1 - self.t_0) / 2.0
+        t_n = self.t_mid + np.polynomial.chebyshev.chebpts1(deg + 1) * self.h
+        val = self.__series(t_n, nut.dat_ls[~keep_ls], nut.dat_pl[~keep_pl])
+        vander = np.polynomial.chebyshev.chebvander((t_n - self.t_mid) / self.h, deg)
+        self.coef = [np.linalg.solve(vander, np.asarray(v)) for v in val]
+
+    @property
+    def kept(self):
+        """ エポック毎に計算する項の数
+
+        :return int: 項数
+        """
+        return len(self.dat_ls) + len(self.dat_pl)
+
+    def calc_nut_06_a(self, t):
+        """ IAU 2006/2000A nutation (長周期の項は多項式で近似)
+
+        :param  float/np.ndarray t: Julian Century Number (範囲内)
+        :return list              : [delta Psi, delta Eps] (Unit: rad)
+        """
+        try:
+            # 範囲の端の判定は、地球時からの変換の丸め分を許容
+            t_a = np.asarray(t, dtype="float64")
+            eps = 1.0e-9 * self.h
+            if np.any(t_a < self.t_0 - eps) or np.any(t_a > self.t_1 + eps):
+                raise ValueError("Epoch outside the planned interval")
+            dp, de = self.__series(t, self.dat_ls, self.dat_pl)
+            u = (t_a - self.t_mid) / self.h
+            dp = (dp + np.polynomial.chebyshev.chebval(u, self.coef[0])) * cst.U2R
+            de = (de + np.polynomial.chebyshev.chebval(u, self.coef[1])) * cst.U2R
+            if not np.ndim(t):
+                dp, de = float(dp), float(de)
+            return lnt.Nutation.p03(t, dp, de)
+        except Exception as e:
+            raise
+
+    def check(self, n=2001):
+        """ 全項の計算(Nutation.calc_nut_06_a)との比較
+            * 範囲内の等間隔の n 点(両端を含む)
+
+        :param  int n: 比較するエポック数
+        :return dict : {"d_psi": 最大偏差, "d_eps": 最大偏差,
+                        "bound": [Δψ, Δε の誤差の上限]} (Unit: rad)
+        """
+        try:
+            t = np.linspace(self.t_0, self.t_1, n)
+            ref = lnt.Nutation(t, "python", "sincos").calc_nut_06_a()
+            val = self.calc_nut_06_a(t)
+            res = {
+                name: float(np.abs(v - r).max())
+                for name, v, r in zip(["d_psi", "d_eps"], val, ref)
+            }
+            res["bound"] = [float(v) for v in self.bound]
+            return res
+        except Exception as e:
+            raise
+
+    def __select(self, dat, names, cols_psi, cols_eps):
+        """ エポック毎に計算する項の選択(残りの項は多項式にまとめる)
+            * 誤差の上限の小さい項から、合計が tol 以下の範囲でまとめる
+              (self.trunc に、まとめた項の誤差の上限の合計を加える)
+            * self.rounding に、全ての項の丸め誤差の上限を加える
+
+        :param  np.ndarray    dat: 係数表
+        :param  list        names: 基本引数の名前(乗数の列の順, None は未使用)
+        :param  list     cols_psi: Δψ の振幅の列 [[定数の振幅], [t に比例する振幅]]
+        :param  list     cols_eps: Δε の振幅の列(同上)
+        :return np.ndarray       : エポック毎に計算する項か (bool)
+        """
+        try:
+            mult = dat[:, :len(names)]
+            rates = [
+                np.array([lpo.calc_rate(name, t) if name else 0.0 for name in names])
+                for t in (self.t_0, self.t_1)
+            ]
+            w = np.max([np.abs(mult @ r) for r in rates], axis=0)
+            h, d = (self.t_1 - self.t_0) / 2.0, self.deg
+            t_max = max(abs(self.t_0), abs(self.t_1))
+            scale = h ** (d + 1) / (2.0 ** d * math.factorial(d + 1))
+            # 引数の大きさの上限(剰余前の基本引数: 2pi + |変化率|・|t|)
+            arg = np.abs(mult) @ (2.0 * np.pi + np.max(np.abs(rates), axis=0) * t_max)
+            err = []
+            for j, (const, linear) in enumerate((cols_psi, cols_eps)):
+                a = np.abs(dat[:, const]).sum(axis=1)
+                b = np.abs(dat[:, linear]).sum(axis=1) if linear else 0.0
+                # (d+1) 階微分の上限: (a + b・|t|)・w^(d+1) + b・(d+1)・w^d
+                err.append(
+                    ((a + b * t_max) * w ** (d + 1) + b * (d + 1) * w ** d)
+                    * scale * cst.U2R * P03_MARGIN
+                )
+                # 丸め誤差の上限(計画と全項の計算の2回分)
+                self.rounding[j] += float(
+                    2.0 * EPS * ((a + b * t_max) * (self.n_terms + 2 + arg)).sum()
+                    * cst.U2R * P03_MARGIN
+                )
+            err = np.array(err)
+            room = [self.tol - self.trunc[0], self.tol - self.trunc[1]]
+            keep = np.ones(len(dat), dtype=bool)
+            for i in np.argsort(err.max(axis=0), kind="stable"):
+                if err[0, i] > room[0] or err[1, i] > room[1]:
+                    break
+                room[0] -= err[0, i]
+                room[1] -= err[1, i]
+                keep[i] = False
+            self.trunc = [float(self.tol - room[0]), float(self.tol - room[1])]
+            return keep
+        except Exception as e:
+            raise
+
+    def __series(self, t, dat_ls, dat_pl):
+        """ 指定の項のみの級数(P03 の補正前)
+
+        :param  float/np.ndarray t: Julian Century Number
+        :param  np.ndarray  dat_ls: 日月章動の係数表(選択した項)
+        :param  np.ndarray  dat_pl: 惑星章動の係数表(選択した項)
+        :return list              : [dpsi, deps] (Unit: 0.1 micro arcsecond)
+        """
+        try:
+            res = [0.0, 0.0]
+            if len(dat_ls):
+                dp, de = self.backend.lunisolar(t, lnt.Nutation.fa_ls(t), dat_ls)
+                res = [res[0] + dp, res[1] + de]
+            if len(dat_pl):
+                dp, de = self.backend.planetary(lnt.Nutation.fa_pl(t), dat_pl)
+                res = [res[0] + dp, res[1] + de]
+            return res
+        except Exception as e:
+            raise
+
+    @staticmethod
+    def __jc(tt):
+        """ 地球時(datetime, datetime64)、または Julian Century Number -> float """
+        if isinstance(tt, (datetime, np.datetime64)):
+            tt = np.array([np.datetime64(tt, "us")])
+            return float(ltm.calc_jc(ltm.calc_jd(tt))[0])
+        return float(tt)
@@ -0,0 +1,115 @@
+"""
+Class for the compact result container
+  * 計算結果を1つの NumPy 構造化配列(エポック x 選択した列)に格納する
+  * 列は呼び出し側が選択し、選択した列のみを確保する
+    (r_mtx 等の中間値は要求した場合のみ; r_mtx は1行あたり float64 x 9)
+  * 列の型: ut1 は datetime64[us]、r_mtx, c2i, c2t は (3, 3) の float64、
+    それ以外は float64
+  * 列は属性(res.gast)、または添字(res["gast"])で参照(構造化配列のビュー)
+"""
+import numpy as np
+
+# 列の型(指定の無い列は float64)
+DTYPES = {
+    "ut1":   ("datetime64[us]",),
+    "r_mtx": ("float64", (3, 3)),
+    "c2i":   ("float64", (3, 3)),
+    "c2t":   ("float64", (3, 3)),
+}
+
+
+def dtype_of(names):
+    """ 列の構造化配列の型
+
+    :param  list names: 列名
+    :return np.dtype  : 型
+    """
+    try:
+        return np.dtype([(name,) + DTYPES.get(name, ("float64",)) for name in names])
+    except Exception as e:
+        raise
+
+
+class Result:
+    __slots__ = ("data",)
+
+    def __init__(self, names, size):
+        """ Initialization(選択した列のみを確保)
+
+        :param list names: 列名
+        :param int   size: エポック数
+        """
+        self.data = np.empty(size, dtype=dtype_of(names))
+
+    @classmethod
+    def from_dict(cls, res, names=None):
+        """ 計算結果({名前: 値})からの生成
+
+        :param  dict   res: 計算結果(単一エポック、または配列)
+        :param  list names: 格納する列名(None なら全て)
+        :return Result    : 結果
+        """
+        try:
+            names = list(res) if names is None else names
+            v = res[names[0]]
+            shape = DTYPES.get(names[0], ("float64", ()))[1:]
+            size = 1 if np.ndim(v) == len(shape[0] if shape else ()) else len(v)
+            obj = cls(names, size)
+            for name in names:
+                obj.data[name] = res[name]
+            return obj
+        except Exception as e:
+            raise
+
+    @property
+    def names(self):
+        """ 列名
+
+        :return tuple: 列名
+        """
+        return self.data.dtype.names
+
+    @property
+    def nbytes(self):
+        """ 確保した大きさ
+
+        :return int: バイト数
+        """
+        return self.data.nbytes
+
+    def item(self, name, i=0):
+        """ 1エポックの値(float, datetime、行列は (3, 3) の np.ndarray)
+
+        :param  string name: 列名
+        :param  int       i: エポックの番号
+        :return            : 値
+        """
+        try:
+            v = self.data[name][i]
+            return v if np.ndim(v) else v.item()
+        except Exception as e:
+            raise
+
+    def to_dict(self):
+        """ 列毎の配列
+
+        :return dict: {名前: np.ndarray (ビュー)}
+        """
+        try:
+            return {name: self.data[name] for name in self.names}
+        except Exception as e:
+            raise
+
+    def __getattr__(self, name):
+        if name != "data" and name in self.data.dtype.names:
+            return self.data[name]
+        raise AttributeError(name)
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return "Result({} epochs, columns={})".format(len(self), list(self.names))
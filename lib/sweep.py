@@ -0,0 +1,260 @@
+"""
+Module for the checkpointable, shardable sweeps
+  * 時間範囲 [start, end) を一定間隔(step)で計算する長時間のジョブを、
+    決まった境界のシャードに分割して実行する
+    - plan  : シャードの境界などをマニフェスト(manifest.json)に書き出す
+    - run   : 未完了のシャードを計算(複数のノードで worker/workers を分けて実行可)
+    - status: 完了/未完了のシャード
+    - merge : 全シャードの結果を1つの出力ファイルに結合
+  * シャード毎に、結果(列毎の .npy)を書き終えてから完了マーカー
+    (shard_NNNNNN.done, 各列の SHA-256、マニフェストの SHA-256)を書き出す
+    中断したシャードはマーカーが無いため、再実行時に最初から計算し直す
+  * plan でマニフェストを書き直した場合、マーカーのマニフェストの SHA-256 が
+    一致しないシャードは未完了として扱い、計算し直す(古い結果は使わない)
+  * エポックは start + i * step (マイクロ秒の整数演算)で、シャードの大きさは
+    エンジンの最大バッチサイズの倍数とするため、計算のバッチ分割は
+    通しで計算した場合と同じになり、結果はビット単位で一致する
+"""
+import hashlib
+import json
+import os
+import numpy as np
+from lib import backend  as lbk
+from lib import cache    as lca
+from lib import columnar as lcl
+from lib import engine   as leng
+
+MANIFEST = "manifest.json"
+# 既定のシャードの大きさ(エポック数)
+SHARD_SIZE = 1 << 22
+
+
+def plan(path, start, end, step, names=lcl.NAMES, shard_size=SHARD_SIZE,
+         max_batch=leng.MAX_BATCH, backend=None, route="cio"):
+    """ シャードの分割とマニフェストの書き出し
+
+    :param  string  path: 作業ディレクトリ
+    :param  string start: 開始日時(TT, ISO 8601, 例: "2000-01-01")
+    :param  string   end: 終了日時(TT, この日時を含まない)
+    :param  float   step: 間隔(秒, マイクロ秒単位に丸める)
+    :param  list   names: 出力する列名
+    :param  int shard_size: シャードの大きさ(エポック数, max_batch の倍数に切り上げ)
+    :param  int max_batch: エンジンの最大バッチサイズ
+    :param  string backend: 級数計算のバックエンド名(None なら既定)
+    :param  string   route: GAST の計算経路
+    :return dict         : マニフェスト
+    """
+    try:
+        for name in names:
+            if name not in lcl.COLUMNS:
+                raise ValueError("Not a column quantity: {}".format(name))
+        t_0 = np.datetime64(start, "us")
+        t_1 = np.datetime64(end, "us")
+        step_us = int(round(step * 1.0e6))
+        if step_us <= 0 or t_1 <= t_0:
+            raise ValueError("Empty sweep range")
+        count = -(-int((t_1 - t_0).astype("int64")) // step_us)
+        shard_size = -(-shard_size // max_batch) * max_batch
+        shards = [
+            {"index": i, "first": first, "count": min(shard_size, count - first)}
+            for i, first in enumerate(range(0, count, shard_size))
+        ]
+        manifest = {
+            "version": lca.VERSION,
+            "start": str(t_0), "end": str(t_1), "step_us": step_us,
+            "count": count, "names": list(names),
+            "max_batch": max_batch, "backend": lbk.get(backend).name,
+            "route": route, "shard_size": shard_size, "shards": shards,
+        }
+        os.makedirs(path, exist_ok=True)
+        _write_json(os.path.join(path, MANIFEST), manifest)
+        return manifest
+    except Exception as e:
+        raise
+
+def load(path):
+    """ マニフェストの読み込み
+
+    :param  string path: 作業ディレクトリ
+    :return dict       : マニフェスト
+    """
+    try:
+        with open(os.path.join(path, MANIFEST), "r") as f:
+            return json.load(f)
+    except Exception as e:
+        raise
+
+def epochs(manifest, shard):
+    """ シャードのエポック
+
+    :param  dict manifest: マニフェスト
+    :param  dict    shard: シャード(manifest["shards"] の要素)
+    :return np.ndarray   : 地球時(datetime64[us])
+    """
+    try:
+        i = np.arange(shard["first"], shard["first"] + shard["count"], dtype="int64")
+        return np.datetime64(manifest["start"], "us") \
+             + (i * manifest["step_us"]).astype("timedelta64[us]")
+    except Exception as e:
+        raise
+
+def run_shard(path, index, engine=None):
+    """ 1つのシャードの計算(完了済みなら何もしない)
+
+    :param  string path: 作業ディレクトリ
+    :param  int   index: シャード番号
+    :param  Engine engine: 計算エンジン(None ならマニフェストの設定で生成)
+    :return bool       : 計算したか(完了済みなら False)
+    """
+    try:
+        manifest = load(path)
+        shard = manifest["shards"][index]
+        if _done(path, index, manifest):
+            return False
+        if manifest["version"] != lca.VERSION:
+            raise RuntimeError("Model version differs from the manifest: {}".format(
+                manifest["version"]
+            ))
+        engine = engine if engine is not None else _engine(manifest)
+        names = manifest["names"]
+        writer = lcl.ResultWriter(_shard_path(path, index), names, shard["count"])
+        try:
+            tt = epochs(manifest, shard)
+            chunk = max(lcl.CHUNK // manifest["max_batch"], 1) * manifest["max_batch"]
+            for i in range(0, len(tt), chunk):
+                writer.write(engine.compute(tt[i:i + chunk], names))
+        finally:
+            writer.close()
+        digest = {
+            name: _sha256(lcl.column_path(_shard_path(path, index), name))
+            for name in names
+        }
+        _write_json(_marker(path, index), {
+            "count": shard["count"], "manifest": _digest(manifest), "sha256": digest
+        })
+        return True
+    except Exception as e:
+        raise
+
+def run(path, worker=0, workers=1, engine=None):
+    """ 未完了のシャードの計算
+        * シャード番号 % workers == worker のシャードのみ(ノード間の分担)
+
+    :param  string  path: 作業ディレクトリ
+    :param  int   worker: このワーカーの番号(0 - workers-1)
+    :param  int  workers: ワーカー数
+    :param  Engine engine: 計算エンジン(None ならマニフェストの設定で生成)
+    :return list        : 計算したシャード番号
+    """
+    try:
+        manifest = load(path)
+        engine = engine if engine is not None else _engine(manifest)
+        done = []
+        for shard in manifest["shards"]:
+            if shard["index"] % workers != worker:
+                continue
+            if run_shard(path, shard["index"], engine):
+                done.append(shard["index"])
+        return done
+    except Exception as e:
+        raise
+
+def status(path):
+    """ 完了/未完了のシャード
+
+    :param  string path: 作業ディレクトリ
+    :return list       : [完了したシャード番号, 未完了のシャード番号]
+    """
+    try:
+        manifest = load(path)
+        done, pending = [], []
+        for shard in manifest["shards"]:
+            i = shard["index"]
+            (done if _done(path, i, manifest) else pending).append(i)
+        return [done, pending]
+    except Exception as e:
+        raise
+
+def merge(path, dst, verify=True):
+    """ 全シャードの結果を1つの出力ファイルに結合
+
+    :param  string  path: 作業ディレクトリ
+    :param  string   dst: 出力ファイルパス(.npy, .f8, .arrow, .parquet)
+    :param  bool  verify: 完了マーカーの SHA-256 と照合するか
+    :return int         : 出力したエポック数
+    """
+    try:
+        manifest = load(path)
+        _, pending = status(path)
+        if pending:
+            raise RuntimeError("Shards not completed: {}".format(pending[:10]))
+        names = manifest["names"]
+        writer = lcl.ResultWriter(dst, names, manifest["count"])
+        try:
+            for shard in manifest["shards"]:
+                i = shard["index"]
+                files = {
+                    name: lcl.column_path(_shard_path(path, i), name)
+                    for name in names
+                }
+                if verify:
+                    with open(_marker(path, i), "r") as f:
+                        digest = json.load(f)["sha256"]
+                    for name in names:
+                        if _sha256(files[name]) != digest[name]:
+                            raise RuntimeError(
+                                "Checksum mismatch: {}".format(files[name])
+                            )
+                writer.write({
+                    name: np.load(files[name], mmap_mode="r") for name in names
+                })
+        finally:
+            writer.close()
+        return writer.pos
+    except Exception as e:
+        raise
+
+def _engine(manifest):
+    """ マニフェストの設定による計算エンジン """
+    return leng.Engine(
+        manifest["max_batch"], manifest["backend"], manifest["route"]
+    )
+
+def _digest(manifest):
+    """ マニフェストの SHA-256 (キーの順に並べた JSON) """
+    return hashlib.sha256(
+        json.dumps(manifest, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+def _done(path, index, manifest):
+    """ シャードが完了済みか(マーカーがあり、マニフェストの SHA-256 が一致) """
+    try:
+        with open(_marker(path, index), "r") as f:
+            return json.load(f).get("manifest") == _digest(manifest)
+    except FileNotFoundError:
+        return False
+
+def _shard_path(path, index):
+    """ シャードの結果のファイルパス(列毎に shard_NNNNNN.<列名>.npy) """
+    return os.path.join(path, "shard_{:06d}.npy".format(index))
+
+def _marker(path, index):
+    """ シャードの完了マーカーのファイルパス """
+    return os.path.join(path, "shard_{:06d}.done".format(index))
+
+def _sha256(path):
+    """ ファイルの SHA-256 """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _write_json(path, obj):
+    """ JSON ファイルの書き出し(一時ファイルに書いてから置き換え) """
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(obj, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
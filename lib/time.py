@@ -1,20 +1,57 @@
 """
 Module for time
+  * 時刻系の変換(UTC, TAI, TT, UT1; datetime64[us] の配列に対する配列演算)
+    - UTC <-> TAI: うるう秒の表(LEAPS)の索引(np.searchsorted)による TAI - UTC
+    - TAI <-> TT : TT - TAI = 32.184 秒(const.TT_TAI)
+    - TT  <-> UT1: ΔT (calc_dt)
+  * datetime64 は 23:59:60 を表せないため、挿入されたうるう秒の間の UTC は
+    繰り上げた値(翌日 00:00:00.f)と、うるう秒か否か(leap)の組で表す
 """
-from datetime import timedelta
+from datetime import datetime, timedelta
+import numpy as np
 from lib import const as cst
+from lib import polynomial as lpo
+
+
+EPOCH_J2000 = np.datetime64("2000-01-01T12:00:00", "us")  # J2000.0 (JD 2451545.0)
+# 時刻系
+SCALES = ("utc", "tai", "tt", "ut1")
+# TAI - UTC (ΔAT) の変更日(UTC)と値(秒)
+#   * 1972-01-01 以降(それ以前の UTC は秒の長さが異なるため対象外; 10 秒とみなす)
+LEAPS = [
+    ("1972-01-01", 10), ("1972-07-01", 11), ("1973-01-01", 12),
+    ("1974-01-01", 13), ("1975-01-01", 14), ("1976-01-01", 15),
+    ("1977-01-01", 16), ("1978-01-01", 17), ("1979-01-01", 18),
+    ("1980-01-01", 19), ("1981-07-01", 20), ("1982-07-01", 21),
+    ("1983-07-01", 22), ("1985-07-01", 23), ("1988-01-01", 24),
+    ("1990-01-01", 25), ("1991-01-01", 26), ("1992-07-01", 27),
+    ("1993-07-01", 28), ("1994-07-01", 29), ("1996-01-01", 30),
+    ("1997-07-01", 31), ("1999-01-01", 32), ("2006-01-01", 33),
+    ("2009-01-01", 34), ("2012-07-01", 35), ("2015-07-01", 36),
+    ("2017-01-01", 37),
+]
+LEAP_UTC = np.array([d for d, _ in LEAPS], dtype="datetime64[us]")
+LEAP_DAT = np.array([v for _, v in LEAPS], dtype="int64") * 1000000
+# ΔAT が変わる TAI の時刻
+LEAP_TAI = LEAP_UTC + LEAP_DAT.astype("timedelta64[us]")
+SEC = np.timedelta64(1, "s")
+TT_TAI_US = np.timedelta64(int(round(cst.TT_TAI * 1.0e6)), "us")
 
 
 def calc_jd(tt):
     """ ユリウス日の計算
         * 地球時 self.tt のユリウス日を計算し、self.jd に設定
 
-    :param  datetime tt: 地球時
-    :return float      : ユリウス日
+    :param  datetime/np.ndarray tt: 地球時(または datetime64 配列)
+    :return float/np.ndarray      : ユリウス日
     """
-    year, month,  day    = tt.year, tt.month,  tt.day
-    hour, minute, second = tt.hour, tt.minute, tt.second
     try:
+        if isinstance(tt, np.ndarray):
+            return calc_jd_dt64(tt)
+        year, month,  day    = tt.year, tt.month,  tt.day
+        hour, minute, second = tt.hour, tt.minute, tt.second
+        # 秒未満(マイクロ秒)も含める(datetime64 配列版 calc_jd_dt64 と同じ)
+        second += tt.microsecond / 1.0e6
         if month < 3:
             year  -= 1
             month += 12
@@ -25,6 +62,30 @@ def calc_jd(tt):
     except Exception as e:
         raise
 
+def calc_jd_dt64(tt):
+    """ ユリウス日の計算 (datetime64 配列版)
+
+    :param  np.ndarray tt: 地球時(datetime64)
+    :return np.ndarray   : ユリウス日
+    """
+    try:
+        us = (tt.astype("datetime64[us]") - EPOCH_J2000).astype("int64")
+        return us / (cst.DAYSEC * 1.0e6) + cst.J2000
+    except Exception as e:
+        raise
+
+def jd2dt64(jd):
+    """ ユリウス日 -> datetime64[us] (配列版)
+
+    :param  np.ndarray jd: ユリウス日
+    :return np.ndarray   : datetime64[us]
+    """
+    try:
+        us = np.rint((np.asarray(jd) - cst.J2000) * cst.DAYSEC * 1.0e6)
+        return EPOCH_J2000 + us.astype("int64").astype("timedelta64[us]")
+    except Exception as e:
+        raise
+
 def calc_jc(jd):
     """ ユリウス世紀数の計算
 
@@ -42,101 +103,56 @@ def calc_dt(tt):
             TT - UTC = ΔT + DUT1 = TAI + 32.184 - UTC = ΔAT + 32.184
           [うるう秒実施日一覧](http://jjy.nict.go.jp/QandA/data/leapsec.html)
 
-    :param  datetime tt: 時刻オブジェクト
-    :return float    dt: delta T
+    :param  datetime/np.ndarray tt: 時刻オブジェクト(または datetime64 配列)
+    :return float/np.ndarray    dt: delta T
+    """
+    try:
+        if isinstance(tt, np.ndarray):
+            # ΔT は年・月のみに依存するため、出現する年月毎に1回だけ計算
+            tt = tt.astype("datetime64[us]")
+            ym = tt.astype("datetime64[M]").astype("int64")
+            ym_u, idx = np.unique(ym, return_inverse=True)
+            dt_u = np.array([
+                calc_dt_ym(int(v // 12) + 1970, int(v % 12) + 1) for v in ym_u
+            ], dtype="float64")
+            return dt_u[idx.reshape(ym.shape)]
+        return calc_dt_ym(tt.year, tt.month)
+    except Exception as e:
+        raise
+
+def calc_dt_ym(year, month):
+    """ ΔT の計算(年・月指定)
+
+    :param  int   year: 年
+    :param  int  month: 月
+    :return float   dt: delta T
     """
-    year, month = tt.year, tt.month
     try:
         ym = "{:04d}-{:02d}".format(year, month)
         y = year + (month - 0.5) / 12
         if year < -500:
-            t = (y - 1820) / 100
-            dt  = -20 + 32 * t ** 2
+            dt = lpo.calc_dt("long", y)
         elif -500 <= year and year < 500:
-            t = y / 100
-            dt =  10583.6           \
-               + (-1014.41          \
-               + (   33.78311       \
-               + (   -5.952053      \
-               + (   -0.1798452     \
-               + (    0.022174192   \
-               + (    0.0090316521) \
-               * t) * t) * t) * t) * t) * t
+            dt = lpo.calc_dt("m500_500", y)
         elif 500 <= year and year < 1600:
-            t = (y - 1000) / 100
-            dt =  1574.2           \
-               + (-556.01          \
-               + (  71.23472       \
-               + (   0.319781      \
-               + (  -0.8503463     \
-               + (  -0.005050998   \
-               + (   0.0083572073) \
-               * t) * t) * t) * t) * t) * t
+            dt = lpo.calc_dt("500_1600", y)
         elif 1600 <= year and year < 1700:
-            t = y - 1600
-            dt =  120           \
-               + ( -0.9808      \
-               + ( -0.01532     \
-               + (  1.0 / 7129) \
-               * t) * t) * t
+            dt = lpo.calc_dt("1600_1700", y)
         elif 1700 <= year and year < 1800:
-            t = y - 1700
-            dt =   8.83           \
-               + ( 0.1603         \
-               + (-0.0059285      \
-               + ( 0.00013336     \
-               + (-1.0 / 1174000) \
-               * t) * t) * t) * t
+            dt = lpo.calc_dt("1700_1800", y)
         elif 1800 <= year and year < 1860:
-            t = y - 1800
-            dt =  13.72            \
-               + (-0.332447        \
-               + ( 0.0068612       \
-               + ( 0.0041116       \
-               + (-0.00037436      \
-               + ( 0.0000121272    \
-               + (-0.0000001699    \
-               + ( 0.000000000875) \
-               * t) * t) * t) * t) * t) * t) * t
+            dt = lpo.calc_dt("1800_1860", y)
         elif 1860 <= year and year < 1900:
-            t = y - 1860
-            dt =   7.62          \
-               + ( 0.5737        \
-               + (-0.251754      \
-               + ( 0.01680668    \
-               + (-0.0004473624  \
-               + ( 1.0 / 233174) \
-               * t) * t) * t) * t) * t
+            dt = lpo.calc_dt("1860_1900", y)
         elif 1900 <= year and year < 1920:
-            t = y - 1900
-            dt =  -2.79      \
-               + ( 1.494119  \
-               + (-0.0598939 \
-               + ( 0.0061966 \
-               + (-0.000197) \
-               * t) * t) * t) * t
+            dt = lpo.calc_dt("1900_1920", y)
         elif 1920 <= year and year < 1941:
-            t = y - 1920
-            dt =  21.20       \
-               + ( 0.84493    \
-               + (-0.076100   \
-               + ( 0.0020936) \
-               * t) * t) * t
+            dt = lpo.calc_dt("1920_1941", y)
         elif 1941 <= year and year < 1961:
-            t = y - 1950
-            dt =  29.07        \
-               + ( 0.407       \
-               + (-1.0 / 233   \
-               + ( 1.0 / 2547) \
-               * t) * t) * t
+            dt = lpo.calc_dt("1941_1961", y)
         elif 1961 <= year and year < 1986:
             if ym < "{:04d}-{:02d}".format(1972, 1):
-                t = y - 1975
-                dt =  45.45       \
-                   + ( 1.067      \
-                   + (-1.0 / 260  \
-                   + (-1.0 / 718) \
-                   * t) * t) * t
+                dt = lpo.calc_dt("1961_1986", y)
             # NICT Ver.
             elif ym < "{:04d}-{:02d}".format(1972, 7):
                 dt = cst.TT_TAI + 10
@@ -167,14 +183,7 @@ def calc_dt(tt):
             elif ym < "{:04d}-{:02d}".format(1988, 1):
                 dt = cst.TT_TAI + 23
         elif 1986 <= year and year < 2005:
-            t = y - 2000
-            dt =  63.86           \
-               + ( 0.3345         \
-               + (-0.060374       \
-               + ( 0.0017275      \
-               + ( 0.000651814    \
-               + ( 0.00002373599) \
-               * t) * t) * t) * t) * t
+            dt = lpo.calc_dt("1986_2005", y)
             # NICT Ver.
             if   ym < "{:04d}-{:02d}".format(1988, 1):
                 dt = cst.TT_TAI + 23
@@ -211,18 +220,11 @@ def calc_dt(tt):
                 # 第28回うるう秒実施までの暫定措置
                 dt = cst.TT_TAI + 37
             else:
-                t = y - 2000
-                dt =  62.92      \
-                   + ( 0.32217   \
-                   + ( 0.005589) \
-                   * t) * t
+                dt = lpo.calc_dt("2005_2050", y)
         elif 2050 <= year and year <= 2150:
-            dt = -20 \
-               + 32 * ((y - 1820) / 100) ** 2 \
-               - 0.5628 * (2150 - y)
+            dt = lpo.calc_dt("long", y) - 0.5628 * (2150 - y)
         elif 2150 < year:
-            t = (y - 1820) / 100.0
-            dt = -20 + 32 * t ** 2
+            dt = lpo.calc_dt("long", y)
         return dt
     except Exception as e:
         raise
@@ -230,15 +232,171 @@ def calc_dt(tt):
 def tt2ut1(tt, dt):
     """ TT -> UT1
 
-    param  datetime tt: 地球時の時刻オブジェクト
-    param  float    dt: delta T
-    return float   ut1: Universal Time 1, 世界時1
+    param  datetime/np.ndarray tt: 地球時の時刻オブジェクト(または datetime64 配列)
+    param  float/np.ndarray    dt: delta T
+    return datetime/np.ndarray ut1: Universal Time 1, 世界時1
     """
     try:
+        if isinstance(tt, np.ndarray):
+            return tt.astype("datetime64[us]") \
+                 - np.rint(np.asarray(dt) * 1.0e6).astype("timedelta64[us]")
         return tt - timedelta(seconds=dt)
     except Exception as e:
         raise
 
+def tai_utc(utc, leap=None):
+    """ TAI - UTC (ΔAT)
+
+    :param  np.ndarray  utc: 協定世界時(datetime64)
+    :param  np.ndarray leap: うるう秒の間か(bool; None なら全て False)
+    :return np.ndarray     : ΔAT (Unit: microsecond, int64)
+    """
+    try:
+        utc = np.asarray(utc, dtype="datetime64[us]")
+        if leap is not None:
+            # うるう秒の間(繰り上げた値)は、変更前の ΔAT
+            utc = np.where(leap, utc - SEC, utc)
+        i = np.searchsorted(LEAP_UTC, utc, "right") - 1
+        return LEAP_DAT[np.maximum(i, 0)]
+    except Exception as e:
+        raise
+
+def utc2tai(utc, leap=None):
+    """ UTC -> TAI
+        * leap の行は、うるう秒の日の 23:59:60 の繰り上げた値でなければ NaT
+
+    :param  np.ndarray  utc: 協定世界時(datetime64)
+    :param  np.ndarray leap: うるう秒の間か(bool; None なら全て False)
+    :return np.ndarray     : 国際原子時(datetime64[us])
+    """
+    try:
+        utc = np.asarray(utc, dtype="datetime64[us]")
+        tai = utc + tai_utc(utc, leap).astype("timedelta64[us]")
+        if leap is not None:
+            bad = leap & ~np.isin(utc.astype("datetime64[s]"), LEAP_UTC[1:])
+            tai[bad] = np.datetime64("NaT")
+        return tai
+    except Exception as e:
+        raise
+
+def tai2utc(tai):
+    """ TAI -> UTC
+
+    :param  np.ndarray tai: 国際原子時(datetime64)
+    :return list          : [協定世界時(datetime64[us]; うるう秒の間は繰り上げた値),
+                             うるう秒の間か(bool)]
+    """
+    try:
+        tai = np.asarray(tai, dtype="datetime64[us]")
+        i = np.maximum(np.searchsorted(LEAP_TAI, tai, "right") - 1, 0)
+        utc = tai - LEAP_DAT[i].astype("timedelta64[us]")
+        # 次の ΔAT の変更の直前の1秒が、挿入されたうるう秒
+        j = np.minimum(i + 1, len(LEAP_TAI) - 1)
+        leap = (j > i) & (tai >= LEAP_TAI[j] - SEC)
+        return [utc, leap]
+    except Exception as e:
+        raise
+
+def tai2tt(tai):
+    """ TAI -> TT
+
+    :param  np.ndarray tai: 国際原子時(datetime64)
+    :return np.ndarray    : 地球時(datetime64[us])
+    """
+    try:
+        return np.asarray(tai, dtype="datetime64[us]") + TT_TAI_US
+    except Exception as e:
+        raise
+
+def tt2tai(tt):
+    """ TT -> TAI
+
+    :param  np.ndarray tt: 地球時(datetime64)
+    :return np.ndarray   : 国際原子時(datetime64[us])
+    """
+    try:
+        return np.asarray(tt, dtype="datetime64[us]") - TT_TAI_US
+    except Exception as e:
+        raise
+
+def ut12tt(ut1):
+    """ UT1 -> TT (tt2ut1 の逆変換)
+        * ΔT は TT の年・月によるため、UT1 の年・月の ΔT で求めた TT で
+          ΔT を求め直す(月の境界の前後でも tt2ut1 で元に戻る)
+
+    :param  np.ndarray ut1: 世界時1(datetime64)
+    :return np.ndarray    : 地球時(datetime64[us])
+    """
+    try:
+        ut1 = np.asarray(ut1, dtype="datetime64[us]")
+        tt = tt2ut1(ut1, -calc_dt(ut1))
+        return tt2ut1(ut1, -calc_dt(tt))
+    except Exception as e:
+        raise
+
+def to_tt(t, scale="tt", leap=None):
+    """ 指定の時刻系の時刻 -> TT
+
+    :param  datetime/np.ndarray t: 時刻(単一の日時、または datetime64 配列)
+    :param  string          scale: 時刻系("utc", "tai", "tt", "ut1")
+    :param  np.ndarray       leap: うるう秒の間か(UTC の場合; None なら全て False)
+    :return datetime/np.ndarray  : 地球時(入力と同じ型)
+    """
+    try:
+        if scale not in SCALES:
+            raise ValueError("Unknown time scale: {}".format(scale))
+        if scale == "tt":
+            return t
+        if isinstance(t, datetime):
+            tt = to_tt(np.array([np.datetime64(t, "us")]), scale, leap)
+            return tt[0].astype(datetime)
+        if scale == "utc":
+            return tai2tt(utc2tai(t, leap))
+        if scale == "tai":
+            return tai2tt(t)
+        return ut12tt(t)
+    except Exception as e:
+        raise
+
+def utc_dt(utc, leap=None):
+    """ UTC の時刻の ΔT (UT1 = TT - ΔT)
+        * ΔT は UTC の年・月で求める(UT1 ≒ UTC + DUT1)
+          うるう秒の前の約 69 秒間は TT が翌月になり、TT の年・月の ΔT では
+          変更後の ΔAT となって UT1 が 1 秒ずれるため
+        * うるう秒の間(繰り上げた値)は、うるう秒の日の ΔT
+
+    :param  np.ndarray  utc: 協定世界時(datetime64)
+    :param  np.ndarray leap: うるう秒の間か(bool; None なら全て False)
+    :return np.ndarray     : ΔT (Unit: 秒)
+    """
+    try:
+        utc = np.asarray(utc, dtype="datetime64[us]")
+        if leap is not None:
+            utc = np.where(leap, utc - SEC, utc)
+        # NaT(不正な行)の ΔT は使用しないため、任意の有効な時刻で代用
+        return calc_dt(np.where(np.isnat(utc), EPOCH_J2000, utc))
+    except Exception as e:
+        raise
+
+def to_tt_dt(t, scale="tt", leap=None):
+    """ 指定の時刻系の時刻 -> [TT, ΔT]
+        * ΔT は UTC の場合のみ(utc_dt)、それ以外は None (TT から計算)
+
+    :param  datetime/np.ndarray t: 時刻(単一の日時、または datetime64 配列)
+    :param  string          scale: 時刻系("utc", "tai", "tt", "ut1")
+    :param  bool/np.ndarray  leap: うるう秒の間か(UTC の場合; None なら全て False)
+    :return list                 : [地球時(入力と同じ型), ΔT (float/np.ndarray/None)]
+    """
+    try:
+        if isinstance(t, datetime):
+            leap = None if leap is None else np.array([bool(leap)])
+            tt, dt = to_tt_dt(np.array([np.datetime64(t, "us")]), scale, leap)
+            return [tt[0].astype(datetime), None if dt is None else float(dt[0])]
+        tt = to_tt(t, scale, leap)
+        return [tt, utc_dt(t, leap) if scale == "utc" else None]
+    except Exception as e:
+        raise
+
 def deg2hms(deg):
     """ 99.999° -> 99h99m99s 変換
 
@@ -258,3 +416,73 @@ def deg2hms(deg):
     except Exception as e:
         raise
 
+
+def deg2hms_arr(deg):
+    """ 99.999° -> 99h99m99s 変換 (配列版)
+        * 符号は別に返し、時・分・秒は絶対値を分解
+        * 秒はミリ秒単位で丸めてから分解するため、"60.000 s" にはならない
+
+    :param  np.ndarray deg: Degrees
+    :return list          : [sign(bool, 負なら True), h(int), m(int), s(float)]
+    """
+    try:
+        deg = np.asarray(deg, dtype="float64")
+        ms = np.rint(np.abs(deg) * 240000.0).astype("int64")
+        h, ms = np.divmod(ms, 3600000)
+        m, ms = np.divmod(ms, 60000)
+        return [deg < 0, h, m, ms / 1000.0]
+    except Exception as e:
+        raise
+
+def hms_field(deg):
+    """ 99.999° -> 固定幅 " 99 h 99 m 99.999 s" の文字列欄 (配列版)
+        * 行毎の書式化を行わず、数字を uint8 バッファへ直接書き込む
+        * 先頭の1文字は符号欄(負なら "-")
+
+    :param  np.ndarray deg: Degrees
+    :return np.ndarray    : uint8 の (行数, 欄幅) 配列
+    """
+    try:
+        sign, h, m, s = deg2hms_arr(deg)
+        ms = np.rint(s * 1000.0).astype("int64")
+        hw = max(2, len(str(int(h.max())))) if h.size else 2
+        tmpl = " " + " " * hw + " h 00 m 00.000 s"
+        buf = np.empty((h.size, len(tmpl)), dtype="uint8")
+        buf[:] = np.frombuffer(tmpl.encode(), dtype="uint8")
+        buf[sign, 0] = ord("-")
+        # 時(先頭のゼロは空白)
+        for i in range(hw):
+            p = 10 ** (hw - 1 - i)
+            buf[:, 1 + i] = np.where(
+                (h >= p) | (p == 1), h // p % 10 + ord("0"), ord(" ")
+            )
+        # 分・秒・ミリ秒
+        c = 1 + hw
+        for pos, val, p in [
+            (c + 3, m,  10), (c + 4, m,  1),
+            (c + 8, ms, 10000), (c + 9, ms, 1000),
+            (c + 11, ms, 100), (c + 12, ms, 10), (c + 13, ms, 1),
+        ]:
+            buf[:, pos] = val // p % 10 + ord("0")
+        return buf
+    except Exception as e:
+        raise
+
+def render_hms(*degs):
+    """ 複数の角度(°)配列を固定幅の h/m/s 欄として一括でテキスト化
+
+    :param  np.ndarray degs: Degrees (同じ長さの配列を任意個)
+    :return bytes          : 1行1エポック, 欄は空白区切り, 改行は "\\n"
+    """
+    try:
+        if not degs:
+            raise ValueError("render_hms needs at least one angle array")
+        fields = []
+        for deg in degs:
+            if fields:
+                fields.append(np.full((fields[0].shape[0], 1), ord(" "), "uint8"))
+            fields.append(hms_field(deg))
+        fields.append(np.full((fields[0].shape[0], 1), ord("\n"), "uint8"))
+        return np.hstack(fields).tobytes()
+    except Exception as e:
+        raise
@@ -0,0 +1,173 @@
+"""
+Module for bulk timestamp parsing
+  * 日時文字列の配列(NumPy の S 型配列、または改行区切りのバイト列)を、
+    行毎の Python オブジェクトを生成せずに datetime64[us] の配列に変換する
+  * 固定位置のバイトを切り出して数値化し、範囲チェックも配列演算で行う
+  * 不正な行は NaT とし、その行番号(添字)を返す(sys.exit はしない)
+  * leap=True なら、うるう秒(23:59:60.f)を受け付け、繰り上げた値(翌日 00:00:00.f)
+    と、うるう秒の行か否かを返す(UTC の入力用; time.utc2tai で変換)
+
+  対応する書式
+    - YYYYMMDD, YYYYMMDDHHMMSS, YYYYMMDDHHMMSSffffff (コマンドライン引数と同じ)
+    - ISO 8601: YYYY-MM-DD, YYYY-MM-DDTHH:MM:SS[.f..ffffff][Z]
+                (日付と時刻の区切りは "T" または " ")
+"""
+import numpy as np
+from lib import const as cst
+
+# 各フィールドの (compact での位置, ISO 8601 での位置, 桁数)
+FIELDS = [
+    ("year",   0,  0, 4),
+    ("month",  4,  5, 2),
+    ("day",    6,  8, 2),
+    ("hour",   8, 11, 2),
+    ("minute", 10, 14, 2),
+    ("second", 12, 17, 2),
+]
+# 1970-01-01T00:00:00 のユリウス日
+JD_UNIX = 2440587.5
+
+
+def from_buffer(buf):
+    """ 改行区切りのバイト列 -> 固定幅の行列
+
+    :param  bytes/np.ndarray buf: バイト列(bytes, memoryview, uint8 の配列)
+    :return np.ndarray          : uint8 の (行数, 最大行長) 配列(余りは 0)
+    """
+    try:
+        b = np.frombuffer(buf, dtype="uint8") if not isinstance(buf, np.ndarray) \
+            else buf.view("uint8").ravel()
+        ends = np.flatnonzero(b == ord("\n"))
+        if len(b) and (not len(ends) or ends[-1] != len(b) - 1):
+            ends = np.append(ends, len(b))
+        starts = np.concatenate([[0], ends[:-1] + 1]).astype("int64")
+        lens = ends - starts
+        width = int(lens.max()) if len(lens) else 0
+        col = np.arange(width)
+        mask = col[None, :] < lens[:, None]
+        idx = np.minimum(starts[:, None] + col[None, :], max(len(b) - 1, 0))
+        return np.where(mask, b[idx] if len(b) else 0, 0).astype("uint8")
+    except Exception as e:
+        raise
+
+def to_matrix(arr):
+    """ S 型配列 -> uint8 の (行数, 幅) 配列(コピーしない)
+
+    :param  np.ndarray arr: S 型配列
+    :return np.ndarray    : uint8 の (行数, 幅) 配列
+    """
+    try:
+        arr = np.ascontiguousarray(arr)
+        if arr.dtype.kind != "S":
+            raise TypeError("Expected a bytes (S) array, got {}".format(arr.dtype))
+        return arr.view("uint8").reshape(len(arr), arr.dtype.itemsize)
+    except Exception as e:
+        raise
+
+def parse(data, leap=False):
+    """ 日時文字列の一括変換
+
+    :param  np.ndarray/bytes data: S 型配列、uint8 の (行数, 幅) 配列、
+                                   または改行区切りのバイト列
+    :param  bool             leap: 23:59:60 を受け付けるか
+    :return list                 : [datetime64[us] の配列(不正な行は NaT),
+                                    不正な行の添字
+                                    (leap なら、うるう秒の行か(bool の配列)を追加)]
+    """
+    try:
+        if isinstance(data, np.ndarray) and data.dtype.kind == "S":
+            m = to_matrix(data)
+        elif isinstance(data, np.ndarray) and data.ndim == 2:
+            m = data
+        else:
+            m = from_buffer(data)
+        n, width = m.shape
+        m = np.pad(m, ((0, 0), (0, max(0, 27 - width))))
+        # 行の長さ(末尾の空白, CR, NUL を除く)
+        body = (m != 0) & (m != ord(" ")) & (m != ord("\r"))
+        lens = np.where(body.any(axis=1), m.shape[1] - np.argmax(body[:, ::-1], axis=1), 0)
+        # 末尾の "Z" は無視
+        rows = np.arange(n)
+        z = (lens > 0) & (m[rows, np.maximum(lens - 1, 0)] == ord("Z"))
+        lens = lens - z
+        # 数字か(行列全体の整数への変換はせず、数値は各フィールドの列のみ変換)
+        is_dig = (m >= ord("0")) & (m <= ord("9"))
+
+        def digit(p):
+            """ 行毎の位置 p の数字の値(数字でなければ 0 - 9 の範囲外) """
+            return m[rows, p].astype("int64") - ord("0")
+
+        col = np.arange(m.shape[1])
+        # 書式の判定
+        compact = np.isin(lens, [8, 14, 20]) \
+                & np.all(is_dig | (col[None, :] >= lens[:, None]), axis=1) & ~z
+        iso = (m[:, 4] == ord("-")) & (m[:, 7] == ord("-"))
+        iso_t = iso & (lens >= 19) & np.isin(m[:, 10], [ord("T"), ord(" ")]) \
+              & (m[:, 13] == ord(":")) & (m[:, 16] == ord(":"))
+        iso_f = iso_t & (lens >= 21) & (lens <= 26) & (m[:, 19] == ord("."))
+        iso_ok = iso & (lens == 10) | iso_t & (lens == 19) | iso_f
+        has_time = np.where(compact, lens >= 14, iso_t)
+        # 各フィールドの数値化
+        vals = {}
+        ok = compact | iso_ok
+        for name, p_c, p_i, w in FIELDS:
+            v = np.zeros(n, dtype="int64")
+            good = np.ones(n, dtype=bool)
+            for k in range(w):
+                p = np.where(compact, p_c + k, p_i + k)
+                d = digit(p)
+                good &= (d >= 0) & (d <= 9)
+                v = v * 10 + d
+            if name in ("hour", "minute", "second"):
+                v = np.where(has_time, v, 0)
+                good |= ~has_time
+            vals[name] = v
+            ok &= good
+        # 秒の端数(マイクロ秒)
+        frac = np.zeros(n, dtype="int64")
+        f_pos = np.where(compact, 14, 20)
+        f_len = np.where(compact, np.where(lens == 20, 6, 0),
+                         np.where(iso_f, lens - 20, 0))
+        for k in range(6):
+            d = digit(np.minimum(f_pos + k, m.shape[1] - 1))
+            use = k < f_len
+            ok &= ~use | ((d >= 0) & (d <= 9))
+            frac = frac * 10 + np.where(use, d, 0)
+        # 範囲チェック
+        y, mo, d = vals["year"], vals["month"], vals["day"]
+        leap_y = (y % 4 == 0) & (y % 100 != 0) | (y % 400 == 0)
+        mdays = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+        ok &= (mo >= 1) & (mo <= 12)
+        dim = mdays[np.clip(mo - 1, 0, 11)] + ((mo == 2) & leap_y)
+        ok &= (d >= 1) & (d <= dim)
+        is_leap = leap & (vals["hour"] == 23) & (vals["minute"] == 59) \
+                & (vals["second"] == 60)
+        ok &= (vals["hour"] <= 23) & (vals["minute"] <= 59) \
+            & ((vals["second"] <= 59) | is_leap)
+        # datetime64[us] の組み立て
+        months = np.where(ok, (y - 1970) * 12 + mo - 1, 0)
+        days = months.astype("datetime64[M]").astype("datetime64[D]").astype("int64") \
+             + np.where(ok, d - 1, 0)
+        us = ((days * 24 + vals["hour"]) * 60 + vals["minute"]) * 60 + vals["second"]
+        us = us * 1000000 + frac
+        tt = us.astype("datetime64[us]")
+        tt[~ok] = np.datetime64("NaT")
+        if leap:
+            return [tt, np.flatnonzero(~ok), is_leap & ok]
+        return [tt, np.flatnonzero(~ok)]
+    except Exception as e:
+        raise
+
+def to_jd2(tt):
+    """ datetime64 -> 2つに分けたユリウス日(整数部, 端数)
+        * float64 1つでは失われる日の端数の精度を保つため、日と端数に分ける
+
+    :param  np.ndarray tt: datetime64 の配列
+    :return list         : [jd1(その日の 0h のユリウス日), jd2(日の端数)]
+    """
+    try:
+        us = np.asarray(tt, dtype="datetime64[us]").astype("int64")
+        days, rem = np.divmod(us, int(cst.DAYSEC) * 1000000)
+        return [days + JD_UNIX, rem / (cst.DAYSEC * 1.0e6)]
+    except Exception as e:
+        raise
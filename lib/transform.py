@@ -0,0 +1,143 @@
+"""
+Module for the batched transformation of position vectors
+  * GCRS -> CIRS(C2I)、GCRS -> ITRS(C2T = W・R3(ERA)・C2I)の回転行列を
+    エポック毎に生成し、(N, 3) の位置ベクトル配列に matmul で一括適用する
+    - C2I, R3(ERA)・C2I はパイプラインのノード(c2i, c2t; NPB 行列, CIP 座標,
+      s, ERA から生成、frame キャッシュも有効)
+    - 極運動 W = R1(-yp)・R2(-xp)・R3(s') (Ref: iauPom00; s' は TIO locator)
+      は、極運動(xp, yp)を指定した場合のみ適用
+  * ベクトル配列の形(行列が (T, 3, 3) の場合)
+    - (T, 3)   : エポック毎に1つのベクトル
+    - (T, N, 3): エポック毎に N 個のベクトル
+    - (1, N, 3): 全エポックで共通の N 個のベクトル(結果は (T, N, 3))
+    単一エポック(行列が (3, 3))なら、任意の (..., 3) の配列に1つの行列を適用
+  * ベクトル毎の Python の処理は無く、out にベクトル配列自身を指定すれば
+    上書き(in place)で変換する
+"""
+import numpy as np
+from lib import matrix     as mx
+from lib import polynomial as lpo
+
+
+def sp_00(t):
+    """ The TIO locator s', positioning the Terrestrial Intermediate Origin
+        on the equator of the Celestial Intermediate Pole.(Ref: iauSp00)
+
+    :param  float/np.ndarray t: Julian Century Number (TT, または配列)
+    :return float/np.ndarray  : TIO locator s' (Unit: rad)
+    """
+    try:
+        return lpo.calc("sp", t)
+    except Exception as e:
+        raise
+
+def pom_00(xp, yp, sp):
+    """ Form the matrix of polar motion.(Ref: iauPom00)
+
+    :param  float/np.ndarray xp: x coordinate of the pole (Unit: rad)
+    :param  float/np.ndarray yp: y coordinate of the pole (Unit: rad)
+    :param  float/np.ndarray sp: TIO locator s' (Unit: rad)
+    :return np.ndarray         : Polar-motion matrix ((3, 3), または (N, 3, 3))
+    """
+    try:
+        xp, yp, sp = np.broadcast_arrays(xp, yp, sp)
+        if not xp.ndim:
+            xp, yp, sp = float(xp), float(yp), float(sp)
+        r = mx.init_r()
+        r = mx.rotate_z(r, sp)
+        r = mx.rotate_y(r, -xp)
+        r = mx.rotate_x(r, -yp)
+        return np.asarray(r)
+    except Exception as e:
+        raise
+
+def matrices(engine, epochs, pm=None, names=("c2i", "c2t")):
+    """ 回転行列の計算
+
+    :param  Engine                 engine: 計算エンジン
+    :param  datetime/list/np.ndarray epochs: 地球時(単一、または配列)
+    :param  tuple                      pm: 極運動 (xp, yp) (Unit: rad; 各 float、
+                                           またはエポック毎の配列; None なら不使用)
+    :param  tuple                   names: 計算する行列("c2i", "c2t")
+    :return dict                         : {名前: (3, 3) または (T, 3, 3) の np.ndarray}
+    """
+    try:
+        calc = list(names) + (["jc"] if pm is not None and "c2t" in names else [])
+        res = engine.compute(epochs, calc)
+        mtx = {name: np.asarray(res[name]) for name in names}
+        if "c2t" in mtx and pm is not None:
+            w = pom_00(pm[0], pm[1], sp_00(res["jc"]))
+            mtx["c2t"] = np.matmul(w, mtx["c2t"], out=mtx["c2t"])
+        return mtx
+    except Exception as e:
+        raise
+
+def apply(r, v, out=None, inverse=False):
+    """ 位置ベクトル配列の回転(r・v)
+
+    :param  np.ndarray     r: 回転行列 ((3, 3), または (T, 3, 3))
+    :param  np.ndarray     v: 位置ベクトル ((..., 3); r が (T, 3, 3) なら
+                              (T, 3), (T, N, 3), (1, N, 3))
+    :param  np.ndarray   out: 出力先(v 自身も可; None なら新規確保)
+    :param  bool     inverse: 逆変換(r の転置・v)か
+    :return np.ndarray      : 回転したベクトル(v と同じ形、(1, N, 3) なら (T, N, 3))
+    """
+    try:
+        r = np.asarray(r)
+        v = np.asarray(v)
+        # 行ベクトルに右から転置を掛ける(v・r^T = (r・v^T)^T)
+        r_t = r if inverse else np.swapaxes(r, -1, -2)
+        if r.ndim == 2 or v.ndim == 3:
+            return np.matmul(v, r_t, out=out)
+        if out is None:
+            out = np.empty(v.shape, dtype=np.result_type(r, v))
+        np.matmul(v[:, None, :], r_t, out=out[:, None, :])
+        return out
+    except Exception as e:
+        raise
+
+def to_intermediate(engine, epochs, v, out=None):
+    """ GCRS -> CIRS (Celestial Intermediate Reference System)
+
+    :param  Engine                 engine: 計算エンジン
+    :param  datetime/list/np.ndarray epochs: 地球時(単一、または配列)
+    :param  np.ndarray                  v: 位置ベクトル(GCRS)
+    :param  np.ndarray                out: 出力先(v 自身も可)
+    :return np.ndarray                   : 位置ベクトル(CIRS)
+    """
+    try:
+        return apply(matrices(engine, epochs, names=("c2i",))["c2i"], v, out)
+    except Exception as e:
+        raise
+
+def to_terrestrial(engine, epochs, v, pm=None, out=None):
+    """ GCRS -> ITRS (極運動を指定しない場合は TIRS)
+
+    :param  Engine                 engine: 計算エンジン
+    :param  datetime/list/np.ndarray epochs: 地球時(単一、または配列)
+    :param  np.ndarray                  v: 位置ベクトル(GCRS)
+    :param  tuple                      pm: 極運動 (xp, yp) (Unit: rad; None なら不使用)
+    :param  np.ndarray                out: 出力先(v 自身も可)
+    :return np.ndarray                   : 位置ベクトル(ITRS / TIRS)
+    """
+    try:
+        return apply(matrices(engine, epochs, pm, ("c2t",))["c2t"], v, out)
+    except Exception as e:
+        raise
+
+def to_celestial(engine, epochs, v, pm=None, out=None):
+    """ ITRS (極運動を指定しない場合は TIRS) -> GCRS (to_terrestrial の逆変換)
+
+    :param  Engine                 engine: 計算エンジン
+    :param  datetime/list/np.ndarray epochs: 地球時(単一、または配列)
+    :param  np.ndarray                  v: 位置ベクトル(ITRS / TIRS)
+    :param  tuple                      pm: 極運動 (xp, yp) (Unit: rad; None なら不使用)
+    :param  np.ndarray                out: 出力先(v 自身も可)
+    :return np.ndarray                   : 位置ベクトル(GCRS)
+    """
+    try:
+        return apply(
+            matrices(engine, epochs, pm, ("c2t",))["c2t"], v, out, inverse=True
+        )
+    except Exception as e:
+        raise
@@ -0,0 +1,234 @@
+"""
+Module for the autotuning of batch runs
+  * 最適な最大バッチサイズ(エンジンの作業領域: 項数 x バッチのエポック数)は
+    キャッシュの大きさと係数表の形に、最適なスレッド数はホストに依存する
+  * autotune は、このホストで最大バッチサイズ x スレッド数の格子の各組について
+    一括計算(Engine.compute)の時間を測り、最も速い組を設定ファイルに書き出す
+    - 各組のメモリ使用量は、1スレッド分の作業領域(tracemalloc で測った
+      1バッチの計算のピーク) x スレッド数 + チャンクの入出力の配列で見積もり、
+      上限(budget)を超える組は測らない
+    - チャンクサイズ(ファイルからの読み込みの単位)は、既定のチャンクサイズ以上の
+      最大バッチサイズ x スレッド数の倍数(全スレッドにバッチが行き渡る)
+  * 設定ファイル(既定は ~/.greenwich_time.json、環境変数 GREENWICH_TUNE で変更)は
+    一括計算(バッチモード)の既定値として自動で読み込む
+    (CPU 数の異なるホスト、またはバックエンド、計算経路、計算する量の異なる
+     測定の設定は使用しない)
+"""
+from datetime import datetime
+import json
+import os
+import platform
+import time
+import tracemalloc
+import warnings
+import numpy as np
+from lib import backend  as lbk
+from lib import columnar as lcl
+from lib import engine   as leng
+
+# 設定ファイルのパスの環境変数
+ENV_NAME = "GREENWICH_TUNE"
+# 既定の設定ファイルのパス
+CONFIG = os.path.join(os.path.expanduser("~"), ".greenwich_time.json")
+# 既定の最大バッチサイズの候補
+BATCHES = [256, 512, 1024, 2048, 4096, 8192]
+# 既定のメモリ使用量の上限(Unit: byte)
+BUDGET = 256 << 20
+# 既定の測定に使用するエポック数
+N_EPOCHS = 16384
+# 測定に使用するエポックの開始(TT)と間隔
+T_START = np.datetime64("2000-01-01T00:00:00", "us")
+T_STEP = np.timedelta64(1927, "s")
+
+
+def path_of(path=None):
+    """ 設定ファイルのパス
+
+    :param  string path: パス(None なら環境変数 GREENWICH_TUNE、または既定)
+    :return string     : パス
+    """
+    return path or os.environ.get(ENV_NAME) or CONFIG
+
+def workers():
+    """ スレッド数の候補(1, 2, 4, ... と CPU 数)
+
+    :return list: スレッド数
+    """
+    try:
+        cpus = os.cpu_count() or 1
+        res = [1 << i for i in range(cpus.bit_length()) if 1 << i <= cpus]
+        return res if res[-1] == cpus else res + [cpus]
+    except Exception as e:
+        raise
+
+def chunk_of(max_batch, threads):
+    """ チャンクサイズ(既定のチャンクサイズ以上の max_batch x threads の倍数)
+
+    :param  int max_batch: 最大バッチサイズ
+    :param  int   threads: スレッド数
+    :return int          : チャンクサイズ(エポック数)
+    """
+    unit = max_batch * threads
+    return -(-lcl.CHUNK // unit) * unit
+
+def footprint(max_batch, names=lcl.NAMES, backend=None, route="cio"):
+    """ 1スレッド分のメモリ使用量(エンジンの生成と1バッチの計算のピーク)
+
+    :param  int  max_batch: 最大バッチサイズ
+    :param  list     names: 計算する量の名前
+    :param  string backend: 級数計算のバックエンド名(None なら既定)
+    :param  string   route: GAST の計算経路
+    :return int           : バイト数
+    """
+    try:
+        tt = T_START + np.arange(max_batch) * T_STEP
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        try:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            engine = leng.Engine(max_batch, backend, route)
+            engine.compute(tt, names)
+            return tracemalloc.get_traced_memory()[1] - base
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+    except Exception as e:
+        raise
+
+def measure(max_batch, threads, n=N_EPOCHS, names=lcl.NAMES, backend=None,
+            route="cio", repeat=2):
+    """ 一括計算の時間の測定
+
+    :param  int  max_batch: 最大バッチサイズ
+    :param  int    threads: スレッド数
+    :param  int          n: エポック数
+    :param  list     names: 計算する量の名前
+    :param  string backend: 級数計算のバックエンド名(None なら既定)
+    :param  string   route: GAST の計算経路
+    :param  int     repeat: 繰り返し回数(最短の時間をとる)
+    :return float         : 時間(秒)
+    """
+    try:
+        tt = T_START + np.arange(n) * T_STEP
+        engine = leng.Engine(max_batch, backend, route, threads=threads)
+        try:
+            # 係数表の読み込み、スレッド毎の作業領域の確保、jit のコンパイル
+            engine.compute(tt[:max_batch * threads], names)
+            best = float("inf")
+            for _ in range(repeat):
+                t_0 = time.perf_counter()
+                engine.compute(tt, names)
+                best = min(best, time.perf_counter() - t_0)
+            return best
+        finally:
+            engine.close()
+    except Exception as e:
+        raise
+
+def autotune(n=N_EPOCHS, names=lcl.NAMES, budget=BUDGET, batches=BATCHES,
+             threads=None, backend=None, route="cio", path=None, repeat=2,
+             save=True):
+    """ 最大バッチサイズ x スレッド数の格子の測定と、最も速い組の保存
+
+    :param  int          n: 測定に使用するエポック数
+    :param  list     names: 計算する量の名前
+    :param  int     budget: メモリ使用量の上限(Unit: byte)
+    :param  list   batches: 最大バッチサイズの候補
+    :param  list   threads: スレッド数の候補(None なら workers())
+    :param  string backend: 級数計算のバックエンド名(None なら既定)
+    :param  string   route: GAST の計算経路
+    :param  string    path: 設定ファイルのパス(None なら path_of())
+    :param  int     repeat: 各組の繰り返し回数
+    :param  bool      save: 設定ファイルに書き出すか
+    :return dict          : 設定(格子の各組の結果 "grid" を含む)
+    """
+    try:
+        threads = threads or workers()
+        grid = []
+        for max_batch in batches:
+            per_thread = footprint(max_batch, names, backend, route)
+            for k in threads:
+                chunk = chunk_of(max_batch, k)
+                nbytes = per_thread * k + chunk * 8 * (1 + len(names))
+                row = {"max_batch": max_batch, "threads": k, "chunk": chunk,
+                       "bytes": nbytes, "seconds": None}
+                if nbytes <= budget and max_batch * k <= n:
+                    row["seconds"] = measure(
+                        max_batch, k, n, names, backend, route, repeat
+                    )
+                grid.append(row)
+        done = [row for row in grid if row["seconds"] is not None]
+        if not done:
+            raise ValueError("No setting fits the memory budget: {}".format(budget))
+        best = min(done, key=lambda row: row["seconds"])
+        settings = {
+            "max_batch": best["max_batch"],
+            "threads": best["threads"],
+            "chunk": best["chunk"],
+            "rate": n / best["seconds"],
+            "host": platform.node(),
+            "cpus": os.cpu_count(),
+            "backend": type(lbk.get(backend)).__name__,
+            "route": route,
+            "names": list(names),
+            "budget": budget,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "grid": grid,
+        }
+        if save:
+            write(settings, path)
+        return settings
+    except Exception as e:
+        raise
+
+def write(settings, path=None):
+    """ 設定ファイルの書き出し(一時ファイルに書いてから置き換え)
+
+    :param dict settings: 設定
+    :param string   path: 設定ファイルのパス(None なら path_of())
+    """
+    try:
+        path = path_of(path)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(settings, f, indent=1)
+        os.replace(tmp, path)
+    except Exception as e:
+        raise
+
+def load(path=None, backend=None, route="cio", names=lcl.NAMES):
+    """ 設定ファイルの読み込み
+        * ファイルが無い、読めない、CPU 数の異なるホストの設定、
+          またはバックエンド、計算経路、計算する量が測定時と異なるなら {}
+
+    :param  string    path: 設定ファイルのパス(None なら path_of())
+    :param  string backend: 使用するバックエンド名(None なら既定)
+    :param  string   route: 使用する GAST の計算経路
+    :param  list     names: 計算する量の名前
+    :return dict          : 設定({"max_batch", "threads", "chunk", ...})
+    """
+    try:
+        path = path_of(path)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, "r") as f:
+                settings = json.load(f)
+        except (OSError, ValueError):
+            warnings.warn("Ignoring unreadable tuning file: {}".format(path))
+            return {}
+        if settings.get("cpus") != os.cpu_count():
+            warnings.warn("Ignoring tuning file made for another host: {}".format(path))
+            return {}
+        tuned = [settings.get("backend"), settings.get("route"),
+                 sorted(settings.get("names") or [])]
+        if tuned != [type(lbk.get(backend)).__name__, route, sorted(names)]:
+            warnings.warn(
+                "Ignoring tuning file made for another backend/route/names: {}".format(path)
+            )
+            return {}
+        return settings
+    except Exception as e:
+        raise
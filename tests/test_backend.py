@@ -0,0 +1,45 @@
+"""
+Tests for the series backends (python, numpy, jit give the same results)
+"""
+import numpy as np
+import pytest
+from lib import backend  as lbk
+from lib import cip_cio  as lcc
+from lib import engine   as leng
+from lib import nutation as lnt
+
+T = np.linspace(-1.0, 1.0, 33)
+NAMES = ["x", "y", "s", "eo", "gast", "ee"]
+
+
+@pytest.mark.parametrize("name", sorted(lbk.BACKENDS))
+def test_nutation(name):
+    ref = lnt.Nutation(T, "python", "sincos").calc_nut_06_a()
+    val = lnt.Nutation(T, name, "sincos").calc_nut_06_a()
+    assert max(np.abs(v - r).max() for v, r in zip(val, ref)) < 1.0e-16
+    dp, de = lnt.Nutation(float(T[3]), name, "sincos").calc_nut_06_a()
+    assert isinstance(dp, float) and abs(dp - ref[0][3]) < 1.0e-16
+
+@pytest.mark.parametrize("name", sorted(lbk.BACKENDS))
+def test_s06(name):
+    x, y = lcc.CipCio(T, "python").xy_06()
+    ref = lcc.CipCio(T, "python").s_06(x, y)
+    assert np.abs(lcc.CipCio(T, name).s_06(x, y) - ref).max() < 1.0e-18
+
+@pytest.mark.parametrize("name", sorted(lbk.BACKENDS))
+def test_engine(name):
+    tt = np.datetime64("2016-06-21T12:00", "us") + np.arange(40) * np.timedelta64(9, "h")
+    ref = leng.Engine(backend="python").compute(tt, NAMES)
+    res = leng.Engine(max_batch=16, backend=name).compute(tt, NAMES)
+    for key in NAMES:
+        assert np.abs(res[key] - ref[key]).max() < 1.0e-15
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        lbk.get("fortran")
+
+def test_jit_fallback(monkeypatch):
+    """ numba が無い場合、jit は numpy にフォールバック """
+    monkeypatch.delitem(lbk.BACKENDS, "jit", raising=False)
+    with pytest.warns(UserWarning):
+        assert lbk.get("jit").name == "numpy"
@@ -0,0 +1,74 @@
+"""
+Tests for the persistent result cache (key, last access time, eviction)
+"""
+import numpy as np
+from lib import cache  as lca
+from lib import engine as leng
+
+TT = np.datetime64("2016-06-21T12:00", "us") + np.arange(8) * np.timedelta64(1, "h")
+
+
+def _atime(cache, version):
+    rows = cache.conn.execute(
+        "SELECT epoch, atime FROM results WHERE version = ? ORDER BY epoch", (version,)
+    ).fetchall()
+    return np.array([r[1] for r in rows])
+
+def test_key(tmp_path):
+    """ キーは地球時とエンジンの設定(設定が違えば共有しない) """
+    cache = lca.ResultCache(str(tmp_path / "c.sqlite"))
+    engine = leng.Engine()
+    res = cache.compute(TT, ["era", "gast"], engine)
+    assert (cache.hits, cache.misses) == (0, len(TT))
+    ref = engine.compute(TT, ["era", "gast"])
+    assert all(np.array_equal(res[name], ref[name]) for name in res)
+    # 同じ地球時を TAI で与えてもヒット
+    cache.compute(TT - np.timedelta64(32184, "ms"), ["era"], engine, scale="tai")
+    assert cache.hits == len(TT)
+    # 計算経路の違うエンジン、UTC の入力は別のバージョン
+    equinox = leng.Engine(route="equinox")
+    assert cache.version_of(equinox) != cache.version_of(engine)
+    assert cache.version_of(engine, "utc") != cache.version_of(engine)
+    cache.compute(TT, ["era"], equinox)
+    assert cache.misses == 2 * len(TT)
+    # 保存していない列はミス
+    _, hit = cache.lookup(TT, ["ee"], cache.version_of(engine))
+    assert not hit.any()
+    cache.close()
+
+def test_touch(tmp_path):
+    """ 最終参照時刻は、TOUCH 秒以上前の行のみ更新 """
+    cache = lca.ResultCache(str(tmp_path / "c.sqlite"))
+    engine = leng.Engine()
+    version = cache.version_of(engine)
+    cache.compute(TT, ["era"], engine)
+    with cache.conn:
+        cache.conn.execute("UPDATE results SET atime = 1000.0")
+        cache.conn.execute(
+            "UPDATE results SET atime = ? WHERE epoch = ?",
+            (1.0e12, int(TT[0].astype("int64")))
+        )
+    cache.lookup(TT[:4], ["era"], version)
+    atime = _atime(cache, version)
+    assert atime[0] == 1.0e12
+    assert (atime[1:4] > 1000.0).all() and (atime[1:4] < 1.0e12).all()
+    assert (atime[4:] == 1000.0).all()
+    cache.close()
+
+def test_evict(tmp_path):
+    """ 最大行数を超えると最終参照が古い順に削除 """
+    path = str(tmp_path / "c.sqlite")
+    cache = lca.ResultCache(path, max_rows=8)
+    engine = leng.Engine()
+    version = cache.version_of(engine)
+    cache.compute(TT, ["era"], engine)
+    with cache.conn:
+        cache.conn.execute("UPDATE results SET atime = epoch / 1.0e6")
+    # 新しい 4 行の保存で、最も古い 4 行(TT[:4])を削除
+    cache.compute(TT[:4] + np.timedelta64(1, "D"), ["era"], engine)
+    assert cache.count == 8
+    _, hit = cache.lookup(TT, ["era"], version)
+    assert not hit[:4].any() and hit[4:].all()
+    cache.close()
+    # 開き直した時の行数
+    assert lca.ResultCache(path, max_rows=8).count == 8
@@ -0,0 +1,43 @@
+"""
+Tests for the CIP X,Y series (IAU 2006/2000A, xy06)
+"""
+import numpy as np
+from lib import backend  as lbk
+from lib import cip_cio  as lcc
+from lib import harmonic as lhm
+from lib import pipeline as lpl
+
+# SOFA t_erfa_c の t_xy06 (2400000.5 + 53736.0 TT)
+T_SOFA = (2400000.5 - 2451545.0 + 53736.0) / 36525.0
+X_SOFA, Y_SOFA = 0.5791308486706010975e-3, 0.4020579816732958141e-4
+# 1 マイクロ秒角 (Unit: rad)
+UAS = 4.84813681109536e-12
+
+
+def test_xy06_sofa():
+    for name in lbk.BACKENDS:
+        x, y = lcc.CipCio(T_SOFA, name).xy_06()
+        assert isinstance(x, float)
+        assert abs(x - X_SOFA) < 1.0e-15
+        assert abs(y - Y_SOFA) < 1.0e-15
+
+def test_xy06_backends_and_harmonics():
+    """ 各バックエンド、共有の引数(Harmonics)の結果が一致 """
+    t = np.linspace(-1.0, 1.0, 41)
+    ref = lcc.CipCio(t, "python").xy_06()
+    for name in lbk.BACKENDS:
+        val = lcc.CipCio(t, name).xy_06()
+        assert max(np.abs(v - r).max() for v, r in zip(val, ref)) < 1.0e-17
+    val = lcc.CipCio(t).xy_06(lhm.Harmonics(t, "sincos"))
+    assert max(np.abs(v - r).max() for v, r in zip(val, ref)) < 1.0e-17
+
+def test_check_cip():
+    """ NPB 行列からの X,Y との差は 2.5 マイクロ秒角以下(1995 - 2050) """
+    tt = np.arange(
+        np.datetime64("1995-01-01"), np.datetime64("2050-01-01"),
+        np.timedelta64(30, "D")
+    ).astype("datetime64[us]")
+    res = lpl.check_cip(tt)
+    assert res["x"] < 2.5 * UAS
+    assert res["y"] < 2.5 * UAS
+    assert res["s"] < 0.05 * UAS
@@ -0,0 +1,19 @@
+"""
+Tests for the thread-pool mode of the engine
+"""
+import numpy as np
+from lib import engine as leng
+
+
+def test_threads():
+    """ スレッド並列の結果は単一スレッドとビット単位で一致 """
+    tt = np.datetime64("2016-06-21T12:00", "us") + np.arange(100) * np.timedelta64(7, "h")
+    ref = leng.Engine(max_batch=16, backend="numpy").compute(tt, leng.NAMES)
+    engine = leng.Engine(max_batch=16, backend="numpy", threads=3)
+    try:
+        # 作業領域はスレッド毎のバックエンドのみ
+        assert getattr(engine.backend, "ws", None) is None
+        res = engine.compute(tt, leng.NAMES)
+        assert all(np.array_equal(res[name], ref[name]) for name in leng.NAMES)
+    finally:
+        engine.close()
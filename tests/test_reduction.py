@@ -0,0 +1,26 @@
+"""
+Tests for the span-adaptive nutation plan
+"""
+from datetime import datetime
+import pytest
+from lib import reduction as lrd
+
+
+@pytest.mark.parametrize("tt_0, tt_1, tol", [
+    (datetime(2016, 6, 21), datetime(2016, 6, 22), 1.0e-13),
+    (datetime(2016, 6, 1), datetime(2016, 7, 1), 1.0e-13),
+    (datetime(2020, 1, 1), datetime(2021, 1, 1), 1.0e-11),
+])
+def test_check_within_bound(tt_0, tt_1, tol):
+    plan = lrd.NutationPlan(tt_0, tt_1, tol)
+    assert plan.kept < plan.n_terms
+    res = plan.check(501)
+    assert isinstance(res["d_psi"], float) and isinstance(res["bound"][0], float)
+    assert res["d_psi"] <= res["bound"][0]
+    assert res["d_eps"] <= res["bound"][1]
+    assert plan.trunc[0] <= tol and plan.trunc[1] <= tol
+
+def test_outside_interval():
+    plan = lrd.NutationPlan(datetime(2016, 6, 21), datetime(2016, 6, 22))
+    with pytest.raises(ValueError):
+        plan.calc_nut_06_a(plan.t_1 + 1.0e-6)
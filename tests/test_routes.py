@@ -0,0 +1,19 @@
+"""
+Tests for the GAST routes (cio, equinox)
+"""
+import numpy as np
+from lib import engine as leng
+
+# 1 マイクロ秒角 (Unit: rad)
+UAS = 4.84813681109536e-12
+
+
+def test_ee_across_zero():
+    """ GAST のみが 2pi -> 0 を跨いだ直後(GMST はまだ 2pi 未満)も EE は同じ """
+    tt = np.datetime64("2016-06-21T06:01:39", "us") \
+       + np.arange(2000) * np.timedelta64(1, "ms")
+    cio = leng.Engine().compute(tt, ["gast", "gmst", "ee"])
+    eqx = leng.Engine(route="equinox").compute(tt, ["ee"])
+    assert ((cio["gast"] > 6.0) & (cio["gmst"] < 1.0)).any() \
+        or ((cio["gast"] < 1.0) & (cio["gmst"] > 6.0)).any()
+    assert np.abs(cio["ee"] - eqx["ee"]).max() < 1.0 * UAS
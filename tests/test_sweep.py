@@ -0,0 +1,50 @@
+"""
+Tests for the sharded sweeps (resume, and a new plan in the same directory)
+"""
+import os
+import numpy as np
+from lib import engine as leng
+from lib import sweep  as lsw
+
+NAMES = ["era", "gast"]
+
+
+def _serial(manifest):
+    tt = np.datetime64(manifest["start"], "us") \
+       + np.arange(manifest["count"]) * np.timedelta64(manifest["step_us"], "us")
+    return leng.Engine(manifest["max_batch"]).compute(tt, manifest["names"])
+
+def test_resume(tmp_path):
+    work = str(tmp_path / "work")
+    manifest = lsw.plan(work, "2016-06-21", "2016-06-22", 600.0, NAMES,
+                        shard_size=32, max_batch=16)
+    assert lsw.run(work, 0, 2) == [0, 2, 4]
+    assert lsw.status(work) == [[0, 2, 4], [1, 3]]
+    # 中断したシャード(マーカーなし)は計算し直す
+    os.remove(lsw._marker(work, 2))
+    assert lsw.run(work) == [1, 2, 3]
+    assert lsw.run(work) == []
+    dst = str(tmp_path / "out.npy")
+    assert lsw.merge(work, dst) == manifest["count"]
+    ref = _serial(manifest)
+    for name in NAMES:
+        assert np.array_equal(np.load(str(tmp_path / "out.{}.npy".format(name))), ref[name])
+
+def test_replan(tmp_path):
+    """ 計画し直した場合、古い計画の完了マーカーと結果は使わない """
+    work = str(tmp_path / "work")
+    lsw.plan(work, "2016-06-21", "2016-06-22", 600.0, NAMES, shard_size=32, max_batch=16)
+    lsw.run(work)
+    manifest = lsw.plan(work, "2016-06-21", "2016-06-22", 300.0, NAMES,
+                        shard_size=32, max_batch=16)
+    done, pending = lsw.status(work)
+    assert done == [] and pending == list(range(len(manifest["shards"])))
+    assert lsw.run(work) == pending
+    dst = str(tmp_path / "out.npy")
+    assert lsw.merge(work, dst) == manifest["count"]
+    ref = _serial(manifest)
+    for name in NAMES:
+        assert np.array_equal(np.load(str(tmp_path / "out.{}.npy".format(name))), ref[name])
+    # 同じ計画なら完了済みのまま
+    lsw.plan(work, "2016-06-21", "2016-06-22", 300.0, NAMES, shard_size=32, max_batch=16)
+    assert lsw.status(work)[1] == []
@@ -0,0 +1,61 @@
+"""
+Tests for the time scale conversion around a leap second
+"""
+import asyncio
+import numpy as np
+from lib import aio    as laio
+from lib import engine as leng
+from lib import time   as ltm
+
+# 2016-12-31 の 23:59:60 にうるう秒(ΔAT: 36 -> 37 秒)
+UTC = np.array([
+    "2016-12-31T23:57:00", "2016-12-31T23:59:00", "2016-12-31T23:59:30",
+    "2016-12-31T23:59:59", "2017-01-01T00:00:00", "2017-01-01T00:01:00",
+], dtype="datetime64[us]")
+
+
+def test_utc_ut1_across_leap_second():
+    """ UTC の UT1 は UTC の ΔT (1972 年以降の DUT1 = 0) """
+    engine = leng.Engine()
+    utc = engine.compute(UTC, ["ut1", "era"], scale="utc")
+    ut1 = engine.compute(UTC, ["ut1", "era"], scale="ut1")
+    assert (utc["ut1"] == UTC).all()
+    assert (ut1["ut1"] == UTC).all()
+    assert np.abs(utc["era"] - ut1["era"]).max() < 1.0e-15
+
+def test_leap_second_row():
+    """ 23:59:60.5 (繰り上げた値 + leap) の TT はうるう秒の前後の間 """
+    engine = leng.Engine()
+    t = np.array(["2016-12-31T23:59:59.5", "2017-01-01T00:00:00.5",
+                  "2017-01-01T00:00:00.5"], dtype="datetime64[us]")
+    leap = np.array([False, True, False])
+    tt = ltm.to_tt(t, "utc", leap)
+    assert (np.diff(tt) == np.timedelta64(1, "s")).all()
+    res = engine.compute(t, ["ut1"], scale="utc", leap=leap)
+    assert res["ut1"][1] == np.datetime64("2017-01-01T00:00:00.5")
+
+def test_utc_tai_round_trip():
+    t = np.datetime64("2016-12-31T23:58:00", "us") \
+      + np.arange(240) * np.timedelta64(500, "ms")
+    tt = ltm.to_tt(t, "utc")
+    utc, leap = ltm.tai2utc(ltm.tt2tai(tt))
+    assert (utc == t).all()
+    assert not leap.any()
+
+def test_async_scale():
+    async def run():
+        async with laio.AsyncEngine() as engine:
+            res = await engine.compute(UTC, ["ut1"], scale="utc")
+            chunks = [res["ut1"]]
+            async for r in engine.stream([UTC[:3], UTC[3:]], ["ut1"], scale="utc"):
+                chunks.append(r["ut1"])
+            return chunks
+    res = asyncio.run(run())
+    assert (res[0] == UTC).all()
+    assert (np.concatenate(res[1:]) == UTC).all()
+
+def test_calc_jd_microsecond():
+    """ datetime と datetime64 のユリウス日(秒未満を含む)が一致 """
+    t = np.datetime64("2016-06-21T12:33:47.184000", "us")
+    jd = ltm.calc_jd(t.item())
+    assert abs(jd - ltm.calc_jd(np.array([t]))[0]) < 1.0e-9
@@ -0,0 +1,60 @@
+"""
+Tests for the bulk timestamp parsing
+"""
+from datetime import datetime
+import numpy as np
+from lib import timestamp as lts
+
+ROWS = [
+    b"20160621",
+    b"20160621123456",
+    b"20160621123456789012",
+    b"2016-06-21",
+    b"2016-06-21T12:34:56",
+    b"2016-06-21 12:34:56.5Z",
+    b"2016-06-21T12:34:56.123456",
+]
+BAD = [
+    b"2016062",                     # 桁数
+    b"20160231",                    # 日付の範囲
+    b"2016-13-01T00:00:00",         # 月の範囲
+    b"2016-06-21T24:00:00",         # 時の範囲
+    b"2016-06-21T12:34:5x",         # 数字でない
+    b"2016-06-21T12:34:56.1234567", # 端数の桁数
+    b"",
+]
+
+
+def _expected(rows):
+    res = []
+    for row in rows:
+        s = row.decode().rstrip("Z").replace(" ", "T")
+        if "-" not in s:
+            s = datetime.strptime(s[:14].ljust(14, "0"), "%Y%m%d%H%M%S").isoformat() \
+              + ("." + s[14:] if len(s) > 14 else "")
+        res.append(np.datetime64(s, "us"))
+    return np.array(res)
+
+def test_parse_formats():
+    ref = _expected(ROWS)
+    for data in (np.array(ROWS), b"\n".join(ROWS) + b"\n", b"\r\n".join(ROWS)):
+        tt, bad = lts.parse(data)
+        assert len(bad) == 0
+        assert (tt.astype("int64") == ref.astype("int64")).all()
+
+def test_parse_bad_rows():
+    rows = [ROWS[1]] + BAD[:3] + [ROWS[4]] + BAD[3:]
+    tt, bad = lts.parse(np.array(rows))
+    assert bad.tolist() == [1, 2, 3, 5, 6, 7, 8]
+    assert np.isnat(tt[bad]).all()
+    assert tt[0] == tt[4] == np.datetime64("2016-06-21T12:34:56", "us")
+
+def test_parse_leap_second():
+    rows = np.array([b"2016-12-31T23:59:60.5", b"20161231235960", b"2016-12-31T23:59:59"])
+    tt, bad = lts.parse(rows)
+    assert bad.tolist() == [0, 1]
+    tt, bad, leap = lts.parse(rows, leap=True)
+    assert len(bad) == 0
+    assert leap.tolist() == [True, True, False]
+    assert tt[0] == np.datetime64("2017-01-01T00:00:00.5", "us")
+    assert tt[1] == np.datetime64("2017-01-01T00:00:00", "us")
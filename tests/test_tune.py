@@ -0,0 +1,30 @@
+"""
+Tests for loading the autotuned settings
+"""
+import os
+import pytest
+from lib import columnar as lcl
+from lib import tune     as ltu
+
+SETTINGS = {"max_batch": 512, "threads": 1, "chunk": 65536, "route": "cio",
+            "cpus": os.cpu_count(), "backend": "NumpyBackend",
+            "names": list(lcl.NAMES)}
+
+
+def test_load(tmp_path):
+    path = str(tmp_path / "tune.json")
+    assert ltu.load(path) == {}
+    ltu.write(SETTINGS, path)
+    assert ltu.load(path, "numpy")["max_batch"] == 512
+    assert ltu.load(path, "numpy", names=lcl.NAMES[::-1])["max_batch"] == 512
+
+@pytest.mark.parametrize("key, value", [
+    ("cpus", -1), ("backend", "PythonBackend"), ("route", "equinox"),
+    ("names", ["era"]),
+])
+def test_load_mismatch(tmp_path, key, value):
+    """ ホスト、バックエンド、計算経路、計算する量の異なる設定は使用しない """
+    path = str(tmp_path / "tune.json")
+    ltu.write(dict(SETTINGS, **{key: value}), path)
+    with pytest.warns(UserWarning):
+        assert ltu.load(path, "numpy") == {}